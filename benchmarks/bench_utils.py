@@ -0,0 +1,72 @@
+# benchmarks/bench_utils.py
+# 벤치마크 공용 함수: 지연 시간 요약(p50/p95/p99), 결과 파일(JSON/CSV) 기록, 테스트 이미지 생성
+import csv
+import io
+import json
+import os
+import platform
+import time
+
+import numpy as np
+from PIL import Image
+
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def summarize(values: list) -> dict:
+    """값 목록(초)을 개수, 평균, p50/p95/p99, 최대값(ms)으로 요약합니다."""
+    if not values:
+        return {"count": 0}
+    array = np.asarray(values, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(array, [50, 95, 99])
+    return {
+        "count": len(values),
+        "mean_ms": round(float(array.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(array.max()), 3),
+    }
+
+
+def make_test_image(size: int, seed: int) -> bytes:
+    """seed마다 내용이 다른 size x size JPEG을 만듭니다. (판별 결과 캐시에 걸리지 않도록)"""
+    rng = np.random.default_rng(seed)
+    # 노이즈만 있으면 JPEG이 비정상적으로 커지므로 작은 노이즈를 크게 늘려 사진과 비슷한 크기로 만듭니다.
+    small = rng.integers(0, 256, size=(max(1, size // 16), max(1, size // 16), 3), dtype=np.uint8)
+    image = Image.fromarray(small).resize((size, size), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def environment_info() -> dict:
+    """결과를 비교할 때 함께 봐야 할 실행 환경 정보"""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def write_results(name: str, report: dict, rows: list, output_dir: str = DEFAULT_OUTPUT_DIR) -> tuple:
+    """
+    요약 보고서는 JSON으로, 측정 행 목록은 CSV로 저장합니다.
+
+    Returns:
+        tuple: (JSON 경로, CSV 경로)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    stem = os.path.join(output_dir, f"{name}_{time.strftime('%Y%m%d-%H%M%S')}")
+    with open(f"{stem}.json", "w", encoding="utf-8") as f:
+        json.dump({**report, "environment": environment_info()}, f, indent=2, ensure_ascii=False)
+
+    fieldnames = []
+    for row in rows:
+        fieldnames.extend(key for key in row if key not in fieldnames)
+    with open(f"{stem}.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    return f"{stem}.json", f"{stem}.csv"
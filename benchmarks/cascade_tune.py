@@ -0,0 +1,152 @@
+# benchmarks/cascade_tune.py
+# 2단계(cascade) 추론의 재판별 구간(CASCADE_BAND_LOW/HIGH)을 라벨이 있는 로컬 이미지로 고릅니다.
+#
+# 사용법:
+#   python benchmarks/cascade_tune.py --data-dir ./labeled                     # labeled/real/*, labeled/fake/*
+#   python benchmarks/cascade_tune.py --data-dir ./labeled --screen-engine onnx-int8 --max-accuracy-loss 0.002
+#   python benchmarks/cascade_tune.py --data-dir ./labeled --screen-size 0    # 선별 엔진을 전체 모델과 같은 해상도로
+#   INFERENCE_ENGINE=onnx python benchmarks/cascade_tune.py --data-dir ./labeled  # 전체 모델 엔진 바꾸기
+#
+# 모든 이미지를 선별 엔진(--screen-size 해상도)과 전체 모델로 한 번씩 채점하고 이미지당 시간을 잰 뒤, 구간 후보마다
+#   - 전체 모델로 넘어가는 비율, 정확도(전체 모델만 쓸 때와의 차이), 예상 처리량 향상
+# 을 계산해 표(CSV)로 남기고, 정확도 손실 허용치 안에서 처리량이 가장 큰 구간을 추천합니다.
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from bench_utils import write_results, DEFAULT_OUTPUT_DIR
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model_project"))
+# 이 스크립트가 두 단계를 직접 따로 채점하므로 모델 로드 시 선별 엔진은 읽지 않습니다.
+os.environ["CASCADE_SCREEN_ENGINE"] = ""
+import predict
+from preprocess import FastPreprocessor
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def load_labeled_paths(data_dir: str) -> list:
+    """data_dir 아래 폴더 이름(real/fake 등)을 정답으로 하는 (이미지 경로, 'Real' 또는 'Fake') 목록"""
+    samples = []
+    for folder in sorted(os.listdir(data_dir)):
+        folder_path = os.path.join(data_dir, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        label = predict._to_class(folder)
+        for root, _, files in os.walk(folder_path):
+            samples.extend((os.path.join(root, name), label) for name in sorted(files)
+                           if name.lower().endswith(IMAGE_EXTENSIONS))
+    return samples
+
+
+def score_all(classifier, labels: dict, preprocessor: FastPreprocessor, batches: list) -> tuple:
+    """
+    디코딩된 이미지 배치들을 preprocessor로 전처리해 classifier로 채점하고
+    (이미지별 Fake 확률, 이미지당 평균 시간(초))를 반환합니다. (시간에는 리사이즈/정규화도 포함)
+    """
+    scores, elapsed = [], 0.0
+    for images in batches:
+        started = time.perf_counter()
+        probs = classifier.predict_pixel_values(preprocessor.to_pixel_values(images))
+        elapsed += time.perf_counter() - started
+        scores.append(predict.fake_probabilities(probs, labels))
+    fake_probs = np.concatenate(scores)
+    return fake_probs, elapsed / len(fake_probs)
+
+
+def evaluate_band(low: float, high: float, truth: np.ndarray, screen_fake: np.ndarray, full_fake: np.ndarray,
+                  screen_seconds: float, full_seconds: float) -> dict:
+    """구간 [low, high]을 쓸 때의 재판별 비율, 정확도, 예상 이미지당 시간과 처리량 향상"""
+    escalated = (screen_fake >= low) & (screen_fake <= high)
+    cascade_fake = np.where(escalated, full_fake, screen_fake) > 0.5
+    escalation_rate = float(escalated.mean())
+    seconds = screen_seconds + escalation_rate * full_seconds
+    return {
+        "band_low": round(low, 3),
+        "band_high": round(high, 3),
+        "escalation_rate": round(escalation_rate, 4),
+        "accuracy": round(float((cascade_fake == truth).mean()), 4),
+        "seconds_per_image": round(seconds, 6),
+        "speedup": round(full_seconds / seconds, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="2단계 추론 재판별 구간 튜닝 (처리량 향상 대 정확도 손실)")
+    parser.add_argument("--data-dir", required=True, help="real/, fake/ 하위 폴더에 이미지가 있는 폴더")
+    parser.add_argument("--screen-engine", default="onnx-int8", choices=predict.SCREEN_ENGINES)
+    parser.add_argument("--screen-size", type=int, default=predict.CASCADE_SCREEN_SIZE,
+                        help="선별 엔진 입력 해상도 (0이면 전체 모델과 같은 크기)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-accuracy-loss", type=float, default=0.005,
+                        help="전체 모델만 쓸 때보다 허용할 정확도 하락 (0.005 = 0.5%p)")
+    parser.add_argument("--step", type=float, default=0.05, help="구간 후보 간격")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    args = parser.parse_args()
+
+    samples = load_labeled_paths(args.data_dir)
+    if not samples:
+        parser.error(f"이미지를 찾을 수 없습니다: {args.data_dir}")
+    truth = np.array([label == "Fake" for _, label in samples])
+    print(f"이미지 {len(samples)}장 (Fake {int(truth.sum())}, Real {int((~truth).sum())})")
+
+    predict.load_model()
+    screener, screen_labels = predict._load_engine(args.screen_engine, input_size=args.screen_size or None)
+    screen_preprocessor = FastPreprocessor(screener.image_processor)
+
+    # 디코딩은 두 단계가 함께 쓰므로 한 번만 하고 시간 측정에서 뺍니다. (리사이즈/정규화는 단계마다 따로)
+    batches = []
+    for start in range(0, len(samples), args.batch_size):
+        batches.append([predict.preprocessor.decode(path) for path, _ in samples[start:start + args.batch_size]])
+    # 첫 호출의 준비 비용이 섞이지 않도록 한 번씩 미리 실행
+    screener.predict_pixel_values(screen_preprocessor.to_pixel_values(batches[0]))
+    predict.predict_pixel_values(predict.preprocessor.to_pixel_values(batches[0]))
+
+    screen_fake, screen_seconds = score_all(screener, screen_labels, screen_preprocessor, batches)
+    full_fake, full_seconds = score_all(predict, predict.id2label, predict.preprocessor, batches)
+    full_accuracy = float(((full_fake > 0.5) == truth).mean())
+    screen_accuracy = float(((screen_fake > 0.5) == truth).mean())
+    print(f"전체 모델: 정확도 {full_accuracy:.4f}, {full_seconds * 1000:.2f}ms/장")
+    print(f"선별 엔진: 정확도 {screen_accuracy:.4f}, {screen_seconds * 1000:.2f}ms/장 "
+          f"({args.screen_engine}, {screen_preprocessor.width}x{screen_preprocessor.height})")
+
+    rows = []
+    for low in np.arange(0.0, 0.5, args.step):
+        for high in np.arange(0.5 + args.step, 1.0 + 1e-9, args.step):
+            row = evaluate_band(low, min(high, 1.0), truth, screen_fake, full_fake, screen_seconds, full_seconds)
+            row["accuracy_loss"] = round(full_accuracy - row["accuracy"], 4)
+            rows.append(row)
+
+    allowed = [row for row in rows if row["accuracy_loss"] <= args.max_accuracy_loss]
+    recommended = max(allowed, key=lambda row: (row["speedup"], -row["accuracy_loss"])) if allowed else None
+
+    report = {
+        "config": vars(args),
+        "engine": predict.INFERENCE_ENGINE,
+        "samples": len(samples),
+        "full_model": {"accuracy": round(full_accuracy, 4), "seconds_per_image": round(full_seconds, 6)},
+        "screen_engine": {"engine": args.screen_engine, "input_size": args.screen_size or None,
+                          "accuracy": round(screen_accuracy, 4), "seconds_per_image": round(screen_seconds, 6)},
+        "recommended": recommended,
+    }
+    screen_name = f"{args.screen_engine}_{args.screen_size}px" if args.screen_size else args.screen_engine
+    json_path, csv_path = write_results(f"cascade_{screen_name}", report, rows, args.output_dir)
+
+    if recommended is None:
+        print(f"⚠️ 정확도 손실 {args.max_accuracy_loss} 이내인 구간이 없습니다. (선별 엔진이 너무 부정확함)")
+    elif recommended["speedup"] <= 1.0:
+        print("⚠️ 어떤 구간도 처리량을 높이지 못합니다. (선별 엔진이 전체 모델보다 충분히 빠르지 않음)")
+    else:
+        print(f"추천 구간: [{recommended['band_low']}, {recommended['band_high']}] "
+              f"재판별 {recommended['escalation_rate'] * 100:.1f}%, 처리량 x{recommended['speedup']}, "
+              f"정확도 손실 {recommended['accuracy_loss'] * 100:.2f}%p")
+        print(f"  CASCADE_SCREEN_ENGINE={args.screen_engine} CASCADE_SCREEN_SIZE={args.screen_size} "
+              f"CASCADE_BAND_LOW={recommended['band_low']} CASCADE_BAND_HIGH={recommended['band_high']}")
+    print(f"✅ 결과 저장: {json_path}, {csv_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# benchmarks/load_test.py
+# 중개 서버(/upload/, /status/)에 부하를 걸어 처리량과 단계별 지연 시간(p50/p95/p99)을 측정합니다.
+#
+# 사용법:
+#   python benchmarks/load_test.py --stub-model                          # 가짜 모델로 파이프라인 구간만 측정 (closed-loop)
+#   python benchmarks/load_test.py --mode closed --concurrency 32 --requests 1000
+#   python benchmarks/load_test.py --mode open --rate 50 --duration 30   # 초당 50건 (포아송 도착)
+#   python benchmarks/load_test.py --broker-url http://10.0.0.5:8000     # 이미 떠 있는 서버 대상
+#   python benchmarks/load_test.py --stub-model --workers 3               # Worker 3대로 늘렸을 때의 처리량
+#
+# --broker-url을 주지 않으면 worker_api와 main_api를 로컬 스토리지(STORAGE_BACKEND=local)로 직접 띄웁니다.
+# 결과는 benchmarks/results/ 아래에 요약(JSON)과 요청별 측정값(CSV)으로 저장됩니다.
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from bench_utils import make_test_image, summarize, write_results, DEFAULT_OUTPUT_DIR
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+def start_servers(args, work_dir: str) -> list:
+    """
+    로컬 스토리지를 함께 쓰는 Worker(들)와 중개 서버를 띄우고, 준비될 때까지 기다립니다.
+
+    서버가 쓰는 파일(스토리지, 작업/결과 DB, 판별 캐시, 리포트 보관함)은 모두 work_dir 안에 만들어
+    측정이 끝나면 함께 지워지고 저장소 폴더에는 남지 않습니다. (모델 스냅샷/ONNX 캐시는 다시 받지 않도록 공유)
+    """
+    worker_ports = [args.worker_port + index for index in range(args.workers)]
+    env = {
+        **os.environ,
+        "STORAGE_BACKEND": "local",
+        "STORAGE_LOCAL_ROOT": os.path.join(work_dir, "storage"),
+        "TASK_STORE": "memory",
+        "TASK_STORE_PATH": os.path.join(work_dir, "tasks.db"),
+        "RESULTS_DB_URL": f"sqlite:///{os.path.join(work_dir, 'results.db')}",
+        "VERDICT_CACHE_PATH": os.path.join(work_dir, "verdict_cache.db"),
+        "REPORT_ARCHIVE_DIR": os.path.join(work_dir, "report_archive"),
+        "WORKER_BASE_URLS": ",".join(f"http://127.0.0.1:{port}" for port in worker_ports),
+    }
+    if args.stub_model:
+        env["INFERENCE_ENGINE"] = "stub"
+
+    processes = []
+    servers = [(f"worker{index}", "worker_api:app", "model_project", port) for index, port in enumerate(worker_ports)]
+    servers.append(("broker", "main_api:app", "streamlit_project", args.broker_port))
+    for name, module, cwd, port in servers:
+        log = open(os.path.join(work_dir, f"{name}.log"), "wb")
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", module, "--host", "127.0.0.1", "--port", str(port),
+             "--log-level", "warning"],
+            cwd=os.path.join(REPO_ROOT, cwd), env=env, stdout=log, stderr=subprocess.STDOUT,
+        ))
+
+    deadline = time.monotonic() + args.startup_timeout
+    ready_urls = [f"http://127.0.0.1:{port}/readyz" for port in worker_ports]
+    for url in (*ready_urls, f"http://127.0.0.1:{args.broker_port}/cache/stats"):
+        while True:
+            if any(process.poll() is not None for process in processes):
+                stop_servers(processes)
+                raise RuntimeError(f"서버가 시작 중에 종료되었습니다. 로그: {work_dir}")
+            try:
+                if httpx.get(url, timeout=1.0).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                stop_servers(processes)
+                raise TimeoutError(f"서버 준비 시간 초과: {url} (로그: {work_dir})")
+            time.sleep(0.5)
+    print(f"✅ 서버 준비 완료 (로그: {work_dir})")
+    return processes
+
+
+def stop_servers(processes: list):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def run_one(client: httpx.AsyncClient, broker_url: str, index: int, image: bytes) -> dict:
+    """이미지 하나를 올리고 끝날 때까지 long-polling으로 기다린 뒤 측정값 한 행을 반환합니다."""
+    row = {"index": index}
+    started = time.perf_counter()
+    try:
+        response = await client.post(f"{broker_url}/upload/",
+                                     files={"file": (f"bench_{index}.jpg", image, "image/jpeg")})
+        row["accept_latency"] = time.perf_counter() - started
+        if response.status_code != 200:
+            row["status"] = "rejected" if response.status_code == 429 else f"http_{response.status_code}"
+            return row
+
+        task_id = response.json()["task_id"]
+        while True:
+            status = (await client.get(f"{broker_url}/status/{task_id}", params={"wait": 30})).json()
+            if status.get("status") in TERMINAL_STATUSES or status.get("status") == "not_found":
+                break
+        row["end_to_end"] = time.perf_counter() - started
+        row["status"] = status["status"]
+        result = status.get("result") or {}
+        if "error" in result:
+            row["error"] = result["error"]
+        for stage, seconds in (result.get("timings") or {}).items():
+            row[f"stage_{stage}"] = seconds
+    except httpx.HTTPError as e:
+        row["status"] = "client_error"
+        row["error"] = repr(e)
+    return row
+
+
+async def closed_loop(client, broker_url: str, images: list, concurrency: int) -> list:
+    """concurrency개의 가상 사용자가 각자 응답을 받은 뒤 다음 요청을 보냅니다."""
+    rows, next_index = [], iter(range(len(images)))
+
+    async def user():
+        for index in next_index:
+            rows.append(await run_one(client, broker_url, index, images[index]))
+
+    await asyncio.gather(*[user() for _ in range(concurrency)])
+    return rows
+
+
+async def open_loop(client, broker_url: str, images: list, rate: float) -> list:
+    """응답과 관계없이 평균 rate건/초의 포아송 도착 간격으로 요청을 보냅니다."""
+    tasks, next_time = [], time.perf_counter()
+    for index, image in enumerate(images):
+        delay = next_time - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(run_one(client, broker_url, index, image)))
+        next_time += random.expovariate(rate)
+    return list(await asyncio.gather(*tasks))
+
+
+def build_report(args, rows: list, elapsed: float) -> dict:
+    completed = [row for row in rows if row.get("status") == "completed"]
+    stages = sorted({key for row in completed for key in row if key.startswith("stage_")})
+    statuses = {}
+    for row in rows:
+        statuses[row.get("status")] = statuses.get(row.get("status"), 0) + 1
+    return {
+        "config": vars(args),
+        "requests": len(rows),
+        "statuses": statuses,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(completed) / elapsed, 3) if elapsed else 0.0,
+        "latency": {
+            "accept": summarize([row["accept_latency"] for row in rows if "accept_latency" in row]),
+            "end_to_end": summarize([row["end_to_end"] for row in completed]),
+            **{stage[len("stage_"):]: summarize([row[stage] for row in completed if stage in row])
+               for stage in stages},
+        },
+    }
+
+
+async def run_benchmark(args, broker_url: str) -> tuple:
+    count = args.requests if args.mode == "closed" else int(args.rate * args.duration)
+    print(f"테스트 이미지 {count}장 생성 중... ({args.image_size}px)")
+    images = [make_test_image(args.image_size, args.seed + index) for index in range(count)]
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=256)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(300.0, connect=10.0), limits=limits) as client:
+        print(f"부하 시작: mode={args.mode}, requests={count}")
+        started = time.perf_counter()
+        if args.mode == "closed":
+            rows = await closed_loop(client, broker_url, images, args.concurrency)
+        else:
+            rows = await open_loop(client, broker_url, images, args.rate)
+        elapsed = time.perf_counter() - started
+    return rows, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="중개 서버 부하 테스트 (처리량 / 단계별 지연 시간)")
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--concurrency", type=int, default=16, help="closed-loop 동시 사용자 수")
+    parser.add_argument("--requests", type=int, default=200, help="closed-loop 전체 요청 수")
+    parser.add_argument("--rate", type=float, default=20.0, help="open-loop 초당 요청 수")
+    parser.add_argument("--duration", type=float, default=10.0, help="open-loop 부하 시간(초)")
+    parser.add_argument("--image-size", type=int, default=512)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stub-model", action="store_true", help="가짜 모델로 파이프라인 구간만 측정")
+    parser.add_argument("--broker-url", help="이미 떠 있는 중개 서버 주소 (주면 서버를 띄우지 않음)")
+    parser.add_argument("--broker-port", type=int, default=18000)
+    parser.add_argument("--worker-port", type=int, default=18001, help="첫 Worker 포트 (다음 Worker는 1씩 증가)")
+    parser.add_argument("--workers", type=int, default=1, help="직접 띄울 Worker 수")
+    parser.add_argument("--startup-timeout", type=float, default=600.0)
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--name", default=None, help="결과 파일 이름 접두어 (기본: load_<mode>)")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    processes = []
+    with tempfile.TemporaryDirectory(prefix="trufy-bench-") as work_dir:
+        broker_url = args.broker_url
+        if broker_url is None:
+            processes = start_servers(args, work_dir)
+            broker_url = f"http://127.0.0.1:{args.broker_port}"
+        try:
+            rows, elapsed = asyncio.run(run_benchmark(args, broker_url.rstrip("/")))
+        finally:
+            stop_servers(processes)
+
+    report = build_report(args, rows, elapsed)
+    json_path, csv_path = write_results(args.name or f"load_{args.mode}", report, rows, args.output_dir)
+    print(f"처리량: {report['throughput_rps']} req/s, 상태: {report['statuses']}")
+    for stage, summary in report["latency"].items():
+        if summary["count"]:
+            print(f"  {stage:<16} p50={summary['p50_ms']:>9.2f}ms  p95={summary['p95_ms']:>9.2f}ms  "
+                  f"p99={summary['p99_ms']:>9.2f}ms")
+    print(f"✅ 결과 저장: {json_path}, {csv_path}")
+
+
+if __name__ == "__main__":
+    main()
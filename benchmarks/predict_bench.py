@@ -0,0 +1,76 @@
+# benchmarks/predict_bench.py
+# predict_deepfake_from_path 마이크로 벤치마크: 입력 이미지 크기별 디코딩/전체 예측 시간
+#
+# 사용법:
+#   python benchmarks/predict_bench.py                               # 기본 크기 256~4096px
+#   python benchmarks/predict_bench.py --sizes 512,1024 --repeats 50
+#   INFERENCE_ENGINE=onnx-int8 python benchmarks/predict_bench.py     # 엔진별 비교
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from bench_utils import make_test_image, summarize, write_results, DEFAULT_OUTPUT_DIR
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model_project"))
+import predict
+
+
+def time_calls(function, argument, repeats: int, warmup: int) -> list:
+    """function(argument)를 warmup번 먼저 실행한 뒤 repeats번 실행한 시간(초) 목록을 반환합니다."""
+    for _ in range(warmup):
+        function(argument)
+    durations = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function(argument)
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="predict_deepfake_from_path 이미지 크기별 마이크로 벤치마크")
+    parser.add_argument("--sizes", default="256,512,1024,2048,4096", help="쉼표로 구분한 정사각형 이미지 한 변(px)")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    args = parser.parse_args()
+
+    load_started = time.perf_counter()
+    predict.load_model()
+    load_seconds = time.perf_counter() - load_started
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="trufy-predict-bench-") as work_dir:
+        for size in (int(value) for value in args.sizes.split(",")):
+            path = os.path.join(work_dir, f"{size}.jpg")
+            image_bytes = make_test_image(size, seed=size)
+            with open(path, "wb") as f:
+                f.write(image_bytes)
+
+            decode = summarize(time_calls(predict.decode_image_bytes, image_bytes, args.repeats, args.warmup))
+            total = summarize(time_calls(predict.predict_deepfake_from_path, path, args.repeats, args.warmup))
+            rows.append({
+                "size": size,
+                "file_bytes": os.path.getsize(path),
+                **{f"decode_{key}": value for key, value in decode.items() if key != "count"},
+                **{f"predict_{key}": value for key, value in total.items() if key != "count"},
+            })
+            print(f"{size:>5}px  decode p50={decode['p50_ms']:>8.2f}ms  predict p50={total['p50_ms']:>8.2f}ms  "
+                  f"p95={total['p95_ms']:>8.2f}ms")
+
+    report = {
+        "config": vars(args),
+        "engine": predict.INFERENCE_ENGINE,
+        "fast_preprocess": predict.FAST_PREPROCESS,
+        "model": predict.model_status(),
+        "load_seconds": round(load_seconds, 3),
+        "results": rows,
+    }
+    json_path, csv_path = write_results(f"predict_{predict.INFERENCE_ENGINE}", report, rows, args.output_dir)
+    print(f"✅ 결과 저장: {json_path}, {csv_path}")
+
+
+if __name__ == "__main__":
+    main()
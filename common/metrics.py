@@ -0,0 +1,185 @@
+# common/metrics.py
+# 중개 서버와 모델 서버가 함께 쓰는 Prometheus 텍스트 형식 지표
+#
+# 외부 라이브러리 없이 카운터/게이지/히스토그램을 프로세스 메모리에 모아 두고,
+# 각 서버의 /metrics 엔드포인트가 render_metrics()의 결과를 그대로 돌려줍니다.
+#
+# 단계(stage)별 처리 시간은 하나의 히스토그램(trufy_stage_seconds)에 stage 레이블로 모읍니다.
+#   중개 서버: upload, worker_signal
+#   모델 서버: download, decode, batch_inference(배치 대기 포함), preprocess, inference, cleanup
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 처리 시간 히스토그램 구간 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 레이블이 맞지 않습니다: {sorted(labels)} != {sorted(self.labelnames)}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def _samples(self):
+        with self._lock:
+            return [(self.name, key, "", value) for key, value in sorted(self._values.items())]
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, key, extra, value in self._samples():
+            lines.append(f"{name}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """증가만 하는 누적 값 (예: 단계별 오류 수)"""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """현재 값 (예: 처리 중인 작업 수, 대기열 길이)"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        """지표를 읽을 때마다 function()의 반환값을 값으로 사용합니다. (레이블 없는 게이지 전용)"""
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            return [(self.name, (), "", self._function())]
+        return super()._samples()
+
+
+class Histogram(_Metric):
+    """값의 분포 (예: 단계별 처리 시간, 배치 크기)"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def _samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, counts):
+                    samples.append((f"{self.name}_bucket", key, f'le="{_format_value(float(bound))}"', count))
+                samples.append((f"{self.name}_sum", key, "", total))
+                samples.append((f"{self.name}_count", key, "", counts[-1]))
+        return samples
+
+
+class Registry:
+    """프로세스 안의 모든 지표 목록"""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            if any(existing.name == metric.name for existing in self._metrics):
+                raise ValueError(f"이미 등록된 지표입니다: {metric.name}")
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = Histogram("trufy_stage_seconds", "단계별 처리 시간(초)", ("stage",))
+STAGE_ERRORS = Counter("trufy_stage_errors_total", "단계별 오류 수", ("stage",))
+
+
+def render_metrics() -> str:
+    """등록된 모든 지표를 Prometheus 텍스트 형식으로 반환합니다."""
+    return REGISTRY.render()
+
+
+def record_error(stage: str):
+    """예외 없이 실패를 반환하는 단계의 오류를 기록합니다."""
+    STAGE_ERRORS.inc(stage=stage)
+
+
+@contextmanager
+def track_stage(stage: str, timings: dict = None):
+    """
+    with 블록의 실행 시간을 stage 히스토그램에 기록하고, 예외가 나면 stage 오류 수를 올립니다.
+
+    timings dict를 주면 작업별 결과에 넣을 수 있도록 timings[stage]에 걸린 시간(초)도 기록합니다.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        if timings is not None:
+            timings[stage] = round(elapsed, 4)
@@ -0,0 +1,306 @@
+# common/storage.py
+# 중개 서버(streamlit_project)와 모델 서버(model_project)가 함께 쓰는 스토리지 계층
+#
+# STORAGE_BACKEND 환경 변수로 구현을 고릅니다.
+#   s3     : NCP Object Storage (S3 호환, 기본값)
+#   local  : 로컬 파일 시스템 (한 서버에서 중개/모델 서버를 함께 띄우는 테스트/벤치마크용)
+#   memory : 프로세스 메모리 (단위 테스트용)
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+NCP_S3_ENDPOINT = os.getenv("NCP_S3_ENDPOINT", "https://kr.object.ncloudstorage.com")
+NCP_S3_ACCESS_KEY_ID = os.getenv("NCP_S3_ACCESS_KEY_ID", "")
+NCP_S3_SECRET_ACCESS_KEY = os.getenv("NCP_S3_SECRET_ACCESS_KEY", "")
+NCP_S3_REGION = os.getenv("NCP_S3_REGION", "kr-standard")
+NCP_S3_BUCKET = os.getenv("NCP_S3_BUCKET", "")
+
+# S3 연결 풀 / 재시도 / 동시 전송 설정
+STORAGE_MAX_POOL_CONNECTIONS = int(os.getenv("STORAGE_MAX_POOL_CONNECTIONS", "64"))
+STORAGE_MAX_RETRIES = int(os.getenv("STORAGE_MAX_RETRIES", "5"))
+STORAGE_TRANSFER_CONCURRENCY = int(os.getenv("STORAGE_TRANSFER_CONCURRENCY", "8"))
+# 일괄 get/put에 사용할 최대 동시 요청 수
+STORAGE_BATCH_CONCURRENCY = int(os.getenv("STORAGE_BATCH_CONCURRENCY", "16"))
+
+STORAGE_LOCAL_ROOT = os.getenv("STORAGE_LOCAL_ROOT", "local_storage")
+
+
+def object_key(object_name: str, when: datetime = None) -> str:
+    """
+    객체 이름에 날짜 폴더를 붙인 저장소 키를 만듭니다.
+
+    날짜는 호출 시점에 계산하므로 오래 떠 있는 프로세스에서도 자정이 지나면 새 날짜가 쓰입니다.
+    같은 파일을 가리키려면 업로드할 때 만든 키를 그대로 전달해서 사용해야 합니다.
+    """
+    return f"{(when or datetime.today()).strftime('%Y-%m-%d')}/{object_name}"
+
+
+class StorageBackend:
+    """스토리지 인터페이스. 키는 object_key()로 만든 '날짜/객체 이름' 형식입니다."""
+
+    def put(self, key: str, data: bytes, public: bool = False):
+        raise NotImplementedError
+
+    def get(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def download_fileobj(self, key: str, fileobj):
+        """객체를 조각 단위로 받아 파일 객체에 씁니다. (큰 파일용)"""
+        fileobj.write(self.get(key))
+
+    def list_keys(self, prefix: str = "", start_after: str = None):
+        """prefix로 시작하는 키를 사전순으로 반환합니다. start_after가 있으면 그 다음 키부터."""
+        raise NotImplementedError
+
+    def create_multipart_upload(self, key: str, public: bool = False) -> str:
+        raise NotImplementedError
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, data: bytes) -> str:
+        raise NotImplementedError
+
+    def complete_multipart_upload(self, key: str, upload_id: str, etags: list):
+        """etags는 파트 번호 순서의 ETag 목록입니다."""
+        raise NotImplementedError
+
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        raise NotImplementedError
+
+    def put_many(self, items: list, public: bool = False) -> list:
+        """(키, 내용) 목록을 동시에 업로드하고 항목별 성공 여부 목록을 반환합니다."""
+        def put_one(item):
+            try:
+                self.put(item[0], item[1], public=public)
+                return True
+            except Exception as e:
+                print(f"❌ 스토리지 업로드 실패: {item[0]} - {e}")
+                return False
+        with ThreadPoolExecutor(max_workers=STORAGE_BATCH_CONCURRENCY) as executor:
+            return list(executor.map(put_one, items))
+
+    def get_many(self, keys: list) -> list:
+        """키 목록을 동시에 다운로드하고 항목별 내용(실패 시 None) 목록을 반환합니다."""
+        def get_one(key):
+            try:
+                return self.get(key)
+            except Exception as e:
+                print(f"❌ 스토리지 다운로드 실패: {key} - {e}")
+                return None
+        with ThreadPoolExecutor(max_workers=STORAGE_BATCH_CONCURRENCY) as executor:
+            return list(executor.map(get_one, keys))
+
+
+class S3Storage(StorageBackend):
+    """NCP Object Storage(S3 호환) 구현. 연결 풀과 재시도 설정을 한 곳에서 조정합니다."""
+
+    def __init__(self, bucket: str = NCP_S3_BUCKET):
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+
+        self.bucket = bucket
+        self.client = boto3.client(
+            's3',
+            endpoint_url=NCP_S3_ENDPOINT,
+            region_name=NCP_S3_REGION,
+            aws_access_key_id=NCP_S3_ACCESS_KEY_ID,
+            aws_secret_access_key=NCP_S3_SECRET_ACCESS_KEY,
+            config=Config(
+                max_pool_connections=STORAGE_MAX_POOL_CONNECTIONS,
+                retries={'max_attempts': STORAGE_MAX_RETRIES, 'mode': 'adaptive'},
+                connect_timeout=5,
+                read_timeout=60,
+                tcp_keepalive=True,
+            ),
+        )
+        self.transfer_config = TransferConfig(max_concurrency=STORAGE_TRANSFER_CONCURRENCY)
+
+    def put(self, key: str, data: bytes, public: bool = False):
+        extra = {'ACL': 'public-read'} if public else {}
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, **extra)
+
+    def get(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+
+    def download_fileobj(self, key: str, fileobj):
+        self.client.download_fileobj(self.bucket, key, fileobj, Config=self.transfer_config)
+
+    def list_keys(self, prefix: str = "", start_after: str = None):
+        paginator = self.client.get_paginator('list_objects_v2')
+        params = {'Bucket': self.bucket, 'Prefix': prefix}
+        if start_after:
+            params['StartAfter'] = start_after
+        for page in paginator.paginate(**params):
+            for item in page.get('Contents', []):
+                yield item['Key']
+
+    def create_multipart_upload(self, key: str, public: bool = False) -> str:
+        extra = {'ACL': 'public-read'} if public else {}
+        return self.client.create_multipart_upload(Bucket=self.bucket, Key=key, **extra)['UploadId']
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, data: bytes) -> str:
+        return self.client.upload_part(Bucket=self.bucket, Key=key, UploadId=upload_id,
+                                       PartNumber=part_number, Body=data)['ETag']
+
+    def complete_multipart_upload(self, key: str, upload_id: str, etags: list):
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=key, UploadId=upload_id,
+            MultipartUpload={'Parts': [{'ETag': etag, 'PartNumber': number} for number, etag in enumerate(etags, 1)]}
+        )
+
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+
+class LocalStorage(StorageBackend):
+    """로컬 폴더를 버킷처럼 쓰는 구현. 중개 서버와 모델 서버가 같은 폴더를 보면 함께 쓸 수 있습니다."""
+
+    def __init__(self, root: str = STORAGE_LOCAL_ROOT):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"잘못된 키입니다: {key}")
+        return path
+
+    def put(self, key: str, data: bytes, public: bool = False):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 읽는 쪽이 쓰다 만 파일을 보지 않도록 임시 파일에 쓴 뒤 이름을 바꿉니다.
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def download_fileobj(self, key: str, fileobj):
+        with open(self._path(key), "rb") as f:
+            shutil.copyfileobj(f, fileobj)
+
+    def list_keys(self, prefix: str = "", start_after: str = None):
+        """
+        폴더를 이름순으로 하나씩 열면서 키를 바로 반환합니다. (전체 목록을 메모리에 모으지 않음)
+
+        prefix와 겹치지 않거나 전부 start_after 이전인 폴더는 열지 않습니다.
+        """
+        yield from self._walk_keys("", prefix, start_after)
+
+    def _walk_keys(self, relative: str, prefix: str, start_after: str):
+        with os.scandir(os.path.join(self.root, relative)) as entries:
+            # 폴더는 '이름/'으로 정렬해야 그 안의 키까지 포함한 전체 키의 사전순과 같아집니다.
+            children = sorted((entry.name + "/" if entry.is_dir(follow_symlinks=False) else entry.name)
+                              for entry in entries)
+        for child in children:
+            key = relative + child
+            if child.endswith("/"):
+                if key == ".multipart/":
+                    # 진행 중인 멀티파트 업로드의 파트 파일은 제외
+                    continue
+                if not (key.startswith(prefix) or prefix.startswith(key)):
+                    continue
+                if start_after is not None and key < start_after and not start_after.startswith(key):
+                    continue
+                yield from self._walk_keys(key, prefix, start_after)
+            elif (not child.endswith(".tmp") and key.startswith(prefix)
+                  and (start_after is None or key > start_after)):
+                yield key
+
+    def _parts_dir(self, upload_id: str) -> str:
+        return os.path.join(self.root, ".multipart", upload_id)
+
+    def create_multipart_upload(self, key: str, public: bool = False) -> str:
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._parts_dir(upload_id))
+        return upload_id
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, data: bytes) -> str:
+        with open(os.path.join(self._parts_dir(upload_id), f"{part_number:05d}"), "wb") as f:
+            f.write(data)
+        return f"{upload_id}-{part_number}"
+
+    def complete_multipart_upload(self, key: str, upload_id: str, etags: list):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{upload_id}.tmp"
+        with open(temp_path, "wb") as out:
+            for number in range(1, len(etags) + 1):
+                with open(os.path.join(self._parts_dir(upload_id), f"{number:05d}"), "rb") as part:
+                    shutil.copyfileobj(part, out)
+        os.replace(temp_path, path)
+        shutil.rmtree(self._parts_dir(upload_id), ignore_errors=True)
+
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        shutil.rmtree(self._parts_dir(upload_id), ignore_errors=True)
+
+
+class MemoryStorage(StorageBackend):
+    """프로세스 메모리에 저장하는 구현 (같은 프로세스 안에서만 공유됩니다)."""
+
+    def __init__(self):
+        self._objects = {}
+        self._uploads = {}
+        self._lock = threading.Lock()
+
+    def put(self, key: str, data: bytes, public: bool = False):
+        with self._lock:
+            self._objects[key] = bytes(data)
+
+    def get(self, key: str) -> bytes:
+        with self._lock:
+            if key not in self._objects:
+                raise KeyError(key)
+            return self._objects[key]
+
+    def list_keys(self, prefix: str = "", start_after: str = None):
+        with self._lock:
+            keys = sorted(key for key in self._objects
+                          if key.startswith(prefix) and (start_after is None or key > start_after))
+        yield from keys
+
+    def create_multipart_upload(self, key: str, public: bool = False) -> str:
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self._uploads[upload_id] = {}
+        return upload_id
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, data: bytes) -> str:
+        with self._lock:
+            self._uploads[upload_id][part_number] = bytes(data)
+        return f"{upload_id}-{part_number}"
+
+    def complete_multipart_upload(self, key: str, upload_id: str, etags: list):
+        with self._lock:
+            parts = self._uploads.pop(upload_id)
+            self._objects[key] = b"".join(parts[number] for number in range(1, len(etags) + 1))
+
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        with self._lock:
+            self._uploads.pop(upload_id, None)
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> StorageBackend:
+    """STORAGE_BACKEND 환경 변수에 맞는 스토리지를 프로세스당 하나 만들어 반환합니다."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            kind = os.getenv("STORAGE_BACKEND", "s3")
+            if kind == "s3":
+                _storage = S3Storage()
+            elif kind == "local":
+                _storage = LocalStorage()
+            elif kind == "memory":
+                _storage = MemoryStorage()
+            else:
+                raise ValueError(f"지원하지 않는 스토리지입니다: {kind}")
+        return _storage
@@ -0,0 +1,117 @@
+# worker_project/batcher.py
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class MicroBatcher:
+    """
+    동시에 들어온 추론 요청을 모아 한 번의 배치로 모델에 전달하는 스케줄러.
+
+    요청은 큐에 쌓이고, 배치 크기가 max_batch_size에 도달하거나
+    첫 요청 이후 max_wait_ms가 지나면 모아둔 요청을 한꺼번에 처리합니다.
+    각 호출자는 자신의 입력에 해당하는 결과만 돌려받습니다.
+    """
+
+    def __init__(self, predict_fn, max_batch_size: int = 16, max_wait_ms: float = 10.0,
+                 max_concurrency: int = 1):
+        # predict_fn: 입력 목록을 받아 같은 순서의 결과 목록을 반환하는 동기 함수
+        # (결과 대신 예외 객체가 들어 있는 자리는 그 입력의 호출자만 실패 처리)
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        # 동시에 처리할 수 있는 배치 수 (모델 복제본 풀을 쓸 때는 복제본 수만큼)
+        self.max_concurrency = max_concurrency
+        self._queue = None
+        self._loop_task = None
+        self._slots = None
+        self._running = set()
+        # 모델 추론은 전용 스레드에서 실행 (이벤트 루프를 막지 않도록)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="batcher")
+
+    async def start(self):
+        """배치 처리 루프를 시작합니다."""
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._loop_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """배치 처리 루프를 종료하고, 남은 요청은 실패 처리합니다."""
+        if self._loop_task:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("배치 처리기가 종료되었습니다."))
+        self._executor.shutdown(wait=False)
+
+    def queue_depth(self) -> int:
+        """아직 배치에 담기지 않고 대기 중인 입력 수"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, item):
+        """입력 하나를 큐에 넣고, 배치 처리 후 해당 입력의 결과를 반환합니다."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        """첫 요청을 기다린 뒤, 크기/시간 한도 안에서 최대한 많은 요청을 모읍니다."""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        # 대기 시간 동안 이미 큐에 쌓인 요청은 기다리지 않고 바로 포함
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        while True:
+            # 처리 슬롯이 빌 때까지 기다리는 동안 들어온 요청은 다음 배치에 모입니다.
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except asyncio.CancelledError:
+                self._slots.release()
+                raise
+            task = asyncio.create_task(self._process(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _process(self, batch):
+        """모은 배치를 추론하고 각 호출자에게 결과를 나눠줍니다."""
+        try:
+            # 대기 중 연결이 끊겨 취소된 요청은 제외
+            batch = [(item, future) for item, future in batch if not future.cancelled()]
+            if not batch:
+                return
+            items = [item for item, _ in batch]
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(self._executor, self.predict_fn, items)
+            except Exception as e:
+                print(f"❌ 배치 추론 실패 (batch size={len(items)}): {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        finally:
+            self._slots.release()
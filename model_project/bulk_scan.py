@@ -0,0 +1,271 @@
+# worker_project/bulk_scan.py
+# 대량 재판별 도구: 폴더 트리나 스토리지 prefix 아래의 이미지를 모두 판별해 결과를 JSONL/CSV로 남깁니다.
+#
+# 사용법:
+#   python bulk_scan.py --dir /data/images --output scan.jsonl
+#   python bulk_scan.py --prefix 2025-10- --output scan.csv              # STORAGE_BACKEND 설정의 스토리지
+#   python bulk_scan.py --dir /data/images --output scan.jsonl --decode-mode process --decode-workers 8
+#
+# 결과는 배치마다 바로 파일에 이어 쓰고, 그때까지 처리한 마지막 항목을 <output>.checkpoint.json에 기록합니다.
+# 중간에 멈춘 뒤 같은 명령을 다시 실행하면 체크포인트 다음 항목부터 이어서 처리합니다. (--restart로 처음부터)
+# 모델이 바뀐 뒤 다시 판별할 때는 새 출력 파일을 지정하세요.
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.storage import get_storage
+import predict
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+CSV_FIELDS = ("item", "model_result", "confidence", "decided_by", "model_id", "error")
+
+
+def iter_directory(root: str, after: str = None, relative: str = ""):
+    """
+    root 아래 이미지 파일의 상대 경로를 경로 구성요소의 사전순으로 반환합니다.
+
+    after(상대 경로)가 있으면 그 다음 항목부터 반환하며, 전부 앞서는 하위 폴더는 열지 않고 건너뜁니다.
+    """
+    after_parts = after.split("/") if after else None
+    depth = len(relative.split("/")) if relative else 0
+    with os.scandir(os.path.join(root, relative)) as entries:
+        names = sorted((entry.name, entry.is_dir(follow_symlinks=False)) for entry in entries)
+    for name, is_dir in names:
+        path = f"{relative}/{name}" if relative else name
+        if after_parts is not None and len(after_parts) > depth:
+            if name < after_parts[depth]:
+                continue
+            if name == after_parts[depth]:
+                if is_dir:
+                    yield from iter_directory(root, after, path)
+                # 파일이면 체크포인트 항목 자체이므로 건너뜀
+                continue
+            # 여기부터는 체크포인트 뒤쪽
+            after_parts = None
+        if is_dir:
+            yield from iter_directory(root, None, path)
+        elif name.lower().endswith(IMAGE_EXTENSIONS):
+            yield path
+
+
+def iter_storage(prefix: str, after: str = None):
+    """스토리지에서 prefix로 시작하는 이미지 키를 사전순으로 반환합니다. (after 다음 키부터)"""
+    for key in get_storage().list_keys(prefix, start_after=after):
+        if key.lower().endswith(IMAGE_EXTENSIONS):
+            yield key
+
+
+def read_item(args, item: str) -> bytes:
+    if args.dir:
+        with open(os.path.join(args.dir, item), "rb") as f:
+            return f.read()
+    return get_storage().get(item)
+
+
+class Checkpoint:
+    """처리한 마지막 항목, 처리 개수, 그 시점의 출력 파일 크기를 원자적으로 저장합니다."""
+
+    def __init__(self, path: str, source: dict):
+        self.path = path
+        self.source = source
+        self.state = {"source": source, "last_item": None, "done": 0, "errors": 0, "output_bytes": 0}
+
+    def load(self) -> bool:
+        """저장된 체크포인트가 있으면 읽습니다. 다른 입력의 체크포인트면 ValueError."""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("source") != self.source:
+            raise ValueError(f"체크포인트의 입력({state.get('source')})이 지금 입력과 다릅니다: {self.path}")
+        self.state = state
+        return True
+
+    def save(self, last_item: str, done: int, errors: int, output_bytes: int):
+        self.state.update(last_item=last_item, done=done, errors=errors, output_bytes=output_bytes)
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, self.path)
+
+
+class ResultWriter:
+    """판별 결과를 JSONL 또는 CSV(확장자로 선택)로 이어 씁니다."""
+
+    def __init__(self, path: str, resume_bytes: int = None):
+        self.is_csv = path.lower().endswith(".csv")
+        # 이어서 처리할 때는 마지막 체크포인트 뒤에 쓰인(중복될) 결과를 잘라냅니다.
+        if resume_bytes is not None and os.path.exists(path):
+            with open(path, "r+b") as f:
+                f.truncate(resume_bytes)
+        self.file = open(path, "a" if resume_bytes is not None else "w", newline="", encoding="utf-8")
+        if self.is_csv:
+            self.csv_writer = csv.DictWriter(self.file, fieldnames=CSV_FIELDS)
+            if self.file.tell() == 0:
+                self.csv_writer.writeheader()
+
+    def write(self, rows: list) -> int:
+        """rows를 쓰고 디스크까지 내린 뒤 현재 파일 크기를 반환합니다."""
+        for row in rows:
+            if self.is_csv:
+                self.csv_writer.writerow(row)
+            else:
+                self.file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+class Progress:
+    """처리 속도와 (전체 개수를 알게 되면) 남은 시간을 주기적으로 출력합니다."""
+
+    def __init__(self, already_done: int, interval: float):
+        self.interval = interval
+        self.already_done = already_done
+        self.total = None  # 체크포인트 뒤로 남은 전체 항목 수 (세는 중이면 None)
+        self.started = time.perf_counter()
+        self.last_report = self.started
+
+    def count_in_background(self, items):
+        """남은 항목 수를 별도 스레드에서 세어 둡니다. (스캔을 기다리게 하지 않음)"""
+        def count():
+            self.total = sum(1 for _ in items)
+        threading.Thread(target=count, name="bulk-scan-counter", daemon=True).start()
+
+    def update(self, processed: int, errors: int, force: bool = False):
+        now = time.perf_counter()
+        if not force and now - self.last_report < self.interval:
+            return
+        self.last_report = now
+        elapsed = now - self.started
+        rate = processed / elapsed if elapsed else 0.0
+        line = f"처리 {self.already_done + processed:,}건 (이번 실행 {processed:,}, 오류 {errors:,}) | {rate:,.1f}건/초"
+        if self.total is not None:
+            remaining = max(0, self.total - processed)
+            eta = remaining / rate if rate else float("inf")
+            line += f" | 남은 {remaining:,}건, ETA {time.strftime('%H:%M:%S', time.gmtime(eta)) if rate else '-'}"
+        print(line, flush=True)
+
+
+def scan(args):
+    source = {"dir": os.path.abspath(args.dir)} if args.dir else {"prefix": args.prefix}
+    checkpoint = Checkpoint(args.checkpoint or f"{args.output}.checkpoint.json", source)
+    try:
+        resumed = not args.restart and checkpoint.load()
+    except ValueError as e:
+        print(f"❌ {e} (--restart로 처음부터 다시 처리하거나 다른 --output을 지정하세요)")
+        return 2
+    last_item = checkpoint.state["last_item"] if resumed else None
+    done, errors = (checkpoint.state["done"], checkpoint.state["errors"]) if resumed else (0, 0)
+    if resumed:
+        print(f"체크포인트에서 이어서 처리합니다: {done:,}건 완료, 마지막 항목 {last_item}")
+
+    def items():
+        return iter_directory(args.dir, last_item) if args.dir else iter_storage(args.prefix, last_item)
+
+    predict.load_model()
+    writer = ResultWriter(args.output, checkpoint.state["output_bytes"] if resumed else None)
+    progress = Progress(done, args.progress_interval)
+    if not args.no_count:
+        progress.count_in_background(items())
+
+    # 디코딩 풀: thread면 읽기와 디코딩을 스레드에서, process면 읽기는 스레드에서 하고 디코딩은 프로세스에서
+    # (process 모드는 모델을 읽은 뒤 fork하므로 자식도 같은 전처리 설정을 씁니다)
+    decode_pool = None
+    if args.decode_mode == "process":
+        decode_pool = ProcessPoolExecutor(max_workers=args.decode_workers, mp_context=mp.get_context("fork"))
+    io_pool = ThreadPoolExecutor(max_workers=args.decode_workers, thread_name_prefix="bulk-scan-io")
+
+    def load(item: str):
+        data = read_item(args, item)
+        if decode_pool is not None:
+            return decode_pool.submit(predict.decode_image_bytes, data).result()
+        return predict.decode_image_bytes(data)
+
+    def run_batch(batch: list):
+        """(항목, 디코딩 Future) 목록을 판별해 입력 순서대로 결과 행 목록을 만듭니다. (디코딩 실패는 항목별 오류)"""
+        rows, decoded = [], []
+        for item, future in batch:
+            try:
+                decoded.append((len(rows), future.result()))
+                rows.append({"item": item, "model_id": predict.MODEL_TAG})
+            except Exception as e:
+                rows.append({"item": item, "model_id": predict.MODEL_TAG, "error": repr(e)})
+        if decoded:
+            predictions = predict.predict_deepfake_batch_with_stage([image for _, image in decoded])
+            for (index, _), (label, score, stage) in zip(decoded, predictions):
+                rows[index].update(model_result=label, confidence=round(score, 6), decided_by=stage)
+        return rows
+
+    processed, run_errors = 0, 0
+    pending = deque()
+    source_items = items()
+    try:
+        exhausted = False
+        while not exhausted or pending:
+            # 디코딩은 배치 몇 개 분량만 미리 진행해 메모리를 제한
+            while not exhausted and len(pending) < args.batch_size * args.prefetch_batches:
+                item = next(source_items, None)
+                if item is None:
+                    exhausted = True
+                    break
+                pending.append((item, io_pool.submit(load, item)))
+            if not pending:
+                break
+            batch = [pending.popleft() for _ in range(min(args.batch_size, len(pending)))]
+            rows = run_batch(batch)
+            # 결과를 파일에 내린 뒤에 체크포인트를 옮깁니다. (중단되어도 체크포인트 앞의 결과는 모두 남음)
+            output_bytes = writer.write(rows)
+            batch_errors = sum(1 for row in rows if row.get("error"))
+            processed += len(rows)
+            run_errors += batch_errors
+            checkpoint.save(batch[-1][0], done + processed, errors + run_errors, output_bytes)
+            progress.update(processed, errors + run_errors)
+    except KeyboardInterrupt:
+        print(f"\n⏸️ 중단되었습니다. 같은 명령으로 다시 실행하면 {checkpoint.state['last_item']} 다음부터 이어서 처리합니다.")
+        return 130
+    finally:
+        for _, future in pending:
+            future.cancel()
+        io_pool.shutdown(wait=False, cancel_futures=True)
+        if decode_pool is not None:
+            decode_pool.shutdown(wait=False, cancel_futures=True)
+        writer.close()
+
+    progress.update(processed, errors + run_errors, force=True)
+    print(f"✅ 완료: 전체 {done + processed:,}건 (오류 {errors + run_errors:,}건) -> {args.output}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="폴더/스토리지 prefix 대량 재판별 (JSONL/CSV 출력, 체크포인트로 이어서 처리)")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--dir", help="이미지가 있는 폴더 (하위 폴더 포함)")
+    source.add_argument("--prefix", help="스토리지 키 prefix (STORAGE_BACKEND 설정 사용)")
+    parser.add_argument("--output", required=True, help="결과 파일 (.jsonl 또는 .csv)")
+    parser.add_argument("--checkpoint", help="체크포인트 파일 (기본: <output>.checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="체크포인트를 무시하고 처음부터 다시 처리")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--prefetch-batches", type=int, default=4, help="미리 디코딩해 둘 배치 수")
+    parser.add_argument("--decode-workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--decode-mode", choices=("thread", "process"), default="thread")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="진행 상황 출력 간격(초)")
+    parser.add_argument("--no-count", action="store_true", help="남은 항목 수를 세지 않음 (ETA 생략)")
+    args = parser.parse_args()
+    sys.exit(scan(args))
+
+
+if __name__ == "__main__":
+    main()
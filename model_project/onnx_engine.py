@@ -0,0 +1,270 @@
+# worker_project/onnx_engine.py
+# ONNX Runtime 추론 엔진 (FP32 / 동적 양자화 int8)
+#
+# 사용법:
+#   python onnx_engine.py export                  # 모델을 ONNX로 변환하고 int8 양자화본까지 캐시에 저장
+#   python onnx_engine.py export --input-size 112 # 입력 해상도를 줄인 선별용 모델 (2단계 추론의 CASCADE_SCREEN_SIZE)
+#   python onnx_engine.py parity <이미지 폴더>     # PyTorch 기준 대비 레이블 일치율 / 최대 점수 차이 확인
+# 기본 모델은 predict.py와 같은 고정 리비전(MODEL_REVISION)의 로컬 스냅샷에서 읽습니다.
+import argparse
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+DEFAULT_MODEL_ID = "prithivMLmods/Deep-Fake-Detector-v2-Model"
+# 변환할 모델 리비전 (predict.py의 MODEL_REVISION과 같은 40자리 커밋 해시)
+DEFAULT_REVISION = os.getenv("MODEL_REVISION", "")
+
+# 변환된 ONNX 모델을 저장할 로컬 캐시 폴더
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", os.path.join("model_cache", "onnx"))
+# ONNX Runtime 연산 스레드 수 (0이면 ONNX Runtime 기본값)
+ORT_NUM_THREADS = int(os.getenv("ORT_NUM_THREADS", "0"))
+
+FP32_FILENAME = "model.onnx"
+INT8_FILENAME = "model.int8.onnx"
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def get_cache_dir(model_id: str, revision: str = DEFAULT_REVISION, input_size: int = None) -> str:
+    """모델 ID와 리비전(, 입력 해상도)별 ONNX 캐시 폴더 경로를 반환합니다. (리비전을 바꾸면 다시 변환)"""
+    cache_dir = os.path.join(ONNX_CACHE_DIR, model_id.replace("/", "--"), revision.replace("/", "--"))
+    return os.path.join(cache_dir, f"{input_size}px") if input_size else cache_dir
+
+
+def export_onnx(model_id: str = DEFAULT_MODEL_ID, quantize: bool = True, source: str = None,
+                revision: str = DEFAULT_REVISION, input_size: int = None) -> str:
+    """
+    Hugging Face 모델을 ONNX로 한 번 변환해 로컬 캐시에 저장합니다.
+
+    이미 변환된 파일이 있으면 다시 변환하지 않습니다.
+    quantize=True이면 동적 양자화(int8) 모델도 함께 만듭니다.
+    source를 주면 허브 대신 그 로컬 스냅샷 폴더(revision의 파일)에서 모델을 읽습니다.
+    input_size를 주면 같은 가중치를 input_size x input_size 입력으로 변환합니다. (위치 임베딩을 보간,
+    ViT는 패치 수가 (input_size/224)^2배로 줄어 그만큼 가볍고, 전처리 설정의 크기도 함께 바꿔 저장)
+    (캐시 폴더는 model_id, revision, input_size 기준)
+
+    Returns:
+        str: 캐시 폴더 경로
+    """
+    cache_dir = get_cache_dir(model_id, revision, input_size)
+    fp32_path = os.path.join(cache_dir, FP32_FILENAME)
+    int8_path = os.path.join(cache_dir, INT8_FILENAME)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    if not os.path.exists(fp32_path):
+        import torch
+        from transformers import AutoImageProcessor, AutoModelForImageClassification
+
+        print(f"Exporting {model_id}@{revision} to ONNX...")
+        hub_options = {} if source else {"revision": revision}
+        processor = AutoImageProcessor.from_pretrained(source or model_id, **hub_options)
+        model = AutoModelForImageClassification.from_pretrained(source or model_id, **hub_options).eval()
+
+        if input_size:
+            processor.size = {"height": input_size, "width": input_size}
+        # 실행 시 허브 접근 없이 불러올 수 있도록 전처리 설정과 모델 설정도 함께 저장
+        processor.save_pretrained(cache_dir)
+        model.config.save_pretrained(cache_dir)
+
+        size = processor.size
+        height = size.get("height", size.get("shortest_edge", 224))
+        width = size.get("width", size.get("shortest_edge", 224))
+        dummy = torch.randn(1, 3, height, width)
+
+        class LogitsOnly(torch.nn.Module):
+            """학습 때와 다른 해상도면 위치 임베딩을 보간해 실행하고 logits만 반환합니다."""
+
+            def __init__(self, wrapped):
+                super().__init__()
+                self.wrapped = wrapped
+
+            def forward(self, pixel_values):
+                if input_size:
+                    return self.wrapped(pixel_values=pixel_values, interpolate_pos_encoding=True).logits
+                return self.wrapped(pixel_values=pixel_values).logits
+
+        with torch.no_grad():
+            torch.onnx.export(
+                LogitsOnly(model).eval(),
+                (dummy,),
+                fp32_path,
+                input_names=["pixel_values"],
+                output_names=["logits"],
+                dynamic_axes={"pixel_values": {0: "batch"}, "logits": {0: "batch"}},
+                opset_version=17,
+            )
+        print(f"✅ ONNX 변환 완료: {fp32_path}")
+
+    if quantize and not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print("Quantizing ONNX model to int8...")
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        print(f"✅ int8 양자화 완료: {int8_path}")
+
+    return cache_dir
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class OnnxImageClassifier:
+    """
+    transformers 'image-classification' 파이프라인과 같은 방식으로 호출할 수 있는 ONNX Runtime 분류기.
+
+    pipe(image)            -> [{'label': ..., 'score': ...}, ...]
+    pipe(images, batch_size=n) -> 이미지별 위 결과의 목록
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = False, num_threads: int = ORT_NUM_THREADS):
+        import onnxruntime as ort
+        from transformers import AutoConfig, AutoImageProcessor
+
+        model_path = os.path.join(model_dir, INT8_FILENAME if quantized else FP32_FILENAME)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"ONNX 모델이 없습니다: {model_path} (먼저 'python onnx_engine.py export'를 실행하세요)"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.image_processor = AutoImageProcessor.from_pretrained(model_dir)
+        self.id2label = AutoConfig.from_pretrained(model_dir).id2label
+
+    @classmethod
+    def from_cache(cls, model_id: str = DEFAULT_MODEL_ID, quantized: bool = False,
+                   num_threads: int = ORT_NUM_THREADS, source: str = None, revision: str = DEFAULT_REVISION,
+                   input_size: int = None):
+        """로컬 캐시에 변환된 모델을 불러옵니다. 없으면 (source 스냅샷이 있으면 거기서) 한 번 변환합니다."""
+        return cls(export_onnx(model_id, quantize=quantized, source=source, revision=revision, input_size=input_size),
+                   quantized=quantized, num_threads=num_threads)
+
+    def predict_pixel_values(self, pixel_values: np.ndarray) -> np.ndarray:
+        """전처리된 (N, 3, H, W) 입력으로 클래스별 확률 (N, num_labels)을 계산합니다."""
+        logits = self.session.run(["logits"], {"pixel_values": pixel_values.astype(np.float32)})[0]
+        return _softmax(logits)
+
+    def _to_labels(self, probs: np.ndarray) -> list:
+        order = np.argsort(-probs)
+        return [{"label": self.id2label[int(i)], "score": float(probs[i])} for i in order]
+
+    def __call__(self, images, batch_size: int = None):
+        single = not isinstance(images, (list, tuple))
+        batch = [images] if single else list(images)
+        batch_size = batch_size or len(batch)
+
+        results = []
+        for start in range(0, len(batch), batch_size):
+            chunk = batch[start:start + batch_size]
+            pixel_values = self.image_processor(chunk, return_tensors="np")["pixel_values"]
+            results.extend(self._to_labels(probs) for probs in self.predict_pixel_values(pixel_values))
+        return results[0] if single else results
+
+
+def _fake_probability(result: list) -> float:
+    """파이프라인 결과에서 'fake' 레이블의 확률을 꺼냅니다."""
+    for entry in result:
+        if "fake" in entry["label"].lower():
+            return entry["score"]
+    return 0.0
+
+
+def default_source(model_id: str, revision: str):
+    """predict.py가 쓰는 모델/리비전이면 그 고정 스냅샷 폴더를, 아니면 None(허브에서 revision을 읽음)을 반환합니다."""
+    import predict
+    if (model_id, revision) == (predict.MODEL_ID, predict.MODEL_REVISION):
+        return predict.ensure_snapshot()
+    return None
+
+
+def run_parity_check(image_dir: str, model_id: str = DEFAULT_MODEL_ID, engines=("onnx", "onnx-int8"),
+                     batch_size: int = 16, revision: str = DEFAULT_REVISION, source: str = None) -> dict:
+    """
+    PyTorch 파이프라인을 기준으로 ONNX 엔진들의 레이블 일치율과 최대 점수 차이를 측정합니다.
+
+    기준 파이프라인과 ONNX 변환 모두 같은 리비전(source 스냅샷 또는 허브의 revision)에서 읽습니다.
+
+    Returns:
+        dict: 엔진별 {agreement, max_score_delta, mean_score_delta, seconds}
+    """
+    from PIL import Image
+    from transformers import pipeline
+
+    paths = sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(image_dir)
+        for name in names
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    if not paths:
+        raise ValueError(f"이미지가 없습니다: {image_dir}")
+    images = []
+    for path in paths:
+        with Image.open(path) as image:
+            images.append(image.convert("RGB"))
+
+    if source:
+        baseline_pipe = pipeline("image-classification", model=source, device=-1)
+    else:
+        baseline_pipe = pipeline("image-classification", model=model_id, revision=revision, device=-1)
+    start = time.perf_counter()
+    baseline = baseline_pipe(images, batch_size=batch_size)
+    report = {"images": len(images), "pytorch": {"seconds": time.perf_counter() - start}}
+
+    for engine in engines:
+        classifier = OnnxImageClassifier.from_cache(model_id, quantized=engine == "onnx-int8", source=source,
+                                                    revision=revision)
+        start = time.perf_counter()
+        candidate = classifier(images, batch_size=batch_size)
+        seconds = time.perf_counter() - start
+
+        agree = sum(a[0]["label"] == b[0]["label"] for a, b in zip(baseline, candidate))
+        deltas = [abs(_fake_probability(a) - _fake_probability(b)) for a, b in zip(baseline, candidate)]
+        report[engine] = {
+            "agreement": agree / len(images),
+            "max_score_delta": max(deltas),
+            "mean_score_delta": sum(deltas) / len(deltas),
+            "seconds": seconds,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ONNX Runtime 추론 엔진 도구")
+    parser.add_argument("--model-id", default=DEFAULT_MODEL_ID)
+    parser.add_argument("--revision", default=DEFAULT_REVISION, help="변환할 모델 리비전 (기본: MODEL_REVISION)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="ONNX 변환 및 int8 양자화 후 캐시에 저장")
+    export_parser.add_argument("--no-int8", action="store_true", help="int8 양자화 모델은 만들지 않음")
+    export_parser.add_argument("--input-size", type=int, default=None, help="입력 해상도를 바꿔 변환 (예: 112)")
+
+    parity_parser = subparsers.add_parser("parity", help="PyTorch 기준 대비 정합성 검사")
+    parity_parser.add_argument("image_dir")
+    parity_parser.add_argument("--batch-size", type=int, default=16)
+
+    args = parser.parse_args()
+    if not re.fullmatch(r"[0-9a-f]{40}", args.revision):
+        parser.error(f"--revision(또는 MODEL_REVISION)은 40자리 커밋 해시여야 합니다: {args.revision!r}")
+    source = default_source(args.model_id, args.revision)
+    if args.command == "export":
+        print(export_onnx(args.model_id, quantize=not args.no_int8, source=source, revision=args.revision,
+                          input_size=args.input_size))
+    elif args.command == "parity":
+        report = run_parity_check(args.image_dir, args.model_id, batch_size=args.batch_size,
+                                  revision=args.revision, source=source)
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,199 @@
-import torch
-from transformers import pipeline
 from PIL import Image
+import numpy as np
+import io
 import os
+import re
+import sys
+import threading
+import time
 import warnings
+from preprocess import FastPreprocessor
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.metrics import Counter, track_stage # 배치 단위 전처리/추론 시간 기록 (복제본 프로세스의 값은 집계되지 않음)
 
 # 불필요한 경고 메시지 무시
 warnings.filterwarnings('ignore')
 
-# --- 1. 모델 로드 (스크립트 실행 시 한 번만 실행) ---
+# --- 1. 모델 로드 (load_model()을 처음 호출할 때 한 번만 실행) ---
+# 모듈을 import하는 것만으로는 모델을 읽지 않습니다. 서버는 시작할 때 load_model()을 명시적으로 호출하고,
+# 그 밖의 도구는 처음 예측할 때 자동으로 로드됩니다.
 
-# GPU 사용 가능 여부 확인 및 설정
-# pipeline은 device ID를 정수로 받습니다: -1은 CPU, 0은 첫 번째 GPU
-device_id = 0 if torch.cuda.is_available() else -1
-device_name = "cuda" if device_id == 0 else "cpu"
-print(f"Using device: {device_name}")
+# 모델 식별자: 중개 서버의 판별 결과 캐시 키로도 사용되므로, 모델을 바꾸면 함께 바뀝니다.
+MODEL_ID = "prithivMLmods/Deep-Fake-Detector-v2-Model"
+# 고정할 모델 리비전: 허브의 40자리 커밋 해시 ('main' 같은 브랜치는 가리키는 커밋이 바뀌므로 받지 않음)
+MODEL_REVISION = os.getenv("MODEL_REVISION", "")
+# 모델 파일을 받아 둘 로컬 스냅샷 폴더: 있으면 허브에 접속하지 않고 여기서 읽습니다.
+# (기본 경로는 리비전별로 나뉘므로 MODEL_REVISION을 바꾸면 새 리비전을 받습니다)
+MODEL_SNAPSHOT_DIR = os.getenv("MODEL_SNAPSHOT_DIR",
+                               os.path.join("model_cache", "snapshot", MODEL_ID.replace("/", "--"),
+                                            MODEL_REVISION.replace("/", "--")))
+# 1이면 스냅샷이 없을 때 허브에서 받지 않고 실패합니다. (배포 이미지에 스냅샷을 미리 넣어 둔 경우)
+MODEL_OFFLINE = os.getenv("MODEL_OFFLINE", "0") == "1"
+# 로드 직후 더미 입력으로 추론해 첫 요청의 지연(메모리 할당, 커널 선택)을 미리 치릅니다.
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1") == "1"
+MODEL_WARMUP_BATCH_SIZE = int(os.getenv("MODEL_WARMUP_BATCH_SIZE", "16"))
 
-print("Loading the DeepFake Detector V2 model...")
-# 모델 로드 시 허깅페이스에서 파일을 다운로드하므로 시간이 걸릴 수 있습니다.
-pipe = pipeline(
-    'image-classification',
-    model="prithivMLmods/Deep-Fake-Detector-v2-Model",
-    device=device_id
-)
-print("Model loaded successfully.")
+# 추론 엔진 선택: 'pytorch'(기본), 'onnx'(ONNX Runtime FP32), 'onnx-int8'(동적 양자화), 'stub'(벤치마크용 가짜 모델)
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", "pytorch")
+ENGINES = ("pytorch", "onnx", "onnx-int8", "stub")
+if INFERENCE_ENGINE not in ENGINES:
+    raise ValueError(f"지원하지 않는 추론 엔진입니다: {INFERENCE_ENGINE}")
+
+# 빠른 전처리 단계 사용 여부: JPEG 축소 디코딩 + NumPy 배치 정규화로 텐서를 직접 만들어 모델에 넣습니다.
+# (0이면 파이프라인 내부의 이미지 프로세서 사용)
+FAST_PREPROCESS = os.getenv("FAST_PREPROCESS", "1") == "1"
+
+# 2단계(cascade) 추론: 가벼운 선별 엔진이 모든 이미지를 먼저 채점하고,
+# Fake 확률이 [CASCADE_BAND_LOW, CASCADE_BAND_HIGH] 구간(애매한 이미지)일 때만 전체 모델로 다시 판별합니다.
+#   CASCADE_SCREEN_ENGINE: ''(사용 안 함, 기본), 'onnx-int8'(같은 모델의 INT8 양자화본), 'onnx', 'stub'
+#   CASCADE_SCREEN_SIZE: 선별 엔진의 입력 해상도 (기본 112, 0이면 전체 모델과 같은 크기)
+#     같은 ViT 가중치를 낮은 해상도로 변환해 씁니다. 112px이면 패치 수가 224px의 1/4이라 선별 단계가 훨씬 가볍고,
+#     전체 모델 크기의 전처리는 다시 판별할 이미지에만 합니다.
+# 구간과 해상도는 benchmarks/cascade_tune.py로 라벨이 있는 로컬 이미지에 맞춰 고릅니다.
+CASCADE_SCREEN_ENGINE = os.getenv("CASCADE_SCREEN_ENGINE", "")
+CASCADE_SCREEN_SIZE = int(os.getenv("CASCADE_SCREEN_SIZE", "112"))
+CASCADE_BAND_LOW = float(os.getenv("CASCADE_BAND_LOW", "0.2"))
+CASCADE_BAND_HIGH = float(os.getenv("CASCADE_BAND_HIGH", "0.8"))
+# 선별 엔진으로 쓸 수 있는 엔진 (전처리된 입력으로 바로 채점하는 predict_pixel_values가 있어야 함)
+SCREEN_ENGINES = ("onnx", "onnx-int8", "stub")
+if CASCADE_SCREEN_ENGINE and CASCADE_SCREEN_ENGINE not in SCREEN_ENGINES:
+    raise ValueError(f"지원하지 않는 선별 엔진입니다: {CASCADE_SCREEN_ENGINE}")
+if CASCADE_SCREEN_ENGINE and not FAST_PREPROCESS:
+    raise ValueError("2단계 추론(CASCADE_SCREEN_ENGINE)은 FAST_PREPROCESS=1에서만 사용할 수 있습니다.")
+
+
+def is_commit_hash(revision: str) -> bool:
+    """revision이 허브의 40자리 커밋 해시인지 확인합니다."""
+    return re.fullmatch(r"[0-9a-f]{40}", revision or "") is not None
+
+
+# 실제 모델을 읽는 엔진을 쓰면 MODEL_REVISION이 커밋 해시여야 시작합니다. (stub 엔진은 모델을 읽지 않음)
+if {INFERENCE_ENGINE, CASCADE_SCREEN_ENGINE or "stub"} != {"stub"} and not is_commit_hash(MODEL_REVISION):
+    raise ValueError(f"MODEL_REVISION은 모델의 40자리 커밋 해시여야 합니다: {MODEL_REVISION!r}")
+
+# 엔진이 바뀌면 점수도 달라질 수 있으므로 결과 캐시 키에 엔진 이름(과 2단계 추론 설정)을 함께 넣습니다.
+MODEL_TAG = MODEL_ID if INFERENCE_ENGINE == "pytorch" else f"{MODEL_ID}@{INFERENCE_ENGINE}"
+if CASCADE_SCREEN_ENGINE:
+    _screen_tag = f"{CASCADE_SCREEN_ENGINE}@{CASCADE_SCREEN_SIZE}px" if CASCADE_SCREEN_SIZE else CASCADE_SCREEN_ENGINE
+    MODEL_TAG += f"+cascade({_screen_tag},{CASCADE_BAND_LOW:g}-{CASCADE_BAND_HIGH:g})"
+
+# 판별을 결정한 단계별 이미지 수 (screen: 선별 엔진에서 끝남, full: 전체 모델)
+CASCADE_DECISIONS = Counter("trufy_cascade_decisions_total", "판별을 결정한 추론 단계별 이미지 수", ("stage",))
+
+# load_model()이 채우는 전역 상태
+pipe = None
+preprocessor = None
+id2label = None
+screener = None  # 2단계 추론의 선별 엔진 (CASCADE_SCREEN_ENGINE을 쓸 때만)
+screen_preprocessor = None  # 선별 엔진 입력 크기의 전처리기
+_load_lock = threading.Lock()
+_load_state = {"status": "not_loaded", "load_seconds": None, "warmup_seconds": None, "error": None}
+
+
+def ensure_snapshot() -> str:
+    """
+    모델 스냅샷 폴더를 반환합니다. 없으면 (MODEL_OFFLINE이 아닐 때) 고정된 리비전을 허브에서 한 번 받아 둡니다.
+    """
+    if os.path.exists(os.path.join(MODEL_SNAPSHOT_DIR, "config.json")):
+        return MODEL_SNAPSHOT_DIR
+    if MODEL_OFFLINE:
+        raise FileNotFoundError(f"모델 스냅샷이 없습니다: {MODEL_SNAPSHOT_DIR}")
+
+    from huggingface_hub import snapshot_download
+    print(f"Downloading model snapshot {MODEL_ID}@{MODEL_REVISION} -> {MODEL_SNAPSHOT_DIR}")
+    snapshot_download(repo_id=MODEL_ID, revision=MODEL_REVISION, local_dir=MODEL_SNAPSHOT_DIR)
+    return MODEL_SNAPSHOT_DIR
+
+
+def load_model(warmup: bool = MODEL_WARMUP):
+    """
+    모델을 로컬 스냅샷에서 읽어 전역 pipe를 준비합니다. 이미 로드되어 있으면 아무것도 하지 않습니다.
+
+    여러 스레드에서 동시에 호출해도 한 번만 로드합니다. 실패하면 상태에 오류를 남기고 예외를 다시 냅니다.
+    """
+    global pipe, preprocessor, id2label, screener, screen_preprocessor
+    with _load_lock:
+        if pipe is not None:
+            return
+        _load_state.update(status="loading", error=None)
+        started = time.perf_counter()
+        try:
+            print(f"Loading the DeepFake Detector V2 model... (engine: {INFERENCE_ENGINE})")
+            loaded, labels = _load_engine(INFERENCE_ENGINE)
+            if CASCADE_SCREEN_ENGINE:
+                print(f"Loading the cascade screening engine... (engine: {CASCADE_SCREEN_ENGINE})")
+                screener, _ = _load_engine(CASCADE_SCREEN_ENGINE, input_size=CASCADE_SCREEN_SIZE or None)
+                screen_preprocessor = FastPreprocessor(screener.image_processor)
+            pipe, preprocessor, id2label = loaded, FastPreprocessor(loaded.image_processor), labels
+            _load_state["load_seconds"] = round(time.perf_counter() - started, 3)
+            print(f"Model loaded successfully. ({_load_state['load_seconds']}s)")
+
+            if warmup:
+                started = time.perf_counter()
+                _warmup()
+                _load_state["warmup_seconds"] = round(time.perf_counter() - started, 3)
+                print(f"Model warm-up finished. ({_load_state['warmup_seconds']}s)")
+            _load_state["status"] = "ready"
+        except Exception as e:
+            pipe = preprocessor = id2label = screener = screen_preprocessor = None
+            _load_state.update(status="failed", error=repr(e))
+            raise
+
+
+def _load_engine(engine: str, input_size: int = None):
+    """engine 이름에 맞는 분류기를 읽어 (분류기, id2label)을 반환합니다. (input_size: 입력 해상도를 바꿀 때, 선별 엔진용)"""
+    if engine == "pytorch":
+        if input_size:
+            raise ValueError("입력 해상도를 바꾼 분류기는 onnx, onnx-int8, stub 엔진에서만 쓸 수 있습니다.")
+        import torch
+        from transformers import pipeline
+
+        # GPU 사용 가능 여부 확인 및 설정
+        # pipeline은 device ID를 정수로 받습니다: -1은 CPU, 0은 첫 번째 GPU
+        device_id = 0 if torch.cuda.is_available() else -1
+        print(f"Using device: {'cuda' if device_id == 0 else 'cpu'}")
+        # 로컬 폴더 경로로 읽으므로 허브에 접속하지 않습니다.
+        loaded = pipeline('image-classification', model=ensure_snapshot(), device=device_id)
+        return loaded, loaded.model.config.id2label
+    if engine == "stub":
+        # 모델 파일 없이 정해진 시간만 쉬는 가짜 분류기 (모델 밖의 구간만 측정할 때)
+        from stub_engine import StubImageClassifier
+        loaded = StubImageClassifier(input_size=input_size)
+        return loaded, loaded.id2label
+    # 파이프라인과 같은 방식으로 호출되는 ONNX Runtime 분류기 (캐시에 없을 때만 스냅샷에서 한 번 변환)
+    from onnx_engine import OnnxImageClassifier, get_cache_dir, FP32_FILENAME
+    converted = os.path.exists(os.path.join(get_cache_dir(MODEL_ID, MODEL_REVISION, input_size), FP32_FILENAME))
+    loaded = OnnxImageClassifier.from_cache(MODEL_ID, quantized=engine == "onnx-int8",
+                                            source=None if converted else ensure_snapshot(),
+                                            revision=MODEL_REVISION, input_size=input_size)
+    return loaded, loaded.id2label
+
+
+def _warmup():
+    """단일 이미지와 최대 배치 크기의 더미 입력으로 한 번씩 추론합니다."""
+    image = Image.new("RGB", (preprocessor.width, preprocessor.height), (128, 128, 128))
+    for batch_size in sorted({1, max(1, MODEL_WARMUP_BATCH_SIZE)}):
+        predict_deepfake_batch([image] * batch_size)
+
+
+def is_ready() -> bool:
+    """모델이 로드되고 (설정된 경우) 워밍업까지 끝나 요청을 받을 수 있으면 True."""
+    return _load_state["status"] == "ready"
+
+
+def model_status() -> dict:
+    """모델 로드 상태(status), 로드/워밍업에 걸린 시간(초), 오류를 반환합니다."""
+    status = {"model_id": MODEL_TAG, "revision": MODEL_REVISION, **_load_state}
+    if CASCADE_SCREEN_ENGINE:
+        status["cascade"] = {"screen_engine": CASCADE_SCREEN_ENGINE, "screen_input_size": CASCADE_SCREEN_SIZE or None,
+                             "band": [CASCADE_BAND_LOW, CASCADE_BAND_HIGH]}
+    return status
+
+
+def _require_model():
+    """모델이 아직 없으면 로드합니다. (서버 밖에서 모듈만 import해 쓰는 도구용)"""
+    if pipe is None:
+        load_model()
 
 
 # --- 2. 예측 함수 (파일 경로를 입력으로 받도록 수정) ---
@@ -43,42 +214,191 @@ def predict_deepfake_from_path(image_path: str):
         return None, None
 
     try:
+        _require_model()
         # PIL 라이브러리를 사용해 이미지 열기
+        if FAST_PREPROCESS:
+            return predict_deepfake_batch([preprocessor.decode(image_path)])[0]
         image = Image.open(image_path)
 
         # 파이프라인을 통해 예측 수행
         result = pipe(image)
 
-        # 결과 파싱
-        # 모델 레이블이 'DeepFake', 'fake', 'Real' 등 다양할 수 있어 소문자로 변환 후 확인
-        label = result[0]['label'].lower()
-        score = result[0]['score']
+        return _parse_result(result)
+
+    except Exception as e:
+        print(f"An error occurred while processing the image: {e}")
+        return None, None
+
+
+def decode_image_bytes(image_bytes: bytes) -> Image.Image:
+    """메모리에 있는 이미지 바이트를 디스크를 거치지 않고 RGB 이미지로 디코딩합니다."""
+    if FAST_PREPROCESS:
+        _require_model()
+        # JPEG은 모델 입력 크기 근처까지만 축소 디코딩
+        return preprocessor.decode(image_bytes)
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        return image.convert("RGB")
 
-        # 'fake' 또는 'deepfake' 문자열이 포함되어 있으면 'fake'로 분류
-        predicted_class = "Fake" if 'fake' in label or 'deepfake' in label else "Real"
-        
-        return predicted_class, score
 
+def predict_deepfake_from_image(image: Image.Image):
+    """
+    이미 디코딩된 PIL 이미지를 입력받아 'fake' 또는 'real'을 예측합니다.
+
+    Args:
+        image (PIL.Image.Image): 분석할 이미지
+
+    Returns:
+        tuple: (예측 레이블, 신뢰도 점수) 또는 에러 발생 시 (None, None)
+    """
+    try:
+        return predict_deepfake_batch([image])[0]
     except Exception as e:
         print(f"An error occurred while processing the image: {e}")
         return None, None
 
 
+def predict_deepfake_from_bytes(image_bytes: bytes):
+    """
+    이미지 파일 내용(bytes)을 입력받아 'fake' 또는 'real'을 예측합니다.
+
+    Args:
+        image_bytes (bytes): 분석할 이미지 파일의 내용
+
+    Returns:
+        tuple: (예측 레이블, 신뢰도 점수) 또는 에러 발생 시 (None, None)
+    """
+    try:
+        image = decode_image_bytes(image_bytes)
+    except Exception as e:
+        print(f"An error occurred while decoding the image: {e}")
+        return None, None
+    return predict_deepfake_from_image(image)
+
+
+def _parse_result(result):
+    """파이프라인 출력(레이블/점수 목록)을 (예측 레이블, 신뢰도 점수)로 변환합니다."""
+    return _to_class(result[0]['label']), result[0]['score']
+
+
+def _to_class(label: str) -> str:
+    """모델 레이블을 'Fake' 또는 'Real'로 변환합니다."""
+    # 모델 레이블이 'DeepFake', 'fake', 'Real' 등 다양할 수 있어 소문자로 변환 후 확인
+    label = label.lower()
+
+    # 'fake' 또는 'deepfake' 문자열이 포함되어 있으면 'fake'로 분류
+    return "Fake" if 'fake' in label or 'deepfake' in label else "Real"
+
+
+def predict_pixel_values(pixel_values: np.ndarray) -> np.ndarray:
+    """
+    전처리된 (N, 3, H, W) 입력을 선택된 엔진으로 추론해 클래스별 확률 (N, num_labels)을 반환합니다.
+    """
+    _require_model()
+    if INFERENCE_ENGINE == "pytorch":
+        import torch
+        with torch.inference_mode():
+            logits = pipe.model(pixel_values=torch.from_numpy(pixel_values).to(pipe.device)).logits
+        return logits.softmax(-1).float().cpu().numpy()
+    return pipe.predict_pixel_values(pixel_values)
+
+
+def predict_deepfake_batch(images: list):
+    """
+    여러 장의 PIL 이미지를 한 번의 파이프라인 호출(배치)로 예측합니다.
+
+    Args:
+        images (list): 분석할 PIL 이미지 목록
+
+    Returns:
+        list: 입력 순서와 같은 순서의 (예측 레이블, 신뢰도 점수) 목록
+    """
+    return [(label, score) for label, score, _ in predict_deepfake_batch_with_stage(images)]
+
+
+def predict_deepfake_batch_with_stage(images: list):
+    """
+    predict_deepfake_batch와 같지만, 판별을 결정한 단계('screen' 또는 'full')를 함께 반환합니다.
+
+    Returns:
+        list: 입력 순서와 같은 순서의 (예측 레이블, 신뢰도 점수, 결정 단계) 목록
+    """
+    if not images:
+        return []
+    _require_model()
+
+    if not FAST_PREPROCESS:
+        # 리스트를 넘기면 파이프라인이 이미지별 결과 목록을 돌려줍니다.
+        with track_stage("inference"):
+            results = pipe(images, batch_size=len(images))
+        CASCADE_DECISIONS.inc(len(results), stage="full")
+        return [(*_parse_result(result), "full") for result in results]
+
+    # 전처리 단계에서 만든 텐서를 모델에 바로 넣습니다.
+    if screener is None:
+        with track_stage("preprocess"):
+            pixel_values = preprocessor.to_pixel_values(images)
+        with track_stage("inference"):
+            probs = predict_pixel_values(pixel_values)
+        CASCADE_DECISIONS.inc(len(probs), stage="full")
+        return [(*_top_prediction(p, id2label), "full") for p in probs]
+
+    # 1단계: 모든 이미지를 선별 엔진 입력 크기로 전처리해 채점
+    same_size = (screen_preprocessor.height, screen_preprocessor.width) == (preprocessor.height, preprocessor.width)
+    with track_stage("preprocess"):
+        screen_pixel_values = screen_preprocessor.to_pixel_values(images)
+    with track_stage("screen"):
+        screen_probs = screener.predict_pixel_values(screen_pixel_values)
+    fake_probs = fake_probabilities(screen_probs, screener.id2label)
+    uncertain = np.flatnonzero((fake_probs >= CASCADE_BAND_LOW) & (fake_probs <= CASCADE_BAND_HIGH))
+    results = [(*_top_prediction(p, screener.id2label), "screen") for p in screen_probs]
+
+    # 2단계: 애매한 이미지만 전체 모델 입력 크기로 전처리해 다시 판별 (크기가 같으면 1단계 입력을 그대로 사용)
+    if len(uncertain):
+        if same_size:
+            pixel_values = screen_pixel_values[uncertain]
+        else:
+            with track_stage("preprocess"):
+                pixel_values = preprocessor.to_pixel_values([images[index] for index in uncertain])
+        with track_stage("inference"):
+            full_probs = predict_pixel_values(pixel_values)
+        for index, p in zip(uncertain, full_probs):
+            results[index] = (*_top_prediction(p, id2label), "full")
+    CASCADE_DECISIONS.inc(len(results) - len(uncertain), stage="screen")
+    CASCADE_DECISIONS.inc(len(uncertain), stage="full")
+    return results
+
+
+def _top_prediction(probs: np.ndarray, labels: dict):
+    """클래스별 확률에서 가장 높은 클래스를 (예측 레이블, 신뢰도 점수)로 반환합니다."""
+    top = int(probs.argmax())
+    return _to_class(labels[top]), float(probs[top])
+
+
+def fake_probabilities(probs: np.ndarray, labels: dict) -> np.ndarray:
+    """클래스별 확률 (N, num_labels)에서 Fake 쪽 클래스 확률의 합 (N,)을 계산합니다."""
+    fake_columns = [int(i) for i, label in labels.items() if _to_class(label) == "Fake"]
+    return probs[:, fake_columns].sum(axis=1)
+
+
 # --- 3. 스크립트 실행 예시 ---
 
 if __name__ == "__main__":
-    # !!! 아래 파일 경로를 실제 테스트하고 싶은 이미지 경로로 변경해주세요 !!!
-    # 예: test_image_path = "C:/Users/MyUser/Pictures/my_photo.jpg"
-    # 예: test_image_path = "/home/user/images/test.png"
+    # 사용법: python predict.py <이미지 경로> [<이미지 경로> ...]
+    # (폴더나 스토리지 전체를 판별할 때는 bulk_scan.py를 사용하세요)
+    import argparse
+    parser = argparse.ArgumentParser(description="이미지 파일의 딥페이크 여부를 판별합니다.")
+    parser.add_argument("image_paths", nargs="+", help="판별할 이미지 파일 경로")
+    args = parser.parse_args()
 
     print("\n" + "="*30)
     print("        DEEPFAKE PREDICTION")
     print("="*30)
-    
+
     # 함수 호출 및 결과 출력
-    prediction, confidence = predict_deepfake_from_path(test_image_path)
+    for test_image_path in args.image_paths:
+        prediction, confidence = predict_deepfake_from_path(test_image_path)
 
-    if prediction is not None:
-        print(f"\n✅ Prediction Result for '{os.path.basename(test_image_path)}'")
-        print(f"   - Predicted Label:  '{prediction.upper()}'")
-        print(f"   - Confidence:       {confidence:.4f}")
\ No newline at end of file
+        if prediction is not None:
+            print(f"\n✅ Prediction Result for '{os.path.basename(test_image_path)}'")
+            print(f"   - Predicted Label:  '{prediction.upper()}'")
+            print(f"   - Confidence:       {confidence:.4f}")
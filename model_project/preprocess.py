@@ -0,0 +1,131 @@
+# worker_project/preprocess.py
+# 빠른 디코딩 + 벡터화 전처리 단계
+#
+# - JPEG은 DCT 축소 디코딩(draft 모드)으로 모델 입력 크기 근처까지만 디코딩합니다.
+#   (예: 4000x3000 사진 -> 500x375로 디코딩한 뒤 224x224로 리사이즈)
+# - 리사이즈 후 rescale/normalize는 배치 전체를 NumPy 연산 한 번으로 처리해
+#   모델에 바로 넣을 수 있는 (N, 3, H, W) float32 텐서를 만듭니다.
+#
+# 허용 오차 (Hugging Face 이미지 프로세서 대비):
+# - draft 디코딩을 쓰지 않으면 픽셀 값 차이는 PIXEL_TOLERANCE(1e-4) 이하입니다.
+# - draft 디코딩을 쓰면 픽셀 값은 조금 달라지며, 대신 예측 Fake 확률 차이가
+#   SCORE_TOLERANCE(0.02) 이하이고 레이블이 같아야 합니다.
+# 확인 방법: python preprocess.py check <이미지 폴더>
+import io
+import os
+
+import numpy as np
+from PIL import Image
+
+PIXEL_TOLERANCE = 1e-4
+SCORE_TOLERANCE = 0.02
+
+# JPEG DCT 축소 디코딩 사용 여부
+USE_DRAFT_DECODE = os.getenv("USE_DRAFT_DECODE", "1") == "1"
+
+
+class FastPreprocessor:
+    """Hugging Face 이미지 프로세서 설정(크기, 평균, 표준편차)을 그대로 따르는 빠른 전처리기."""
+
+    def __init__(self, image_processor, use_draft: bool = USE_DRAFT_DECODE):
+        size = image_processor.size
+        self.height = size.get("height", size.get("shortest_edge", 224))
+        self.width = size.get("width", size.get("shortest_edge", 224))
+        self.do_resize = getattr(image_processor, "do_resize", True)
+        self.resample = getattr(image_processor, "resample", Image.BILINEAR)
+        self.do_rescale = getattr(image_processor, "do_rescale", True)
+        self.do_normalize = getattr(image_processor, "do_normalize", True)
+        self.use_draft = use_draft
+
+        # x * scale + offset 한 번으로 rescale과 normalize를 함께 처리하도록 미리 계산
+        rescale = image_processor.rescale_factor if self.do_rescale else 1.0
+        mean = np.asarray(image_processor.image_mean if self.do_normalize else [0.0] * 3, dtype=np.float32)
+        std = np.asarray(image_processor.image_std if self.do_normalize else [1.0] * 3, dtype=np.float32)
+        self._scale = (rescale / std).astype(np.float32)
+        self._offset = (-mean / std).astype(np.float32)
+
+    def decode(self, source) -> Image.Image:
+        """
+        파일 경로, 파일 객체 또는 bytes를 RGB 이미지로 디코딩합니다.
+
+        JPEG이면 draft 모드로 모델 입력 크기 이상인 가장 작은 DCT 축소 배율로 디코딩합니다.
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        with Image.open(source) as image:
+            if self.use_draft and image.format == "JPEG":
+                image.draft("RGB", (self.width, self.height))
+            return image.convert("RGB")
+
+    def to_pixel_values(self, images: list) -> np.ndarray:
+        """이미지 목록을 리사이즈하고 한 번의 NumPy 연산으로 정규화해 (N, 3, H, W) 텐서를 만듭니다."""
+        arrays = []
+        for image in images:
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            if self.do_resize and image.size != (self.width, self.height):
+                image = image.resize((self.width, self.height), resample=self.resample)
+            arrays.append(np.asarray(image))
+
+        batch = np.stack(arrays).astype(np.float32)        # (N, H, W, 3)
+        batch *= self._scale
+        batch += self._offset
+        return np.ascontiguousarray(batch.transpose(0, 3, 1, 2))  # (N, 3, H, W)
+
+
+def run_tolerance_check(image_dir: str) -> dict:
+    """
+    폴더의 이미지들로 Hugging Face 프로세서 대비 픽셀 차이와 예측 점수 차이를 측정합니다.
+
+    Returns:
+        dict: max_pixel_delta(draft 미사용), max_score_delta(draft 사용), label_agreement, within_tolerance
+    """
+    import predict
+    from onnx_engine import IMAGE_EXTENSIONS
+
+    paths = sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(image_dir)
+        for name in names
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    if not paths:
+        raise ValueError(f"이미지가 없습니다: {image_dir}")
+
+    predict.load_model(warmup=False)
+    image_processor = predict.pipe.image_processor
+    exact = FastPreprocessor(image_processor, use_draft=False)
+    fast = FastPreprocessor(image_processor, use_draft=True)
+
+    max_pixel_delta, max_score_delta, agree = 0.0, 0.0, 0
+    for path in paths:
+        full_image = exact.decode(path)
+        reference = image_processor(full_image, return_tensors="np")["pixel_values"].astype(np.float32)
+        max_pixel_delta = max(max_pixel_delta, float(np.abs(exact.to_pixel_values([full_image]) - reference).max()))
+
+        reference_probs = predict.predict_pixel_values(reference)[0]
+        fast_probs = predict.predict_pixel_values(fast.to_pixel_values([fast.decode(path)]))[0]
+        max_score_delta = max(max_score_delta, float(np.abs(reference_probs - fast_probs).max()))
+        agree += int(reference_probs.argmax() == fast_probs.argmax())
+
+    return {
+        "images": len(paths),
+        "max_pixel_delta": max_pixel_delta,
+        "max_score_delta": max_score_delta,
+        "label_agreement": agree / len(paths),
+        "within_tolerance": max_pixel_delta <= PIXEL_TOLERANCE and max_score_delta <= SCORE_TOLERANCE
+                            and agree == len(paths),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="빠른 전처리 단계 허용 오차 확인")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    check_parser = subparsers.add_parser("check", help="Hugging Face 프로세서 대비 오차 측정")
+    check_parser.add_argument("image_dir")
+    args = parser.parse_args()
+
+    print(json.dumps(run_tolerance_check(args.image_dir), indent=2, ensure_ascii=False))
@@ -0,0 +1,195 @@
+# worker_project/replica_pool.py
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import predict
+
+
+def split_cores(num_replicas: int) -> list:
+    """사용 가능한 CPU 코어를 복제본 수만큼 연속된 묶음으로 나눕니다."""
+    cores = sorted(os.sched_getaffinity(0))
+    if num_replicas > len(cores):
+        raise ValueError(f"복제본 수({num_replicas})가 코어 수({len(cores)})보다 많습니다.")
+    size, extra = divmod(len(cores), num_replicas)
+    groups, start = [], 0
+    for index in range(num_replicas):
+        end = start + size + (1 if index < extra else 0)
+        groups.append(cores[start:end])
+        start = end
+    return groups
+
+
+def _init_replica(cores: list, num_threads: int):
+    """복제본 프로세스를 지정된 코어에 고정하고 연산 스레드 수를 맞춥니다."""
+    os.sched_setaffinity(0, cores)
+    # torch는 PyTorch 엔진일 때만 읽습니다. (ONNX/가짜 엔진 Worker에는 설치되어 있지 않을 수 있음)
+    if predict.INFERENCE_ENGINE == "pytorch":
+        import torch
+        torch.set_num_threads(num_threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # 부모에서 이미 병렬 작업이 시작된 경우에는 바꿀 수 없으므로 그대로 둡니다.
+            pass
+
+    # ONNX Runtime 세션의 스레드 풀은 fork 후 자식에게 이어지지 않으므로 새로 만듭니다.
+    if predict.INFERENCE_ENGINE in ("onnx", "onnx-int8"):
+        from onnx_engine import OnnxImageClassifier
+        predict.pipe = OnnxImageClassifier.from_cache(
+            predict.MODEL_ID, quantized=predict.INFERENCE_ENGINE == "onnx-int8", num_threads=num_threads,
+            revision=predict.MODEL_REVISION
+        )
+    if predict.CASCADE_SCREEN_ENGINE in ("onnx", "onnx-int8"):
+        from onnx_engine import OnnxImageClassifier
+        predict.screener = OnnxImageClassifier.from_cache(
+            predict.MODEL_ID, quantized=predict.CASCADE_SCREEN_ENGINE == "onnx-int8", num_threads=num_threads,
+            revision=predict.MODEL_REVISION, input_size=predict.CASCADE_SCREEN_SIZE or None
+        )
+
+
+def predict_items(items: list) -> list:
+    """
+    이미지 바이트 배치를 항목별로 디코딩한 뒤 디코딩된 이미지만 한 번에 추론합니다.
+
+    디코딩에 실패한 항목 자리에는 결과 대신 예외 객체를 넣어, 그 요청만 실패하고
+    같은 배치의 다른 요청은 정상 결과를 받게 합니다.
+    """
+    results = [None] * len(items)
+    images, positions = [], []
+    for position, item in enumerate(items):
+        try:
+            images.append(predict.decode_image_bytes(item))
+            positions.append(position)
+        except Exception as e:
+            results[position] = ValueError(f"이미지 디코딩 실패: {e!r}")
+    for position, prediction in zip(positions, predict.predict_deepfake_batch_with_stage(images)):
+        results[position] = prediction
+    return results
+
+
+def _replica_main(index: int, cores: list, num_threads: int, task_queue, result_queue):
+    """복제본 프로세스: 이미지 바이트 배치를 받아 디코딩과 추론을 수행합니다."""
+    _init_replica(cores, num_threads)
+    print(f"✅ 모델 복제본 #{index} 시작 (pid={os.getpid()}, cores={cores[0]}-{cores[-1]}, threads={num_threads})")
+    while True:
+        job = task_queue.get()
+        if job is None:
+            break
+        job_id, items = job
+        try:
+            result_queue.put((job_id, predict_items(items), None))
+        except Exception as e:
+            # 추론 자체가 실패한 경우에만 배치 전체를 실패 처리
+            result_queue.put((job_id, None, repr(e)))
+
+
+class ReplicaPool:
+    """
+    모델 복제본 프로세스 풀.
+
+    각 복제본은 자신만의 CPU 코어 묶음에 고정되고, 요청은 처리 중인 작업이
+    가장 적은 복제본으로 보냅니다. fork로 자식 프로세스를 만들기 때문에
+    부모에서 한 번 읽어 둔 PyTorch 가중치는 복사되지 않고 읽기 전용으로 공유됩니다.
+    """
+
+    def __init__(self, num_replicas: int, threads_per_replica: int = 0):
+        self.num_replicas = num_replicas
+        self.threads_per_replica = threads_per_replica
+        self._ctx = mp.get_context("fork")
+        self._result_queue = self._ctx.Queue()
+        self._replicas = []  # (process, task_queue)
+        self._outstanding = [0] * num_replicas
+        self._pending = {}  # job_id -> (replica index, Future)
+        self._job_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._collector = None
+        self._closed = False
+
+    def start(self):
+        """복제본 프로세스들과 결과 수집 스레드를 시작합니다."""
+        # 부모 프로세스는 추론하지 않으므로 연산 스레드가 복제본과 경쟁하지 않도록 줄입니다.
+        if predict.INFERENCE_ENGINE == "pytorch":
+            import torch
+            torch.set_num_threads(1)
+
+        for index, cores in enumerate(split_cores(self.num_replicas)):
+            num_threads = self.threads_per_replica or len(cores)
+            task_queue = self._ctx.Queue()
+            process = self._ctx.Process(
+                target=_replica_main,
+                args=(index, cores, num_threads, task_queue, self._result_queue),
+                daemon=True,
+            )
+            process.start()
+            self._replicas.append((process, task_queue))
+
+        self._collector = threading.Thread(target=self._collect_results, name="replica-collector", daemon=True)
+        self._collector.start()
+
+    def stop(self):
+        """복제본 프로세스를 종료합니다."""
+        self._closed = True
+        for _, task_queue in self._replicas:
+            task_queue.put(None)
+        for process, _ in self._replicas:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+    def submit(self, items: list) -> Future:
+        """이미지 바이트 배치를 가장 한가한 복제본에 보내고 Future를 반환합니다."""
+        future = Future()
+        with self._lock:
+            alive = [i for i, (process, _) in enumerate(self._replicas) if process.is_alive()]
+            if not alive:
+                future.set_exception(RuntimeError("사용 가능한 모델 복제본이 없습니다."))
+                return future
+            index = min(alive, key=lambda i: self._outstanding[i])
+            job_id = next(self._job_ids)
+            self._outstanding[index] += 1
+            self._pending[job_id] = (index, future)
+        self._replicas[index][1].put((job_id, items))
+        return future
+
+    def predict_batch(self, items: list) -> list:
+        """
+        MicroBatcher용 동기 함수: 배치를 복제본에서 처리하고 결과 목록을 반환합니다.
+
+        디코딩에 실패한 항목 자리에는 예외 객체가 들어 있으며, MicroBatcher가 그 요청만 실패 처리합니다.
+        """
+        return self.submit(items).result()
+
+    def _collect_results(self):
+        last_check = time.monotonic()
+        while not self._closed:
+            if time.monotonic() - last_check > 1.0:
+                self._fail_dead_replicas()
+                last_check = time.monotonic()
+            try:
+                job_id, result, error = self._result_queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            with self._lock:
+                pending = self._pending.pop(job_id, None)
+                if pending is None:
+                    continue
+                index, future = pending
+                self._outstanding[index] -= 1
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(error))
+
+    def _fail_dead_replicas(self):
+        """비정상 종료된 복제본에 맡겨진 작업을 실패 처리합니다."""
+        with self._lock:
+            for job_id, (index, future) in list(self._pending.items()):
+                if not self._replicas[index][0].is_alive():
+                    del self._pending[job_id]
+                    self._outstanding[index] -= 1
+                    future.set_exception(RuntimeError(f"모델 복제본 #{index}이 종료되었습니다."))
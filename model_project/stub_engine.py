@@ -0,0 +1,49 @@
+# worker_project/stub_engine.py
+# 벤치마크용 가짜 추론 엔진 (INFERENCE_ENGINE=stub)
+#
+# 모델 파일이나 허브 접속 없이 파이프라인과 같은 방식으로 호출되며, 배치마다 정해진 시간만큼 쉬고
+# 픽셀 평균으로 만든 점수를 돌려줍니다. 업로드/스토리지/배치 처리 등 모델 밖의 구간만 측정할 때 사용합니다.
+# 입력 해상도를 줄이면(input_size) 이미지당 지연도 픽셀 수에 비례해 줄어듭니다. (2단계 추론의 선별 엔진 흉내)
+import os
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+# 배치 한 번의 고정 지연 + 이미지당 추가 지연 (ms)
+STUB_BATCH_LATENCY_MS = float(os.getenv("STUB_BATCH_LATENCY_MS", "5"))
+STUB_ITEM_LATENCY_MS = float(os.getenv("STUB_ITEM_LATENCY_MS", "2"))
+
+
+class StubImageClassifier:
+    """OnnxImageClassifier와 같은 속성(image_processor, id2label)과 메서드를 가진 가짜 분류기."""
+
+    def __init__(self, batch_latency_ms: float = STUB_BATCH_LATENCY_MS, item_latency_ms: float = STUB_ITEM_LATENCY_MS,
+                 input_size: int = None):
+        self.input_size = input_size or 224
+        self.batch_latency = batch_latency_ms / 1000.0
+        self.item_latency = item_latency_ms / 1000.0 * (self.input_size / 224) ** 2
+        # 실제 모델(ViT)의 전처리 설정과 같은 값
+        self.image_processor = SimpleNamespace(
+            size={"height": self.input_size, "width": self.input_size}, do_resize=True, do_rescale=True,
+            do_normalize=True, rescale_factor=1 / 255, image_mean=[0.5, 0.5, 0.5], image_std=[0.5, 0.5, 0.5],
+        )
+        self.id2label = {0: "Realism", 1: "Deepfake"}
+
+    def predict_pixel_values(self, pixel_values: np.ndarray) -> np.ndarray:
+        """배치 크기에 맞춰 쉰 뒤, 이미지 밝기로 정해지는 (N, 2) 확률을 반환합니다."""
+        time.sleep(self.batch_latency + self.item_latency * len(pixel_values))
+        fake = (np.tanh(pixel_values.reshape(len(pixel_values), -1).mean(axis=1)) + 1) / 2
+        return np.stack([1 - fake, fake], axis=1).astype(np.float32)
+
+    def __call__(self, images, batch_size: int = None):
+        single = not isinstance(images, (list, tuple))
+        batch = [images] if single else list(images)
+        size = (self.input_size, self.input_size)
+        arrays = np.stack([np.asarray(image.convert("RGB").resize(size), dtype=np.float32) for image in batch])
+        pixel_values = (arrays / 127.5 - 1).transpose(0, 3, 1, 2)
+        results = [
+            sorted(({"label": self.id2label[i], "score": float(p[i])} for i in range(2)), key=lambda x: -x["score"])
+            for p in self.predict_pixel_values(pixel_values)
+        ]
+        return results[0] if single else results
@@ -0,0 +1,115 @@
+# worker_project/video.py
+import asyncio
+import io
+import os
+
+from PIL import Image
+
+# 영상 분석 설정
+VIDEO_SAMPLE_FPS = float(os.getenv("VIDEO_SAMPLE_FPS", "2"))          # 초당 분석할 프레임 수
+VIDEO_BATCH_SIZE = int(os.getenv("VIDEO_BATCH_SIZE", "16"))           # 한 번에 모델에 보낼 프레임 수
+VIDEO_MIN_FRAMES = int(os.getenv("VIDEO_MIN_FRAMES", "16"))           # 조기 종료 전 최소 분석 프레임 수
+VIDEO_MAX_FRAMES = int(os.getenv("VIDEO_MAX_FRAMES", "600"))          # 영상 길이와 관계없이 분석할 최대 프레임 수
+VIDEO_DECISIVE_THRESHOLD = float(os.getenv("VIDEO_DECISIVE_THRESHOLD", "0.9"))  # 평균 점수가 이 이상으로 확실하면 조기 종료
+VIDEO_FRAME_SHORT_SIDE = int(os.getenv("VIDEO_FRAME_SHORT_SIDE", "256"))        # 디코딩 직후 줄일 짧은 변 길이
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm")
+
+
+def is_video_file(filename: str) -> bool:
+    """파일 이름의 확장자로 영상 파일인지 판단합니다."""
+    return filename.lower().endswith(VIDEO_EXTENSIONS)
+
+
+def iter_sampled_frames(source, sample_fps: float = VIDEO_SAMPLE_FPS, short_side: int = VIDEO_FRAME_SHORT_SIDE):
+    """
+    영상을 스트림으로 디코딩하면서 sample_fps 간격으로 프레임을 뽑아 (시각(초), PIL 이미지)로 반환합니다.
+
+    전체 프레임을 메모리에 올리지 않고, 뽑은 프레임도 모델 입력 크기 근처로 바로 줄입니다.
+    """
+    import av
+
+    interval = 1.0 / sample_fps
+    next_time = 0.0
+    with av.open(source) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        for frame in container.decode(stream):
+            if frame.time is None or frame.time + 1e-6 < next_time:
+                continue
+            next_time = frame.time + interval
+
+            scale = short_side / min(frame.width, frame.height)
+            if scale < 1:
+                frame = frame.reformat(width=round(frame.width * scale) // 2 * 2,
+                                       height=round(frame.height * scale) // 2 * 2)
+            yield frame.time, frame.to_image()
+
+
+def image_to_jpeg_bytes(image: Image.Image) -> bytes:
+    """프레임 이미지를 JPEG 바이트로 인코딩합니다. (복제본 풀로 보낼 때 사용)"""
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=95)
+    return buffer.getvalue()
+
+
+def _fake_probability(label: str, score: float) -> float:
+    """(예측 레이블, 신뢰도)를 'Fake'일 확률로 바꿉니다."""
+    return score if label == "Fake" else 1.0 - score
+
+
+async def analyze_video(source, submit_frame, sample_fps: float = VIDEO_SAMPLE_FPS,
+                        batch_size: int = VIDEO_BATCH_SIZE, min_frames: int = VIDEO_MIN_FRAMES,
+                        max_frames: int = VIDEO_MAX_FRAMES,
+                        decisive_threshold: float = VIDEO_DECISIVE_THRESHOLD) -> dict:
+    """
+    영상에서 프레임을 뽑아 배치로 판별하고, 프레임별 점수를 모아 영상 전체의 판정을 만듭니다.
+
+    Args:
+        source: 영상 파일 경로 또는 파일 객체
+        submit_frame: PIL 이미지 하나를 받아 (예측 레이블, 신뢰도, 결정 단계)를 돌려주는 async 함수
+        decisive_threshold: min_frames 이상 분석한 뒤 평균 Fake 확률이 이 값 이상(또는 1-이 값 이하)이면 조기 종료
+
+    Returns:
+        dict: model_result, confidence, frames_analyzed, early_exit, timeline
+    """
+    frames = iter_sampled_frames(source, sample_fps)
+    timeline = []
+    early_exit = False
+    try:
+        while len(timeline) < max_frames:
+            # 디코딩은 스레드에서, 한 배치 분량의 프레임만 메모리에 유지
+            batch = []
+            while len(batch) < min(batch_size, max_frames - len(timeline)):
+                sampled = await asyncio.to_thread(next, frames, None)
+                if sampled is None:
+                    break
+                batch.append(sampled)
+            if not batch:
+                break
+
+            predictions = await asyncio.gather(*[submit_frame(image) for _, image in batch])
+            for (frame_time, _), (label, score, _stage) in zip(batch, predictions):
+                timeline.append({"time": round(frame_time, 3), "fake_probability": _fake_probability(label, score)})
+
+            mean_fake = sum(point["fake_probability"] for point in timeline) / len(timeline)
+            if len(timeline) >= min_frames and (mean_fake >= decisive_threshold or mean_fake <= 1 - decisive_threshold):
+                early_exit = True
+                break
+            if len(batch) < batch_size:
+                break
+    finally:
+        frames.close()
+
+    if not timeline:
+        raise ValueError("영상에서 프레임을 읽을 수 없습니다.")
+
+    mean_fake = sum(point["fake_probability"] for point in timeline) / len(timeline)
+    is_fake = mean_fake >= 0.5
+    return {
+        "model_result": "Fake" if is_fake else "Real",
+        "confidence": mean_fake if is_fake else 1.0 - mean_fake,
+        "frames_analyzed": len(timeline),
+        "early_exit": early_exit,
+        "timeline": timeline,
+    }
@@ -1,52 +1,288 @@
 # worker_project/worker_api.py
 import uvicorn
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import FastAPI, BackgroundTasks, Request, Query, Header
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
+from contextlib import asynccontextmanager
+import asyncio
 import os
+import tempfile
 import time
-from ncp_object import download_from_ncp # ncp_object.py에서 다운로드 함수 가져오기
 import sys
-from predict import predict_deepfake_from_path as model
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.storage import get_storage, object_key # 중개 서버와 함께 쓰는 스토리지 계층
+from common.metrics import Gauge, Histogram, track_stage, record_error, render_metrics, CONTENT_TYPE
+from predict import predict_deepfake_batch_with_stage, decode_image_bytes, load_model, model_status, MODEL_TAG
+from batcher import MicroBatcher
+from replica_pool import ReplicaPool
+from video import analyze_video, image_to_jpeg_bytes, VIDEO_SAMPLE_FPS
 
-app = FastAPI()
+# 마이크로 배치 설정: 최대 배치 크기 / 첫 요청 후 최대 대기 시간(ms)
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "10"))
 
-# 다운로드 받을 임시 폴더 생성
-os.makedirs("temp_files", exist_ok=True)
+# 모델 복제본 풀 설정: 2 이상이면 코어를 나눠 고정한 복제본 프로세스들에서 추론
+# REPLICA_THREADS가 0이면 복제본마다 배정된 코어 수만큼 연산 스레드를 사용
+REPLICA_COUNT = int(os.getenv("REPLICA_COUNT", "1"))
+REPLICA_THREADS = int(os.getenv("REPLICA_THREADS", "0"))
+
+# direct 모드(/process-bytes/)로 받을 요청 본문의 최대 크기 (중개 서버의 MULTIPART_THRESHOLD 이상으로 설정)
+MAX_DIRECT_BODY_BYTES = int(os.getenv("MAX_DIRECT_BODY_BYTES", str(16 * 1024 * 1024)))
+
+# 업로드 파일 저장소 (STORAGE_BACKEND=s3 | local | memory)
+storage = get_storage()
+
+# Worker 지표 (/metrics)
+REQUESTS_IN_FLIGHT = Gauge("trufy_worker_requests_in_flight", "처리 중인 Worker 요청 수")
+BATCH_QUEUE_DEPTH = Gauge("trufy_batch_queue_depth", "배치 처리기 대기열에 쌓인 입력 수")
+BATCH_SIZE = Histogram("trufy_batch_size", "모델에 한 번에 넣은 배치 크기", buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+
+def with_batch_metrics(predict_fn):
+    """배치 처리 함수가 받은 배치 크기를 기록하도록 감쌉니다."""
+    def predict_batch(items: list) -> list:
+        BATCH_SIZE.observe(len(items))
+        return predict_fn(items)
+    return predict_batch
+
+if REPLICA_COUNT > 1:
+    # 복제본이 디코딩까지 맡도록 이미지 바이트를 그대로 넘깁니다.
+    replica_pool = ReplicaPool(REPLICA_COUNT, REPLICA_THREADS)
+    batcher = MicroBatcher(with_batch_metrics(replica_pool.predict_batch), max_batch_size=BATCH_MAX_SIZE,
+                           max_wait_ms=BATCH_MAX_WAIT_MS, max_concurrency=REPLICA_COUNT)
+else:
+    replica_pool = None
+    batcher = MicroBatcher(with_batch_metrics(predict_deepfake_batch_with_stage), max_batch_size=BATCH_MAX_SIZE,
+                           max_wait_ms=BATCH_MAX_WAIT_MS)
+BATCH_QUEUE_DEPTH.set_function(batcher.queue_depth)
+
+# 모델 로드와 (복제본 풀 모드에서) 복제본 시작까지 끝나 요청을 받을 수 있는지 여부
+serving_ready = False
+
+async def prepare_model():
+    """모델을 백그라운드에서 로드하고 워밍업한 뒤 복제본 풀을 띄웁니다. (그동안 /healthz 응답 가능)"""
+    global serving_ready
+    try:
+        await asyncio.to_thread(load_model)
+        if replica_pool is not None:
+            # 부모에서 읽어 둔 가중치를 fork로 공유하도록 모델 로드 후에 복제본을 만듭니다.
+            await asyncio.to_thread(replica_pool.start)
+        serving_ready = True
+        print("✅ Worker 준비 완료")
+    except Exception as e:
+        print(f"❌ 모델 준비 실패: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """서버 시작 시 배치 처리기를 띄우고 모델 준비를 백그라운드로 시작하며, 종료 시 정리합니다."""
+    await batcher.start()
+    preparing = asyncio.create_task(prepare_model())
+    yield
+    if not preparing.done():
+        preparing.cancel()
+    await batcher.stop()
+    if replica_pool is not None and serving_ready:
+        replica_pool.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+def not_ready_response() -> JSONResponse:
+    """모델이 아직 준비되지 않았을 때의 응답 (중개 서버는 다른 Worker로 보내거나 실패 처리)"""
+    return JSONResponse(status_code=503, content={"error": "모델이 아직 준비되지 않았습니다.", **model_status()})
+
+@app.get("/healthz")
+async def healthz():
+    """프로세스 생존 확인 API (모델 로드에 실패했으면 503으로 재시작을 유도)"""
+    status = model_status()
+    return JSONResponse(status_code=503 if status["status"] == "failed" else 200, content=status)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus 형식 지표 API (단계별 처리 시간, 배치 크기, 대기열 길이, 단계별 오류 수)"""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+@app.get("/readyz")
+async def readyz():
+    """요청을 받을 준비가 되었는지 확인하는 API (모델 로드/워밍업 전에는 503)"""
+    if not serving_ready:
+        return not_ready_response()
+    return model_status()
 
 class FileInfo(BaseModel):
     """중개 서버로부터 받을 파일 정보 모델"""
-    object_name: str # NCP에 저장된 파일 이름
-
-def run_ai_model_on_file(file_path: str) -> dict:
-    """다운로드된 파일을 가지고 AI 모델을 실행하는 함수"""
-    print(f"AI 모델 실행 시작: {file_path}")
-    # 여기에서 실제 AI 모델 로딩 및 추론 로직 수행
-    
-    predicted_label, confidence_score = model(file_path)
-    result = {"model_result": predicted_label, "confidence": confidence_score}
-    print(f"AI 모델 실행 완료: {file_path}")
-    # 작업이 끝난 임시 파일 삭제
-    os.remove(file_path)
+    object_name: str # 스토리지에 저장된 파일 이름
+    object_key: str = None # 업로드할 때 만든 저장소 키 (없으면 오늘 날짜로 만듦)
+    task_id: str = None # 중개 서버의 작업 ID (일괄 요청에서 항목별로 로그를 이어 보기 위함)
+
+    def storage_key(self) -> str:
+        return self.object_key or object_key(self.object_name)
+
+class VideoFileInfo(FileInfo):
+    """중개 서버로부터 받을 영상 파일 정보 모델"""
+    sample_fps: float = VIDEO_SAMPLE_FPS # 초당 분석할 프레임 수
+
+class FileInfoBatch(BaseModel):
+    """중개 서버로부터 한 번에 받을 여러 파일 정보 모델"""
+    files: list[FileInfo]
+
+async def run_ai_model_on_bytes(file_bytes: bytes, object_name: str, task_id: str = None,
+                                timings: dict = None) -> dict:
+    """메모리로 받은 파일 내용을 가지고 AI 모델을 실행하는 함수"""
+    print(f"AI 모델 실행 시작: {object_name} [{task_id}]")
+    if replica_pool is not None:
+        # 복제본 풀 모드: 디코딩과 추론 모두 복제본 프로세스에서 수행
+        with track_stage("batch_inference", timings):
+            predicted_label, confidence_score, decided_by = await batcher.submit(file_bytes)
+    else:
+        # 디코딩은 스레드에서 버퍼로부터 바로 수행하고, 추론은 배치 처리기에 맡깁니다.
+        with track_stage("decode", timings):
+            image = await asyncio.to_thread(decode_image_bytes, file_bytes)
+        # 배치가 모일 때까지의 대기 + 전처리 + 추론 (배치 단위 전처리/추론 시간은 preprocess/inference 단계로 따로 기록)
+        with track_stage("batch_inference", timings):
+            predicted_label, confidence_score, decided_by = await batcher.submit(image)
+    # decided_by: 판별을 결정한 추론 단계 ('screen': 2단계 추론의 선별 엔진, 'full': 전체 모델)
+    result = {"model_result": predicted_label, "confidence": confidence_score, "decided_by": decided_by}
+    print(f"AI 모델 실행 완료: {object_name} [{task_id}]")
     return result
 
+def download_bytes(key: str, timings: dict = None):
+    """스토리지에서 파일 내용을 메모리로 받습니다. 실패하면 None."""
+    try:
+        with track_stage("download", timings):
+            return storage.get(key)
+    except Exception as e:
+        print(f"❌ 다운로드 실패: {key} - {e}")
+        return None
+
 @app.post("/process-object/")
-async def process_object(file_info: FileInfo):
-    """파일 이름을 받아서 NCP에서 다운로드 후 AI 모델을 실행"""
-    object_name = file_info.object_name
-    download_path = os.path.join("temp_files", object_name)
+async def process_object(file_info: FileInfo, x_task_id: str = Header(None)):
+    """파일 키를 받아서 스토리지에서 메모리로 내려받은 뒤 AI 모델을 실행"""
+    if not serving_ready:
+        return not_ready_response()
+    timings = {}
+    # 1. 스토리지에서 파일 내용을 메모리로 다운로드 (임시 파일 없음)
+    file_bytes = await asyncio.to_thread(download_bytes, file_info.storage_key(), timings)
+    return await process_downloaded(file_info.object_name, file_bytes, x_task_id or file_info.task_id, timings)
 
-    # 1. NCP Object Storage에서 파일 다운로드
-    if not download_from_ncp(object_name, download_path):
-        return {"error": "NCP에서 파일 다운로드 실패"}
+async def process_downloaded(object_name: str, file_bytes: bytes, task_id: str = None,
+                             timings: dict = None) -> dict:
+    """내려받은 파일 내용으로 AI 모델을 실행해 응답을 만듭니다. (task_id와 단계별 시간 포함)"""
+    if file_bytes is None:
+        return {"error": "스토리지에서 파일 다운로드 실패", "task_id": task_id}
+    timings = {} if timings is None else timings
 
-    # 2. 다운로드된 파일로 AI 모델 실행
-    model_result = run_ai_model_on_file(download_path)
+    # 2. 메모리의 파일 내용으로 AI 모델 실행
+    REQUESTS_IN_FLIGHT.inc()
+    try:
+        model_result = await run_ai_model_on_bytes(file_bytes, object_name, task_id, timings)
+    except Exception as e:
+        # 실패한 단계(decode, batch_inference)의 오류 수는 track_stage가 이미 기록
+        print(f"❌ AI 모델 실행 실패: {object_name} [{task_id}] - {e}")
+        return {"error": f"AI 모델 실행 실패: {e}", "task_id": task_id}
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
 
     return {
         "message": "AI 모델 처리가 성공적으로 완료되었습니다!",
         "source_object": object_name,
+        "model_id": MODEL_TAG,
+        "task_id": task_id,
+        "timings": timings,
         **model_result
     }
 
+def body_too_large_response(task_id: str = None) -> JSONResponse:
+    return JSONResponse(status_code=413, content={
+        "error": f"요청 본문이 너무 큽니다. (최대 {MAX_DIRECT_BODY_BYTES} bytes)", "task_id": task_id})
+
+async def read_limited_body(request: Request, limit: int):
+    """요청 본문을 limit 바이트까지만 읽습니다. 넘으면 더 읽지 않고 None을 반환합니다."""
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            return None
+    return bytes(body)
+
+@app.post("/process-bytes/")
+async def process_bytes(request: Request, object_name: str = Query(...), x_task_id: str = Header(None)):
+    """요청 본문으로 이미지 바이트를 직접 받아 스토리지를 거치지 않고 AI 모델을 실행 (MAX_DIRECT_BODY_BYTES 초과는 413)"""
+    if not serving_ready:
+        return not_ready_response()
+    # Content-Length로 미리 알 수 있으면 본문을 읽기 전에 거절하고, 없으면(chunked) 읽으면서 확인
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > MAX_DIRECT_BODY_BYTES:
+        return body_too_large_response(x_task_id)
+    file_bytes = await read_limited_body(request, MAX_DIRECT_BODY_BYTES)
+    if file_bytes is None:
+        return body_too_large_response(x_task_id)
+    return await process_downloaded(object_name, file_bytes, x_task_id)
+
+@app.post("/process-objects/")
+async def process_objects(batch: FileInfoBatch):
+    """여러 파일 키를 한 번에 받아 동시에 처리 (다운로드는 한 번에 병렬로, 추론은 배치 처리기에서 함께 묶임)"""
+    if not serving_ready:
+        return not_ready_response()
+    download_timings = {}
+    with track_stage("download", download_timings):
+        contents = await asyncio.to_thread(storage.get_many, [file_info.storage_key() for file_info in batch.files])
+    for file_bytes in contents:
+        if file_bytes is None:
+            record_error("download")
+    results = await asyncio.gather(
+        *[process_downloaded(file_info.object_name, file_bytes, file_info.task_id, dict(download_timings))
+          for file_info, file_bytes in zip(batch.files, contents)]
+    )
+    return {"results": results}
+
+async def submit_frame(image):
+    """영상 프레임 하나를 배치 처리기에 넣습니다. (복제본 풀 모드에서는 JPEG 바이트로 전달)"""
+    if replica_pool is not None:
+        return await batcher.submit(await asyncio.to_thread(image_to_jpeg_bytes, image))
+    return await batcher.submit(image)
+
+@app.post("/process-video/")
+async def process_video(file_info: VideoFileInfo, x_task_id: str = Header(None)):
+    """영상 파일 키를 받아서 프레임을 샘플링해 판별하고, 영상 전체의 판정과 타임라인을 반환"""
+    if not serving_ready:
+        return not_ready_response()
+    object_name = file_info.object_name
+    task_id = x_task_id or file_info.task_id
+    timings = {}
+
+    # 영상은 앞뒤로 탐색이 필요할 수 있어 메모리 대신 임시 파일로 받습니다. (닫히면 자동 삭제)
+    video_file = tempfile.NamedTemporaryFile(suffix=os.path.splitext(object_name)[1])
+    REQUESTS_IN_FLIGHT.inc()
+    try:
+        key = file_info.storage_key()
+        try:
+            with track_stage("download", timings):
+                await asyncio.to_thread(storage.download_fileobj, key, video_file)
+        except Exception as e:
+            print(f"❌ 다운로드 실패: {key} [{task_id}] - {e}")
+            return {"error": "스토리지에서 파일 다운로드 실패", "task_id": task_id}
+        video_file.flush()
+
+        try:
+            print(f"영상 분석 시작: {object_name} [{task_id}]")
+            with track_stage("video_analysis", timings):
+                video_result = await analyze_video(video_file.name, submit_frame, sample_fps=file_info.sample_fps)
+            print(f"영상 분석 완료: {object_name} [{task_id}] ({video_result['frames_analyzed']} frames)")
+        except Exception as e:
+            print(f"❌ 영상 분석 실패: {object_name} [{task_id}] - {e}")
+            return {"error": f"영상 분석 실패: {e}", "task_id": task_id}
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
+        with track_stage("cleanup", timings):
+            video_file.close()
+
+    return {
+        "message": "영상 분석이 성공적으로 완료되었습니다!",
+        "source_object": object_name,
+        "model_id": MODEL_TAG,
+        "task_id": task_id,
+        "timings": timings,
+        **video_result
+    }
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,189 @@
+# app_project/admission.py
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+
+# 우선순위 클래스 (앞에 있을수록 먼저 처리): 화면에서 기다리는 단건 업로드가 일괄 작업보다 먼저
+PRIORITIES = ("interactive", "bulk")
+
+
+class QueueFull(Exception):
+    """대기열이 가득 차서 작업을 받을 수 없음 (retry_after: 다시 시도해 볼 만한 대기 시간, 초)"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Job:
+    __slots__ = ("task_ids", "client_id", "priority", "run", "cost")
+
+    def __init__(self, task_ids: list, client_id: str, priority: str, run):
+        self.task_ids = task_ids
+        self.client_id = client_id
+        self.priority = priority
+        self.run = run
+        self.cost = len(task_ids)
+
+
+class AdmissionQueue:
+    """
+    중개 서버의 작업 접수 대기열.
+
+    - 대기 중인 작업 수(이미지 단위)를 max_depth 이하로 제한하고, 넘으면 QueueFull로 바로 거절합니다.
+    - 한 클라이언트가 대기열을 독차지하지 않도록 클라이언트별 대기 작업 수를 max_per_client 이하로 제한합니다.
+    - 우선순위 클래스 순서대로 처리하고, 같은 클래스 안에서는 클라이언트끼리 번갈아(round-robin) 처리합니다.
+    - 동시에 실행하는 작업은 concurrency개 이하이며, 실행 시간을 지켜보며 예상 대기 시간을 계산합니다.
+    """
+
+    def __init__(self, max_depth: int = 1000, max_per_client: int = 250, concurrency: int = 32,
+                 initial_item_seconds: float = 1.0):
+        self.max_depth = max_depth
+        self.max_per_client = max_per_client
+        self.concurrency = max(1, concurrency)
+        # 작업 하나(이미지 한 장)를 처리하는 데 걸리는 시간의 지수 이동 평균 (예상 대기 시간 계산용)
+        self.item_seconds = initial_item_seconds
+        self.running = 0
+        self.rejected = 0
+
+        # 우선순위별 client_id -> 작업 deque (OrderedDict 순서가 round-robin 차례)
+        self._queues = {priority: OrderedDict() for priority in PRIORITIES}
+        self._client_depth = {}  # client_id -> 대기 중인 이미지 수
+        self._depth = 0
+        self._jobs_by_task = {}  # task_id -> 대기 중인 _Job
+        self._wakeup = asyncio.Event()
+        self._runners = []
+
+    def start(self):
+        """실행기(runner)들을 시작합니다. (이벤트 루프 안에서 호출)"""
+        self._wakeup = asyncio.Event()
+        self._runners = [asyncio.create_task(self._runner()) for _ in range(self.concurrency)]
+
+    async def close(self):
+        for runner in self._runners:
+            runner.cancel()
+        await asyncio.gather(*self._runners, return_exceptions=True)
+        self._runners = []
+
+    def check(self, client_id: str, cost: int = 1):
+        """cost개의 작업을 지금 받을 수 있는지 확인합니다. 받을 수 없으면 QueueFull."""
+        if self._depth + cost > self.max_depth:
+            self.rejected += 1
+            raise QueueFull("대기열이 가득 찼습니다.", self.retry_after())
+        if self._client_depth.get(client_id, 0) + cost > self.max_per_client:
+            self.rejected += 1
+            raise QueueFull("이 클라이언트의 대기 작업이 너무 많습니다.", self.retry_after())
+
+    def submit(self, task_ids: list, client_id: str, priority: str, run):
+        """
+        작업을 대기열에 넣습니다. run은 차례가 되면 실행할 코루틴 함수입니다.
+
+        Raises:
+            QueueFull: 대기열 또는 클라이언트 몫이 가득 찬 경우
+        """
+        self.check(client_id, len(task_ids))
+        job = _Job(task_ids, client_id, priority, run)
+        self._queues[priority].setdefault(client_id, deque()).append(job)
+        self._client_depth[client_id] = self._client_depth.get(client_id, 0) + job.cost
+        self._depth += job.cost
+        for task_id in task_ids:
+            self._jobs_by_task[task_id] = job
+        self._wakeup.set()
+
+    def _next_job(self):
+        """가장 높은 우선순위 클래스에서 차례가 된 클라이언트의 작업을 꺼냅니다."""
+        for priority in PRIORITIES:
+            clients = self._queues[priority]
+            if not clients:
+                continue
+            client_id, jobs = next(iter(clients.items()))
+            job = jobs.popleft()
+            # 꺼낸 클라이언트는 맨 뒤로 보내 다음에는 다른 클라이언트 차례
+            del clients[client_id]
+            if jobs:
+                clients[client_id] = jobs
+            self._depth -= job.cost
+            self._client_depth[client_id] -= job.cost
+            if not self._client_depth[client_id]:
+                del self._client_depth[client_id]
+            for task_id in job.task_ids:
+                self._jobs_by_task.pop(task_id, None)
+            return job
+        return None
+
+    async def _runner(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            self.running += 1
+            started = time.monotonic()
+            try:
+                await job.run()
+            except Exception as e:
+                print(f"❌ 대기열 작업 실행 실패: {job.task_ids[:3]} - {e!r}")
+            finally:
+                self.running -= 1
+                elapsed = (time.monotonic() - started) / job.cost
+                self.item_seconds = 0.8 * self.item_seconds + 0.2 * elapsed
+
+    def position(self, task_id: str):
+        """
+        대기 중인 작업의 순번과 예상 대기 시간을 계산합니다. 대기 중이 아니면 None.
+
+        순번은 지금 대기열이 그대로 처리된다고 할 때 이 작업보다 먼저 처리될 이미지 수입니다.
+        """
+        job = self._jobs_by_task.get(task_id)
+        if job is None:
+            return None
+        ahead = 0
+        for priority in PRIORITIES:
+            clients = self._queues[priority]
+            if priority != job.priority:
+                ahead += sum(queued.cost for jobs in clients.values() for queued in jobs)
+                continue
+            # 같은 클래스는 클라이언트끼리 번갈아 처리하므로, 다른 클라이언트는 내 순번만큼까지만 앞섭니다.
+            own_jobs = clients[job.client_id]
+            rounds = own_jobs.index(job)
+            ahead += sum(queued.cost for queued in list(own_jobs)[:rounds])
+            client_ids = list(clients)
+            my_turn = client_ids.index(job.client_id)
+            for turn, client_id in enumerate(client_ids):
+                if client_id == job.client_id:
+                    continue
+                # 이번 바퀴에서 나보다 앞 차례인 클라이언트는 한 작업 더 앞섭니다.
+                limit = rounds + 1 if turn < my_turn else rounds
+                ahead += sum(queued.cost for queued in list(clients[client_id])[:limit])
+            break
+        return {
+            "position": ahead + 1,
+            "estimated_wait_seconds": round(self._wait_for(ahead), 1),
+        }
+
+    def _wait_for(self, items_ahead: int) -> float:
+        return math.ceil((items_ahead + 1) / self.concurrency) * self.item_seconds
+
+    def retry_after(self) -> int:
+        """대기열이 한 차례 비워질 만큼의 시간(초, 최소 1)"""
+        return max(1, math.ceil(self._wait_for(self._depth)))
+
+    def depth(self, priority: str = None) -> int:
+        if priority is None:
+            return self._depth
+        return sum(job.cost for jobs in self._queues[priority].values() for job in jobs)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._depth,
+            "queued_by_priority": {priority: self.depth(priority) for priority in PRIORITIES},
+            "clients": len(self._client_depth),
+            "running": self.running,
+            "rejected": self.rejected,
+            "item_seconds": round(self.item_seconds, 3),
+            "max_depth": self.max_depth,
+            "max_per_client": self.max_per_client,
+        }
@@ -1,70 +1,797 @@
 # app_project/main_api.py
 import uvicorn
-from fastapi import FastAPI, File, UploadFile, BackgroundTasks
-from fastapi.responses import JSONResponse
-import requests
+from fastapi import FastAPI, File, UploadFile, Request, Query
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import httpx
+import json
+import os
+import time
 import uuid
-from ncp_object import upload_to_ncp # ncp_object.py에서 업로드 함수 가져오기
+import zipfile
+import io
+import hashlib
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.storage import get_storage, object_key # 모델 서버와 함께 쓰는 스토리지 계층
+from common.metrics import Counter, Gauge, track_stage, record_error, render_metrics, CONTENT_TYPE
+from verdict_cache import VerdictCache, hash_content
+from task_store import create_task_store
+from task_events import TaskEvents, TERMINAL_STATUSES
+from results_db import create_results_recorder
+from ttl_cache import AsyncTTLCache
+from admission import AdmissionQueue, QueueFull
+from worker_pool import WorkerPool, NoWorkerAvailable
+
+# 업로드 파일 저장소 (STORAGE_BACKEND=s3 | local | memory)
+storage = get_storage()
+# 작업 상태 저장소 (TASK_STORE=memory | sqlite)
+task_store = create_task_store()
+# 작업 상태 변경 알림 (SSE / long-polling 대기자를 즉시 깨움)
+task_events = TaskEvents()
+# 판별 결과 영구 저장소 (RESULTS_DB_URL, 버퍼에 모아 백그라운드에서 기록하고 시간/일 단위 집계 갱신)
+results_recorder = create_results_recorder()
+
+# 다른 중개 서버 프로세스가 바꾼 상태는 알림이 오지 않으므로, 대기 중에도 이 간격으로 저장소를 다시 확인
+TASK_EVENT_POLL_SECONDS = float(os.getenv("TASK_EVENT_POLL_SECONDS", "1.0"))
+# long-polling 최대 대기 시간 / SSE 연결 유지용 heartbeat 간격 (초)
+MAX_STATUS_WAIT_SECONDS = 60
+SSE_HEARTBEAT_SECONDS = 15
+
+# Worker 서버 주소 목록 (쉼표로 구분, 주소만 추가하면 처리량이 늘어남)
+#   WORKER_BASE_URLS=http://10.0.0.6:8001,http://10.0.0.7:8001
+# 예전 설정(WORKER_BASE_URL 하나)도 그대로 동작합니다.
+WORKER_BASE_URLS = [url.strip() for url in os.getenv(
+    "WORKER_BASE_URLS", os.getenv("WORKER_BASE_URL", "http://10.0.0.6:8001")).split(",") if url.strip()]
+# Worker API 엔드포인트 경로
+WORKER_OBJECT_PATH = "/process-object/"
+WORKER_BATCH_PATH = "/process-objects/"
+WORKER_VIDEO_PATH = "/process-video/"
+WORKER_BYTES_PATH = "/process-bytes/"
+WORKER_TIMEOUT_SECONDS = 300
+# Worker 상태 검사(/readyz) 간격 / 한 작업을 시도할 최대 Worker 수 (실패하면 다른 Worker로 재시도)
+WORKER_PROBE_INTERVAL_SECONDS = float(os.getenv("WORKER_PROBE_INTERVAL_SECONDS", "5"))
+WORKER_MAX_ATTEMPTS = int(os.getenv("WORKER_MAX_ATTEMPTS", "3"))
+# 이 상태 코드와 연결 실패는 Worker 쪽 문제(준비 안 됨, 과부하, 꺼짐)로 보고 다른 Worker에서 다시 시도
+# (응답 대기 시간 초과처럼 요청이 이미 Worker에 전달되었을 수 있는 오류는 같은 작업을 두 번 돌리지 않도록 재시도하지 않음)
+WORKER_RETRY_STATUS_CODES = (502, 503, 504)
+WORKER_RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+# 이미지 전달 방식
+#   object : 스토리지에 올린 뒤 Worker가 키로 내려받아 처리 (기본값)
+#   direct : 이미지 바이트를 Worker에 바로 보내 처리하고, 스토리지 보관 업로드는 동시에 따로 진행
+#            (Worker와 같은 사설망에 있을 때 스토리지 왕복 두 번을 응답 경로에서 뺄 수 있음)
+TRANSPORT_MODE = os.getenv("TRANSPORT_MODE", "object")
+
+# 일괄 업로드 설정: 한 번에 받을 최대 이미지 수 / Worker에 한 번에 보낼 이미지 수
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "500"))
+WORKER_BATCH_CHUNK_SIZE = int(os.getenv("WORKER_BATCH_CHUNK_SIZE", "32"))
+# 일괄 업로드 한 번의 전체 크기 상한: 받은 파일 크기 합과 zip 압축 해제 후 크기 합 모두 이 값 이하 (넘으면 413)
+MAX_BATCH_BYTES = int(os.getenv("MAX_BATCH_BYTES", str(512 * 1024 * 1024)))
+# zip 압축 해제 후 전체 크기 상한 (압축 폭탄 방지)
+MAX_ZIP_UNCOMPRESSED_BYTES = int(os.getenv("MAX_ZIP_UNCOMPRESSED_BYTES", str(1024 * 1024 * 1024)))
+# 일괄 업로드 파일을 읽는 단위
+BATCH_READ_CHUNK_SIZE = 1024 * 1024
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm")
+
+# 동시에 Worker에 보내는(응답을 기다리는) 요청 수 상한 (기본: Worker당 32)
+MAX_INFLIGHT_WORKER_CALLS = int(os.getenv("MAX_INFLIGHT_WORKER_CALLS", str(32 * len(WORKER_BASE_URLS))))
+# 작업 접수 대기열: 대기 작업(이미지) 수 상한 / 클라이언트별 상한 / 동시에 실행하는 작업 수
+# (상한을 넘으면 기다리게 하지 않고 429 + Retry-After로 바로 거절)
+ADMISSION_QUEUE_DEPTH = int(os.getenv("ADMISSION_QUEUE_DEPTH", "2000"))
+ADMISSION_MAX_PER_CLIENT = int(os.getenv("ADMISSION_MAX_PER_CLIENT", str(MAX_BATCH_ITEMS)))
+ADMISSION_CONCURRENCY = int(os.getenv("ADMISSION_CONCURRENCY", str(MAX_INFLIGHT_WORKER_CALLS)))
+# 스토리지(boto3) 호출 전용 스레드 수: FastAPI 기본 스레드풀과 분리
+STORAGE_MAX_WORKERS = int(os.getenv("STORAGE_MAX_WORKERS", "16"))
+
+# 큰 파일 업로드 설정: 이 크기를 넘으면 파트 단위로 나눠 동시에 업로드
+# (요청당 메모리 사용량은 최대 파트 크기 x 동시 파트 수)
+MULTIPART_THRESHOLD = int(os.getenv("MULTIPART_THRESHOLD", str(8 * 1024 * 1024)))
+MULTIPART_PART_SIZE = int(os.getenv("MULTIPART_PART_SIZE", str(8 * 1024 * 1024)))
+MULTIPART_CONCURRENCY = int(os.getenv("MULTIPART_CONCURRENCY", "4"))
+
+# 판별 결과 캐시 설정: 같은 이미지가 다시 올라오면 저장소/Worker를 거치지 않고 바로 응답
+# MODEL_ID는 Worker가 응답하는 모델 ID(엔진/2단계 추론 설정 포함, Worker /readyz의 model_id)와 같게 설정합니다.
+# 이 값이 바뀐 채로 서버가 시작되면 이전 모델의 캐시를 지웁니다.
+MODEL_ID = os.getenv("MODEL_ID", "prithivMLmods/Deep-Fake-Detector-v2-Model")
+verdict_cache = VerdictCache(
+    db_path=os.getenv("VERDICT_CACHE_PATH", "verdict_cache.db"),
+    max_entries=int(os.getenv("VERDICT_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=float(os.getenv("VERDICT_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    model_id=MODEL_ID,
+    max_disk_entries=int(os.getenv("VERDICT_CACHE_MAX_DISK_ENTRIES", "100000")),
+)
+# MODEL_ID와 다른 모델로 응답한 Worker의 모델 ID (경고를 한 번만 남기기 위함)
+unexpected_model_ids = set()
+
+# 서버 수명 동안 재사용하는 Worker용 keep-alive HTTP 클라이언트와 동시 호출 제한
+worker_client: httpx.AsyncClient = None
+# YouTube API 호출용 keep-alive HTTP 클라이언트 (요청마다 새 연결을 만들지 않음)
+youtube_client: httpx.AsyncClient = None
+worker_slots = asyncio.Semaphore(MAX_INFLIGHT_WORKER_CALLS)
+storage_executor = ThreadPoolExecutor(max_workers=STORAGE_MAX_WORKERS, thread_name_prefix="storage")
+# 단건 업로드(interactive)를 일괄 작업(bulk)보다 먼저, 같은 우선순위에서는 클라이언트끼리 번갈아 처리
+admission = AdmissionQueue(max_depth=ADMISSION_QUEUE_DEPTH, max_per_client=ADMISSION_MAX_PER_CLIENT,
+                           concurrency=ADMISSION_CONCURRENCY)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """서버 시작 시 공용 HTTP 클라이언트를 만들고, 종료 시 연결을 정리합니다."""
+    global worker_client, youtube_client
+    worker_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(WORKER_TIMEOUT_SECONDS, connect=5.0),
+        limits=httpx.Limits(max_connections=MAX_INFLIGHT_WORKER_CALLS,
+                            max_keepalive_connections=MAX_INFLIGHT_WORKER_CALLS),
+    )
+    youtube_client = httpx.AsyncClient(timeout=httpx.Timeout(YOUTUBE_TIMEOUT_SECONDS, connect=5.0))
+    worker_pool.start(worker_client)
+    admission.start()
+    yield
+    await admission.close()
+    await worker_pool.close()
+    await worker_client.aclose()
+    await youtube_client.aclose()
+    storage_executor.shutdown(wait=False)
+    task_store.close()
+    results_recorder.close()
+
+app = FastAPI(lifespan=lifespan)
+
+# 중개 서버 지표 (/metrics)
+TASKS_IN_FLIGHT = Gauge("trufy_tasks_in_flight", "처리 중인 작업 수")
+TASKS_FINISHED = Counter("trufy_tasks_finished_total", "끝난 작업 수", ("status",))
+WORKER_CALLS_QUEUED = Gauge("trufy_worker_calls_queued", "동시 호출 상한 때문에 차례를 기다리는 Worker 호출 수")
+WORKER_CALLS_IN_FLIGHT = Gauge("trufy_worker_calls_in_flight", "응답을 기다리는 Worker 호출 수")
+ADMISSION_QUEUED = Gauge("trufy_admission_queued", "접수 대기열에서 차례를 기다리는 작업(이미지) 수")
+ADMISSION_QUEUED.set_function(admission.depth)
+ADMISSION_REJECTED = Counter("trufy_admission_rejected_total", "대기열이 가득 차 거절한 요청 수", ("priority",))
+WORKER_OUTSTANDING = Gauge("trufy_worker_outstanding", "Worker별 응답을 기다리는 요청 수", ("worker",))
+WORKER_READY = Gauge("trufy_worker_ready", "Worker별 요청을 받을 수 있는지 (1/0)", ("worker",))
+WORKER_RETRIES = Counter("trufy_worker_retries_total", "실패해서 다른 Worker로 다시 보낸 요청 수", ("worker",))
+
+def record_worker_state(worker):
+    WORKER_OUTSTANDING.set(worker.outstanding, worker=worker.base_url)
+    WORKER_READY.set(1 if worker.ready else 0, worker=worker.base_url)
+
+# Worker 풀: 상태 검사로 준비된 Worker만, 그중 처리 중인 요청이 가장 적은 곳으로 보냄
+worker_pool = WorkerPool(WORKER_BASE_URLS, probe_interval=WORKER_PROBE_INTERVAL_SECONDS,
+                         on_change=record_worker_state)
+for worker in worker_pool.workers:
+    record_worker_state(worker)
 
-app = FastAPI()
-tasks_db = {}
+def client_id_of(request: Request) -> str:
+    """공정 분배 단위가 되는 클라이언트 ID (X-Client-ID 헤더, 없으면 접속 IP)"""
+    return request.headers.get("X-Client-ID") or (request.client.host if request.client else "unknown")
+
+def reject_request(error: QueueFull, priority: str) -> JSONResponse:
+    """대기열이 가득 찼을 때의 응답: 기다리게 하지 않고 429와 다시 시도할 시간을 알려줍니다."""
+    ADMISSION_REJECTED.inc(priority=priority)
+    return JSONResponse(status_code=429, headers={"Retry-After": str(error.retry_after)},
+                        content={"error": error.reason, "retry_after": error.retry_after})
+
+@asynccontextmanager
+async def worker_call_slot():
+    """Worker 동시 호출 자리를 얻어 호출하는 동안 유지합니다. (대기/호출 중 수를 지표에 기록)"""
+    WORKER_CALLS_QUEUED.inc()
+    try:
+        await worker_slots.acquire()
+    finally:
+        WORKER_CALLS_QUEUED.dec()
+    WORKER_CALLS_IN_FLIGHT.inc()
+    try:
+        yield
+    finally:
+        WORKER_CALLS_IN_FLIGHT.dec()
+        worker_slots.release()
+
+async def post_to_worker(path: str, **kwargs) -> httpx.Response:
+    """
+    처리 중인 요청이 가장 적은 Worker에 POST 요청을 보냅니다.
+
+    연결 실패나 준비 안 됨/과부하(502, 503, 504)면 그 Worker를 빼고 다른 Worker로
+    최대 WORKER_MAX_ATTEMPTS번까지 다시 보냅니다. 그 밖의 오류(응답 시간 초과 등)는 다시 보내지 않고 그대로 올립니다.
+    보낼 수 있는 Worker가 남지 않았으면 NoWorkerAvailable을 일으킵니다.
+    """
+    tried, response, error = [], None, None
+    for attempt in range(WORKER_MAX_ATTEMPTS):
+        try:
+            async with worker_pool.lease(exclude=tuple(tried)) as worker:
+                tried.append(worker)
+                response = await worker_client.post(f"{worker.base_url}{path}", **kwargs)
+        except NoWorkerAvailable:
+            break
+        except WORKER_RETRY_ERRORS as e:
+            error, response = repr(e), None
+        else:
+            if response.status_code not in WORKER_RETRY_STATUS_CODES:
+                return response
+            error = f"HTTP {response.status_code}"
+        worker_pool.mark_failed(worker, error)
+        print(f"⚠️ Worker 호출 실패 ({attempt + 1}/{WORKER_MAX_ATTEMPTS}): {worker.base_url}{path} - {error}")
+        if attempt + 1 < WORKER_MAX_ATTEMPTS and len(tried) < len(worker_pool.workers):
+            WORKER_RETRIES.inc(worker=worker.base_url)
+    if response is not None:
+        return response
+    raise NoWorkerAvailable(f"요청을 받을 준비된 Worker가 없습니다. (시도한 Worker {len(tried)}곳, 마지막 오류: {error})")
+
+async def run_storage_call(func, *args, **kwargs):
+    """동기 스토리지 함수를 전용 스레드에서 실행해 이벤트 루프를 막지 않습니다."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(storage_executor, lambda: func(*args, **kwargs))
+
+def create_task(task_id: str, record: dict):
+    """작업을 등록합니다. 처리 중 상태로 시작하는 작업은 처리 중 작업 수에 더합니다."""
+    task_store.create(task_id, record)
+    if record["status"] == "processing":
+        TASKS_IN_FLIGHT.inc()
+
+def update_task(task_id: str, content_hash: str = None, filename: str = None, **fields):
+    """작업 상태를 저장하고, 기다리는 요청들에게 변경을 알립니다. 끝난 작업은 결과 저장소에도 기록합니다."""
+    task_store.update(task_id, **fields)
+    task_events.notify(task_id)
+    if fields.get("status") in TERMINAL_STATUSES:
+        # 일괄 작업의 항목이 끝나면 일괄 진행률을 기다리는 요청도 깨웁니다.
+        batch_id = (task_store.get(task_id) or {}).get("batch_id")
+        if batch_id:
+            task_events.notify(f"batch:{batch_id}")
+        TASKS_IN_FLIGHT.dec()
+        TASKS_FINISHED.inc(status=fields["status"])
+        results_recorder.record(task_id, fields["status"], fields.get("result") or {}, content_hash, filename)
+
+def create_cached_task(task_id: str, cached_result: dict, content_hash: str, filename: str, **extra):
+    """캐시된 판별 결과로 바로 완료된 작업을 등록하고 결과 저장소에 기록합니다."""
+    result = {**cached_result, "cached": True}
+    task_store.create(task_id, {"status": "completed", "result": result, **extra})
+    results_recorder.record(task_id, "completed", result, content_hash, filename)
+
+async def wait_for_task_change(task_id: str, previous: dict, timeout: float):
+    """작업 레코드가 previous와 달라지거나 timeout이 지날 때까지 기다려 최신 레코드를 반환합니다."""
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return previous
+        await task_events.wait(task_id, min(remaining, TASK_EVENT_POLL_SECONDS))
+        task = task_store.get(task_id)
+        if task != previous:
+            return task
+
+async def upload_item(task_id: str, file_content: bytes, key: str, timings: dict = None) -> bool:
+    """스토리지에 파일을 업로드합니다. 실패하면 작업을 실패 처리합니다."""
+    try:
+        with track_stage("upload", timings):
+            await run_storage_call(storage.put, key, file_content, public=True)
+    except Exception as e:
+        print(f"❌ 스토리지 업로드 실패: {key} [{task_id}] - {e}")
+        update_task(task_id, status='failed', result={'error': '스토리지 업로드 실패'})
+        return False
+    print(f"✅ 업로드 성공: {key}")
+    return True
 
-# Worker 서버의 새 API 엔드포인트 주소
-WORKER_API_URL = "http://10.0.0.6:8001/process-object/"
+async def complete_task(task_id: str, content_hash: str, key: str, result: dict, timings: dict = None,
+                        filename: str = None):
+    """
+    Worker의 판별 결과로 작업을 완료 처리하고, 정상 결과는 캐시에 저장합니다.
 
-def upload_and_signal_worker(task_id: str, file_content: bytes, filename: str):
-    """NCP에 업로드하고 Worker 서버에 신호를 보내는 백그라운드 함수"""
-    # 1. NCP Object Storage에 파일 업로드
-    if not upload_to_ncp(file_bytes=file_content, object_name=filename):
-        tasks_db[task_id]['status'] = 'failed'
-        tasks_db[task_id]['result'] = {'error': 'NCP Object Storage 업로드 실패'}
+    key가 None이면(원본 보관 실패) storage_key 없이 기록/캐시하고, 파일 이름은 filename을 씁니다.
+    """
+    if key is None:
+        result.pop('storage_key', None)
+    else:
+        result['storage_key'] = key
+    # 중개 서버 단계(upload, worker_signal)와 Worker 단계별 시간을 한 곳에 모읍니다.
+    result['timings'] = {**(timings or {}), **result.get('timings', {})}
+    update_task(task_id, content_hash=content_hash, filename=filename or os.path.basename(key), status='completed',
+                result=result)
+    # 정상 판별 결과만 판별한 Worker의 모델 ID로 캐시 (작업별 값은 제외)
+    # 조회는 설정된 MODEL_ID로만 하므로, 다른 모델을 쓰는 Worker의 결과는 저장돼도 다른 모델 결과로 쓰이지 않습니다.
+    if 'error' not in result:
+        model_id = result.get('model_id') or MODEL_ID
+        if model_id != MODEL_ID and model_id not in unexpected_model_ids:
+            unexpected_model_ids.add(model_id)
+            print(f"⚠️ 설정된 MODEL_ID({MODEL_ID})와 다른 모델의 Worker 응답: {model_id} (이 결과는 캐시 조회에 쓰이지 않음)")
+        cached = {name: value for name, value in result.items() if name not in ('timings', 'task_id')}
+        await run_storage_call(verdict_cache.put, content_hash, cached, model_id)
+
+async def stream_upload(file: UploadFile, key: str, first_chunk: bytes) -> str:
+    """
+    업로드된 파일을 파트 단위로 읽으면서 스토리지에 멀티파트로 동시에 올리고, 그동안 콘텐츠 해시를 계산합니다.
+
+    파일 전체를 메모리에 올리지 않으며, 동시에 메모리에 있는 파트는 MULTIPART_CONCURRENCY개 이하입니다.
+
+    Returns:
+        str: 파일 내용의 SHA-256 해시 (업로드 실패 시 예외)
+    """
+    upload_id = await run_storage_call(storage.create_multipart_upload, key, public=True)
+
+    hasher = hashlib.sha256()
+    slots = asyncio.Semaphore(MULTIPART_CONCURRENCY)
+    etags = {}
+
+    async def send_part(part_number: int, part_bytes: bytes):
+        try:
+            etags[part_number] = await run_storage_call(storage.upload_part, key, upload_id, part_number, part_bytes)
+        finally:
+            slots.release()
+
+    part_tasks = []
+    try:
+        buffer, part_number = first_chunk, 0
+        while buffer:
+            # 파트를 읽기 전에 자리를 먼저 확보해서 메모리에 쌓이는 파트 수를 제한
+            await slots.acquire()
+            if len(buffer) < MULTIPART_PART_SIZE:
+                buffer += await file.read(MULTIPART_PART_SIZE - len(buffer))
+            part, buffer = buffer[:MULTIPART_PART_SIZE], buffer[MULTIPART_PART_SIZE:]
+            if not part:
+                slots.release()
+                break
+            hasher.update(part)
+            part_number += 1
+            part_tasks.append(asyncio.create_task(send_part(part_number, part)))
+            if not buffer:
+                buffer = await file.read(MULTIPART_PART_SIZE)
+        await asyncio.gather(*part_tasks)
+        await run_storage_call(storage.complete_multipart_upload, key, upload_id,
+                               [etags[number] for number in sorted(etags)])
+    except BaseException:
+        for task in part_tasks:
+            task.cancel()
+        await run_storage_call(storage.abort_multipart_upload, key, upload_id)
+        raise
+    return hasher.hexdigest()
+
+async def upload_and_signal_worker(task_id: str, file_content: bytes, filename: str, key: str,
+                                   content_hash: str, worker_path: str = WORKER_OBJECT_PATH):
+    """스토리지에 업로드하고 Worker 서버에 신호를 보내는 백그라운드 함수"""
+    timings = {}
+    # 1. 스토리지에 파일 업로드
+    if not await upload_item(task_id, file_content, key, timings):
         return
 
-    # 2. Worker 서버에 파일 이름(object_name)을 담아 처리 신호 전송
+    # 2. Worker 서버에 파일 이름과 저장소 키를 담아 처리 신호 전송
+    await signal_worker(task_id, filename, key, content_hash, worker_path, timings)
+
+async def upload_and_send_bytes_to_worker(task_id: str, file_content: bytes, filename: str, key: str,
+                                          content_hash: str):
+    """
+    direct 모드: 이미지 바이트를 Worker에 바로 보내 처리하고, 스토리지 보관 업로드는 동시에 진행하는 백그라운드 함수
+
+    보관 업로드가 끝난 뒤에 작업을 완료 처리하며, 보관에 실패했으면 없는 객체를 가리키지 않도록 storage_key를 남기지 않습니다.
+    """
+    archive = asyncio.create_task(archive_item(file_content, key))
+    timings = {}
     try:
-        # 파일 내용 대신 JSON 데이터 전송
-        response = requests.post(WORKER_API_URL, json={"object_name": filename}, timeout=300)
+        async with worker_call_slot():
+            with track_stage("worker_signal", timings):
+                response = await post_to_worker(
+                    WORKER_BYTES_PATH, content=file_content, params={"object_name": filename},
+                    headers={"Content-Type": "application/octet-stream", "X-Task-ID": task_id},
+                )
+
+        archived = await archive
+        if response.status_code == 200:
+            await complete_task(task_id, content_hash, key if archived else None, response.json(), timings,
+                                filename=filename)
+        else:
+            record_error("worker_signal")
+            update_task(task_id, status='failed', result={'error': f"Worker 서버 오류: {response.text}"})
+    except Exception as e:
+        update_task(task_id, status='failed', result={'error': str(e)})
+    finally:
+        await archive
+
+async def archive_item(file_content: bytes, key: str) -> bool:
+    """판별 결과와 관계없이 원본을 스토리지에 보관하고 성공 여부를 반환합니다. (direct 모드, 실패해도 작업 상태는 바꾸지 않음)"""
+    try:
+        with track_stage("upload"):
+            await run_storage_call(storage.put, key, file_content, public=True)
+    except Exception as e:
+        print(f"❌ 보관 업로드 실패: {key} - {e}")
+        return False
+    print(f"✅ 보관 업로드 성공: {key}")
+    return True
+
+async def signal_worker(task_id: str, filename: str, key: str, content_hash: str,
+                        worker_path: str = WORKER_OBJECT_PATH, timings: dict = None):
+    """이미 업로드된 파일의 키를 Worker 서버에 보내 처리하게 하는 백그라운드 함수"""
+    timings = {} if timings is None else timings
+    try:
+        # 파일 내용 대신 JSON 데이터 전송 (동시에 기다리는 Worker 호출 수는 상한 이내로 제한)
+        # 업로드할 때 만든 키를 그대로 보내 자정을 넘겨도 같은 객체를 가리키게 합니다.
+        # X-Task-ID 헤더로 작업 ID를 넘겨 Worker 로그/결과와 이어 볼 수 있게 합니다.
+        async with worker_call_slot():
+            with track_stage("worker_signal", timings):
+                response = await post_to_worker(worker_path, json={"object_name": filename, "object_key": key},
+                                                headers={"X-Task-ID": task_id})
         
         if response.status_code == 200:
-            tasks_db[task_id]['status'] = 'completed'
-            tasks_db[task_id]['result'] = response.json()
+            await complete_task(task_id, content_hash, key, response.json(), timings)
+        else:
+            record_error("worker_signal")
+            update_task(task_id, status='failed', result={'error': f"Worker 서버 오류: {response.text}"})
+    except Exception as e:
+        update_task(task_id, status='failed', result={'error': str(e)})
+
+async def signal_worker_batch(items: list):
+    """업로드된 여러 파일을 Worker에 한 번의 요청으로 보내고 결과를 작업별로 나눠 기록합니다."""
+    timings = {}
+    try:
+        async with worker_call_slot():
+            with track_stage("worker_signal", timings):
+                response = await post_to_worker(
+                    WORKER_BATCH_PATH,
+                    json={"files": [{"object_name": item["object_name"], "object_key": item["object_key"],
+                                     "task_id": item["task_id"]} for item in items]}
+                )
+        if response.status_code == 200:
+            for item, result in zip(items, response.json()["results"]):
+                await complete_task(item["task_id"], item["content_hash"], item["object_key"], result,
+                                    {**item["timings"], **timings})
         else:
-            tasks_db[task_id]['status'] = 'failed'
-            tasks_db[task_id]['result'] = {'error': f"Worker 서버 오류: {response.text}"}
+            record_error("worker_signal")
+            for item in items:
+                update_task(item["task_id"], status='failed', result={'error': f"Worker 서버 오류: {response.text}"})
     except Exception as e:
-        tasks_db[task_id]['status'] = 'failed'
-        tasks_db[task_id]['result'] = {'error': str(e)}
+        for item in items:
+            update_task(item["task_id"], status='failed', result={'error': str(e)})
+
+async def process_batch(items: list):
+    """일괄 업로드 백그라운드 함수: 모든 파일을 동시에 업로드한 뒤 묶음 단위로 Worker에 보냅니다."""
+    upload_timings = {}
+    with track_stage("upload", upload_timings):
+        uploaded = await run_storage_call(
+            storage.put_many, [(item["object_key"], item.pop("file_content")) for item in items], public=True
+        )
+    ready = []
+    for item, ok in zip(items, uploaded):
+        if ok:
+            item["timings"] = upload_timings
+            ready.append(item)
+        else:
+            record_error("upload")
+            update_task(item["task_id"], status='failed', result={'error': '스토리지 업로드 실패'})
+    chunks = [ready[i:i + WORKER_BATCH_CHUNK_SIZE] for i in range(0, len(ready), WORKER_BATCH_CHUNK_SIZE)]
+    await asyncio.gather(*[signal_worker_batch(chunk) for chunk in chunks])
+
+class BatchTooLarge(ValueError):
+    """일괄 업로드가 개수 또는 크기 상한을 넘었을 때 (413으로 응답)"""
+
+def too_many_items() -> BatchTooLarge:
+    return BatchTooLarge(f"한 번에 최대 {MAX_BATCH_ITEMS}개까지 분석할 수 있습니다.")
+
+async def read_batch_uploads(files: list) -> list:
+    """
+    일괄 업로드 파일들을 조금씩 읽어 (파일 이름, 내용) 목록으로 반환합니다.
+
+    파일 수가 MAX_BATCH_ITEMS를 넘거나 읽은 크기 합이 MAX_BATCH_BYTES를 넘는 순간 BatchTooLarge를 냅니다.
+    """
+    if len(files) > MAX_BATCH_ITEMS:
+        raise too_many_items()
+    uploads, total = [], 0
+    for file in files:
+        chunks = []
+        while chunk := await file.read(BATCH_READ_CHUNK_SIZE):
+            total += len(chunk)
+            if total > MAX_BATCH_BYTES:
+                raise BatchTooLarge(f"한 번에 올릴 수 있는 전체 크기({MAX_BATCH_BYTES} bytes)를 넘었습니다.")
+            chunks.append(chunk)
+        uploads.append((file.filename, b"".join(chunks)))
+    return uploads
+
+def extract_batch_files(uploads: list) -> list:
+    """
+    업로드된 파일 목록을 (파일 이름, 내용) 목록으로 펼칩니다.
+
+    zip 파일은 안의 이미지 파일들을 꺼냅니다. 꺼낸 항목까지 센 개수가 MAX_BATCH_ITEMS를 넘거나
+    압축 해제 크기가 상한(zip별 MAX_ZIP_UNCOMPRESSED_BYTES, 전체 MAX_BATCH_BYTES)을 넘으면
+    압축을 풀기 전에 BatchTooLarge를 냅니다.
+    """
+    files, total = [], 0
+    for filename, content in uploads:
+        if not filename.lower().endswith(".zip"):
+            if len(files) + 1 > MAX_BATCH_ITEMS:
+                raise too_many_items()
+            total += len(content)
+            files.append((filename, content))
+            continue
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            entries = [info for info in archive.infolist()
+                       if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS)
+                       and not os.path.basename(info.filename).startswith(".")]
+            if len(files) + len(entries) > MAX_BATCH_ITEMS:
+                raise too_many_items()
+            # 압축 해제 크기는 헤더의 file_size 합으로 미리 확인 (읽을 때도 file_size까지만 풀림)
+            unpacked = sum(info.file_size for info in entries)
+            if unpacked > MAX_ZIP_UNCOMPRESSED_BYTES:
+                raise BatchTooLarge(f"압축 해제 크기가 너무 큽니다: {filename}")
+            total += unpacked
+            if total > MAX_BATCH_BYTES:
+                raise BatchTooLarge(f"압축 해제 후 전체 크기가 상한({MAX_BATCH_BYTES} bytes)을 넘었습니다.")
+            for info in entries:
+                files.append((os.path.basename(info.filename), archive.read(info)))
+    return files
 
 @app.post("/upload/")
-async def upload_file(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
-    """Streamlit에서 파일을 받아 백그라운드 작업을 시작"""
+async def upload_file(request: Request, file: UploadFile = File(...)):
+    """Streamlit에서 파일을 받아 접수 대기열에 넣습니다. (대기열이 가득 차면 429)"""
     task_id = str(uuid.uuid4())
-    tasks_db[task_id] = {"status": "processing", "result": None}
-    file_content = await file.read()
-    background_tasks.add_task(upload_and_signal_worker, task_id, file_content, file.filename)
+    client_id = client_id_of(request)
+    # 저장소 키는 요청마다 한 번만 만들어 업로드/Worker/결과에 같은 값을 사용
+    # (같은 이름의 파일을 동시에 올려도 서로 덮어쓰지 않도록 작업 ID를 붙임)
+    key = object_key(f"{task_id}_{file.filename}")
+    # 영상은 프레임 샘플링 분석을 하는 Worker 엔드포인트로 보냅니다.
+    worker_path = WORKER_VIDEO_PATH if file.filename.lower().endswith(VIDEO_EXTENSIONS) else WORKER_OBJECT_PATH
+
+    # 임계값을 넘는 큰 파일(영상 등)은 전체를 메모리에 올리지 않고 파트 단위로 스트리밍 업로드
+    first_chunk = await file.read(MULTIPART_THRESHOLD + 1)
+    if len(first_chunk) > MULTIPART_THRESHOLD:
+        # 큰 파일은 업로드에 시간이 걸리므로 받을 수 없는 요청은 업로드 전에 거절
+        try:
+            admission.check(client_id)
+        except QueueFull as e:
+            return reject_request(e, "interactive")
+        create_task(task_id, {"status": "processing", "result": None})
+        timings = {}
+        try:
+            with track_stage("upload", timings):
+                content_hash = await stream_upload(file, key, first_chunk)
+        except Exception as e:
+            print(f"❌ 스토리지 멀티파트 업로드 실패: {e}")
+            update_task(task_id, status='failed', result={'error': '스토리지 업로드 실패'})
+            return {"task_id": task_id, "message": "파일 업로드에 실패했습니다."}
+        del first_chunk
+
+        cached_result = await run_storage_call(verdict_cache.get, content_hash)
+        if cached_result is not None:
+            update_task(task_id, content_hash=content_hash, filename=file.filename,
+                        status='completed', result={**cached_result, "cached": True})
+            return {"task_id": task_id, "message": "이전에 분석된 파일입니다. 캐시된 결과를 반환합니다."}
+        try:
+            admission.submit([task_id], client_id, "interactive",
+                             functools.partial(signal_worker, task_id, file.filename, key, content_hash, worker_path,
+                                               timings))
+        except QueueFull as e:
+            update_task(task_id, status='failed', result={'error': e.reason})
+            return reject_request(e, "interactive")
+        return {"task_id": task_id, "message": "파일 업로드 성공. 처리를 시작합니다."}
+
+    file_content = first_chunk
+
+    # 같은 이미지의 판별 결과가 캐시에 있으면 즉시 완료 처리
+    content_hash = hash_content(file_content)
+    cached_result = await run_storage_call(verdict_cache.get, content_hash)
+    if cached_result is not None:
+        create_cached_task(task_id, cached_result, content_hash, file.filename)
+        return {"task_id": task_id, "message": "이전에 분석된 이미지입니다. 캐시된 결과를 반환합니다."}
+
+    if TRANSPORT_MODE == "direct" and worker_path == WORKER_OBJECT_PATH:
+        job = functools.partial(upload_and_send_bytes_to_worker, task_id, file_content, file.filename, key,
+                                content_hash)
+    else:
+        job = functools.partial(upload_and_signal_worker, task_id, file_content, file.filename, key,
+                                content_hash, worker_path)
+    try:
+        admission.check(client_id)
+    except QueueFull as e:
+        return reject_request(e, "interactive")
+    create_task(task_id, {"status": "processing", "result": None})
+    admission.submit([task_id], client_id, "interactive", job)
     return {"task_id": task_id, "message": "파일 업로드 성공. 처리를 시작합니다."}
 
+@app.post("/upload-batch/")
+async def upload_batch(request: Request, files: list[UploadFile] = File(...)):
+    """
+    여러 이미지 또는 zip 파일을 한 번에 받아 일괄 분석 대기열에 넣습니다.
+
+    대기열이 가득 차면 429, 파일 수(zip 안의 이미지 포함)나 전체 크기가 상한을 넘으면 413으로 응답합니다.
+    """
+    try:
+        uploads = await read_batch_uploads(files)
+        batch_files = await asyncio.to_thread(extract_batch_files, uploads)
+    except BatchTooLarge as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
+    except (ValueError, zipfile.BadZipFile) as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    if not batch_files:
+        return JSONResponse(status_code=400, content={"error": "분석할 이미지가 없습니다."})
+
+    # 캐시에 없는 이미지만 대기열 자리를 차지하므로 먼저 확인하고, 받을 수 없으면 작업을 만들기 전에 거절
+    client_id = client_id_of(request)
+    content_hashes = [hash_content(file_content) for _, file_content in batch_files]
+    lookups = list(zip(content_hashes, await run_storage_call(verdict_cache.get_many, content_hashes)))
+    try:
+        admission.check(client_id, sum(1 for _, cached_result in lookups if cached_result is None))
+    except QueueFull as e:
+        return reject_request(e, "bulk")
+
+    batch_id = str(uuid.uuid4())
+    tasks, pending_items = [], []
+    for index, ((filename, file_content), (content_hash, cached_result)) in enumerate(zip(batch_files, lookups)):
+        task_id = str(uuid.uuid4())
+        tasks.append({"task_id": task_id, "filename": filename})
+
+        if cached_result is not None:
+            create_cached_task(task_id, cached_result, content_hash, filename, batch_id=batch_id)
+            continue
+
+        create_task(task_id, {"status": "processing", "result": None, "batch_id": batch_id})
+        # zip 안의 같은 이름 파일끼리 겹치지 않도록 객체 이름에 배치 ID와 순번을 붙입니다.
+        object_name = f"{batch_id}_{index}_{filename}"
+        pending_items.append({
+            "task_id": task_id,
+            "object_name": object_name,
+            "object_key": object_key(object_name),
+            "content_hash": content_hash,
+            "file_content": file_content,
+        })
+
+    task_store.create(f"batch:{batch_id}", {"batch_id": batch_id, "tasks": tasks})
+    # Worker 묶음 단위로 나눠 넣어 다른 클라이언트의 일괄 작업과 번갈아 처리되게 합니다.
+    for i in range(0, len(pending_items), WORKER_BATCH_CHUNK_SIZE):
+        chunk = pending_items[i:i + WORKER_BATCH_CHUNK_SIZE]
+        admission.submit([item["task_id"] for item in chunk], client_id, "bulk",
+                         functools.partial(process_batch, chunk))
+    return {"batch_id": batch_id, "tasks": tasks,
+            "message": f"{len(tasks)}개 이미지 업로드 성공. 일괄 처리를 시작합니다."}
+
+@app.get("/batch/{batch_id}")
+async def get_batch_status(batch_id: str, wait: float = Query(0, ge=0, le=MAX_STATUS_WAIT_SECONDS)):
+    """
+    일괄 작업의 전체 진행률과 항목별 상태 확인 API
+
+    wait > 0이면 끝난 항목 수가 바뀌거나 일괄 작업이 끝날 때까지 최대 wait초 기다렸다가 응답합니다. (long-polling)
+    """
+    batch = task_store.get(f"batch:{batch_id}")
+    if not batch:
+        return JSONResponse(status_code=404, content={"status": "not_found"})
+    summary = summarize_batch(batch_id, batch)
+    if wait > 0 and summary["status"] != "completed":
+        summary = await wait_for_batch_change(batch_id, batch, summary, wait)
+    return summary
+
+async def wait_for_batch_change(batch_id: str, batch: dict, previous: dict, timeout: float) -> dict:
+    """끝난 항목 수가 previous와 달라지거나 timeout이 지날 때까지 기다려 최신 진행 상황을 반환합니다."""
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return previous
+        await task_events.wait(f"batch:{batch_id}", min(remaining, TASK_EVENT_POLL_SECONDS))
+        summary = summarize_batch(batch_id, batch)
+        if (summary["completed"], summary["failed"]) != (previous["completed"], previous["failed"]):
+            return summary
+
+def summarize_batch(batch_id: str, batch: dict) -> dict:
+    """일괄 작업 레코드로 전체 진행률과 항목별 상태를 모읍니다."""
+    items, counts = [], {"completed": 0, "failed": 0, "processing": 0}
+    for entry in batch["tasks"]:
+        task = task_store.get(entry["task_id"]) or {"status": "failed", "result": {"error": "작업 정보가 만료되었습니다."}}
+        counts[task["status"]] = counts.get(task["status"], 0) + 1
+        items.append({**entry, "status": task["status"], "result": task.get("result")})
+
+    total = len(items)
+    done = counts["completed"] + counts["failed"]
+    return {
+        "batch_id": batch_id,
+        "status": "completed" if done == total else "processing",
+        "total": total,
+        **counts,
+        "progress": done / total if total else 1.0,
+        "tasks": items,
+    }
+
 @app.get("/status/{task_id}")
-async def get_task_status(task_id: str):
-    """작업 상태 확인 API"""
-    task = tasks_db.get(task_id)
+async def get_task_status(task_id: str, wait: float = Query(0, ge=0, le=MAX_STATUS_WAIT_SECONDS)):
+    """작업 상태 확인 API (wait > 0이면 작업이 끝나거나 상태가 바뀔 때까지 최대 wait초 대기: long-polling)"""
+    task = task_store.get(task_id)
     if not task:
         return JSONResponse(status_code=404, content={"status": "not_found"})
+    if wait > 0 and task.get("status") not in TERMINAL_STATUSES:
+        task = await wait_for_task_change(task_id, task, wait) or task
+    # 아직 대기열에 있으면 순번과 예상 대기 시간을 함께 알려줍니다.
+    queue = admission.position(task_id)
+    if queue is not None:
+        task = {**task, "queue": queue}
     return task
 
+@app.get("/events/{task_id}")
+async def stream_task_events(task_id: str, request: Request):
+    """작업 상태 변화를 Server-Sent Events로 밀어주는 API (작업이 끝나면 스트림 종료)"""
+    task = task_store.get(task_id)
+    if not task:
+        return JSONResponse(status_code=404, content={"status": "not_found"})
+
+    async def event_stream(task):
+        yield f"event: status\ndata: {json.dumps(task, ensure_ascii=False)}\n\n"
+        while task.get("status") not in TERMINAL_STATUSES:
+            if await request.is_disconnected():
+                return
+            latest = await wait_for_task_change(task_id, task, SSE_HEARTBEAT_SECONDS)
+            if latest is None:
+                yield f"event: status\ndata: {json.dumps({'status': 'not_found'})}\n\n"
+                return
+            if latest == task:
+                # 프록시가 유휴 연결을 끊지 않도록 주석 줄을 보냅니다.
+                yield ": heartbeat\n\n"
+                continue
+            task = latest
+            yield f"event: status\ndata: {json.dumps(task, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        event_stream(task),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus 형식 지표 API (단계별 처리 시간, 처리 중 작업 수, 단계별 오류 수)"""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+@app.post("/results/{task_id}/category")
+async def set_result_category(task_id: str, category: str = Query(..., min_length=1, max_length=128)):
+    """CLOVA 리포트에서 뽑은 카테고리를 판별 결과에 붙이는 API (작업당 처음 한 번만 집계에 반영)"""
+    results_recorder.set_category(task_id, category.strip())
+    return {"task_id": task_id, "category": category.strip()}
+
+@app.get("/stats")
+async def get_result_stats(granularity: str = Query("hour", pattern="^(hour|day)$"),
+                           hours: float = Query(24, gt=0, le=24 * 366)):
+    """판별 결과 통계 API: 미리 집계된 시간/일 단위 테이블만 읽어 레이블/카테고리별 건수를 반환"""
+    return await asyncio.to_thread(results_recorder.stats, granularity, hours)
+
+@app.get("/workers")
+async def get_workers():
+    """Worker 풀 상태 API (Worker별 준비 여부, 처리 중인 요청 수, 최근 오류)"""
+    return {"ready": worker_pool.ready_count(), "workers": worker_pool.status()}
+
+@app.get("/admission/stats")
+async def get_admission_stats():
+    """작업 접수 대기열 상태 API (대기/실행 중 작업 수, 거절 수, 이미지당 평균 처리 시간)"""
+    return admission.stats()
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """판별 결과 캐시 적중/미적중 통계 API"""
+    return verdict_cache.stats()
+
+@app.post("/cache/invalidate")
+async def invalidate_cache(model_id: str = None):
+    """판별 결과 캐시 무효화 API (model_id 생략 시 전체 삭제)"""
+    await run_storage_call(verdict_cache.invalidate, model_id)
+    return {"message": "캐시가 무효화되었습니다.", "model_id": model_id}
+
 #######################YOUTUBE API################################
-from fastapi import FastAPI, HTTPException, Query
-import httpx
- 
-# app = FastAPI()
- 
+from fastapi import HTTPException
+
 YOUTUBE_API_KEY = ""  # 여기에 본인의 YouTube API 키를 넣어주세요
- 
-@app.get("/tubef") #영상 검색
-async def search_youtube_videos(search: str = Query(..., title="Search Term")):
-    search_url = "https://www.googleapis.com/youtube/v3/search"
-    video_url = "https://www.googleapis.com/youtube/v3/videos"
- 
+YOUTUBE_SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
+YOUTUBE_VIDEOS_URL = "https://www.googleapis.com/youtube/v3/videos"
+
+# YouTube 응답 캐시: TTL 동안은 그대로 응답하고, 그 뒤 STALE 시간 동안은 이전 결과를 주면서 백그라운드에서 갱신
+# (같은 검색어/인기 차트를 동시에 요청해도 YouTube API는 한 번만 호출해 할당량을 아낍니다)
+YOUTUBE_SEARCH_TTL_SECONDS = float(os.getenv("YOUTUBE_SEARCH_TTL_SECONDS", "600"))
+YOUTUBE_TRENDING_TTL_SECONDS = float(os.getenv("YOUTUBE_TRENDING_TTL_SECONDS", "300"))
+YOUTUBE_STALE_SECONDS = float(os.getenv("YOUTUBE_STALE_SECONDS", "3600"))
+YOUTUBE_CACHE_MAX_ENTRIES = int(os.getenv("YOUTUBE_CACHE_MAX_ENTRIES", "1000"))
+YOUTUBE_TIMEOUT_SECONDS = 10
+
+youtube_search_cache = AsyncTTLCache(YOUTUBE_SEARCH_TTL_SECONDS, YOUTUBE_STALE_SECONDS, YOUTUBE_CACHE_MAX_ENTRIES)
+youtube_trending_cache = AsyncTTLCache(YOUTUBE_TRENDING_TTL_SECONDS, YOUTUBE_STALE_SECONDS, 1)
+YOUTUBE_CACHE_REQUESTS = Counter("trufy_youtube_cache_requests_total", "YouTube 응답 캐시 조회 수",
+                                 ("endpoint", "result"))
+
+def normalize_search_term(search: str) -> str:
+    """대소문자와 공백 차이만 있는 검색어가 같은 캐시 항목을 쓰도록 정규화합니다."""
+    return " ".join(search.split()).lower()
+
+async def fetch_search_videos(search: str) -> dict:
+    """YouTube에서 검색어로 영상을 찾고, 조회수를 포함한 상세 정보를 가져옵니다."""
     search_params = {
         "key": YOUTUBE_API_KEY,
         "part": "snippet",
@@ -72,43 +799,35 @@ async def search_youtube_videos(search: str = Query(..., title="Search Term")):
         "type": "video",
         "maxResults": 10,
     }
- 
-    async with httpx.AsyncClient() as client:
-        search_response = await client.get(search_url, params=search_params)
-        search_data = search_response.json()
- 
-        if "items" in search_data:
-            video_ids = ",".join([item["id"]["videoId"] for item in search_data["items"]])
- 
-            video_params = {
-                "key": YOUTUBE_API_KEY,
-                "part": "snippet,statistics",
-                "id": video_ids,
-            }
- 
-            video_response = await client.get(video_url, params=video_params)
-            video_data = video_response.json()
- 
-            if "items" in video_data:
-                videos = []
-                for item in video_data["items"]:
-                    video = {
-                        "title": item["snippet"]["title"],
-                        "video_id": item["id"],
-                        "thumbnail": item["snippet"]["thumbnails"]["default"]["url"],
-                        "view_count": int(item["statistics"]["viewCount"])
-                    }
-                    videos.append(video)
-                return {"videos": videos}
-            else:
-                raise HTTPException(status_code=500, detail="Failed to retrieve video details from YouTube")
-        else:
-            raise HTTPException(status_code=500, detail="Failed to retrieve search results from YouTube")
- 
- 
-@app.get("/trending") #오늘의 인기 영
-async def get_trending_videos():
-    base_url = "https://www.googleapis.com/youtube/v3/videos"
+    search_response = await youtube_client.get(YOUTUBE_SEARCH_URL, params=search_params)
+    search_data = search_response.json()
+    if "items" not in search_data:
+        raise HTTPException(status_code=500, detail="Failed to retrieve search results from YouTube")
+
+    video_ids = ",".join([item["id"]["videoId"] for item in search_data["items"]])
+    video_params = {
+        "key": YOUTUBE_API_KEY,
+        "part": "snippet,statistics",
+        "id": video_ids,
+    }
+    video_response = await youtube_client.get(YOUTUBE_VIDEOS_URL, params=video_params)
+    video_data = video_response.json()
+    if "items" not in video_data:
+        raise HTTPException(status_code=500, detail="Failed to retrieve video details from YouTube")
+
+    videos = []
+    for item in video_data["items"]:
+        video = {
+            "title": item["snippet"]["title"],
+            "video_id": item["id"],
+            "thumbnail": item["snippet"]["thumbnails"]["default"]["url"],
+            "view_count": int(item["statistics"]["viewCount"])
+        }
+        videos.append(video)
+    return {"videos": videos}
+
+async def fetch_trending_videos() -> dict:
+    """오늘의 한국 인기 영상 차트를 가져옵니다."""
     params = {
         "key": YOUTUBE_API_KEY,
         "part": "snippet,statistics",  # statistics 부분 추가
@@ -116,28 +835,40 @@ async def get_trending_videos():
         "regionCode": "KR",
         "maxResults": 10,
     }
- 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(base_url, params=params)
-        data = response.json()
- 
-    if "items" in data:
-        videos = []
-        for item in data["items"]:
-            video_url = f"https://www.youtube.com/watch?v={item['id']}"
-            video = {
-                "title": item["snippet"]["title"],
-                "video_url": video_url,
-                "thumbnail": item["snippet"]["thumbnails"]["default"]["url"],
-                "view_count": int(item["statistics"]["viewCount"])  # 조회수 정보 추가
-            }
-            videos.append(video)
-        return {"videos": videos}
-    else:
+    response = await youtube_client.get(YOUTUBE_VIDEOS_URL, params=params)
+    data = response.json()
+    if "items" not in data:
         raise HTTPException(status_code=500, detail="Failed to retrieve YouTube data")
 
+    videos = []
+    for item in data["items"]:
+        video_url = f"https://www.youtube.com/watch?v={item['id']}"
+        video = {
+            "title": item["snippet"]["title"],
+            "video_url": video_url,
+            "thumbnail": item["snippet"]["thumbnails"]["default"]["url"],
+            "view_count": int(item["statistics"]["viewCount"])  # 조회수 정보 추가
+        }
+        videos.append(video)
+    return {"videos": videos}
 
+@app.get("/tubef") #영상 검색
+async def search_youtube_videos(search: str = Query(..., title="Search Term")):
+    query = normalize_search_term(search)
+    result, cache_status = await youtube_search_cache.get(query, lambda: fetch_search_videos(query))
+    YOUTUBE_CACHE_REQUESTS.inc(endpoint="tubef", result=cache_status)
+    return result
+
+@app.get("/trending") #오늘의 인기 영상
+async def get_trending_videos():
+    result, cache_status = await youtube_trending_cache.get("KR", fetch_trending_videos)
+    YOUTUBE_CACHE_REQUESTS.inc(endpoint="trending", result=cache_status)
+    return result
 
+@app.get("/youtube/cache/stats")
+async def get_youtube_cache_stats():
+    """YouTube 응답 캐시 적중/만료 후 재사용/미적중 통계 API"""
+    return {"search": youtube_search_cache.stats(), "trending": youtube_trending_cache.stats()}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,189 @@
+# app_project/report_archive.py
+import hashlib
+import hmac
+import io
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import uuid
+
+from PIL import Image
+
+# 리포트 보관 폴더 (SQLite 메타데이터 + 원본 파일)
+REPORT_ARCHIVE_DIR = os.getenv("REPORT_ARCHIVE_DIR", "report_archive")
+# 썸네일 긴 변 길이(px) / 사용자별 최대 보관 개수 (넘으면 오래된 것부터 삭제)
+THUMBNAIL_SIZE = int(os.getenv("REPORT_THUMBNAIL_SIZE", "320"))
+REPORT_MAX_PER_OWNER = int(os.getenv("REPORT_MAX_PER_OWNER", "10000"))
+# 사용자 토큰 서명 키 (비우면 보관 폴더의 owner_secret 파일에 한 번 만들어 두고 계속 사용)
+REPORT_OWNER_SECRET = os.getenv("REPORT_OWNER_SECRET", "")
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm")
+
+
+def make_thumbnail(file_bytes: bytes, filename: str):
+    """이미지(영상이면 첫 프레임)로 작은 JPEG 썸네일을 만듭니다. 만들 수 없으면 None."""
+    try:
+        if filename.lower().endswith(VIDEO_EXTENSIONS):
+            import av
+            with av.open(io.BytesIO(file_bytes)) as container:
+                image = next(container.decode(video=0)).to_image()
+        else:
+            image = Image.open(io.BytesIO(file_bytes))
+            # JPEG은 썸네일 크기 근처까지만 축소 디코딩
+            image.draft("RGB", (THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        image = image.convert("RGB")
+        image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=80)
+        return buffer.getvalue()
+    except Exception as e:
+        print(f"❌ 썸네일 생성 실패: {filename} - {e}")
+        return None
+
+
+class ReportArchive:
+    """
+    분석 리포트 보관소.
+
+    세션 상태에는 아무것도 쌓지 않고, 메타데이터와 썸네일은 SQLite에, 원본 파일은 디스크에 저장합니다.
+    리포트 페이지는 페이지 단위로 썸네일만 읽고, 원본은 사용자가 열 때만 읽습니다.
+    """
+
+    def __init__(self, root_dir: str = REPORT_ARCHIVE_DIR, max_per_owner: int = REPORT_MAX_PER_OWNER):
+        self.root_dir = root_dir
+        self.originals_dir = os.path.join(root_dir, "originals")
+        self.max_per_owner = max_per_owner
+        os.makedirs(self.originals_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root_dir, "reports.db"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS reports (
+                report_id TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                predict TEXT,
+                prob TEXT,
+                storage_key TEXT,
+                original_path TEXT NOT NULL,
+                thumbnail BLOB
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_reports_owner_created ON reports (owner, created_at DESC)")
+        self._db.commit()
+        self._secret = (REPORT_OWNER_SECRET or self._load_or_create_secret()).encode()
+
+    def _load_or_create_secret(self) -> str:
+        path = os.path.join(self.root_dir, "owner_secret")
+        try:
+            # 처음 만드는 경우에만 쓰기 (여러 프로세스가 동시에 시작해도 같은 키를 읽도록)
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            with open(path) as f:
+                return f.read().strip()
+        with os.fdopen(fd, "w") as f:
+            secret = secrets.token_hex(32)
+            f.write(secret)
+        return secret
+
+    def _sign(self, owner: str) -> str:
+        return hmac.new(self._secret, owner.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def issue_owner_token(self) -> str:
+        """새 사용자 ID를 만들고, 서버 키로 서명한 토큰('<ID>.<서명>')을 반환합니다."""
+        owner = secrets.token_hex(16)
+        return f"{owner}.{self._sign(owner)}"
+
+    def verify_owner_token(self, token: str):
+        """서명이 맞는 토큰이면 사용자 ID를, 아니면 None을 반환합니다. (URL의 ID만 바꿔서는 남의 리포트를 볼 수 없음)"""
+        owner, _, signature = (token or "").partition(".")
+        if owner and hmac.compare_digest(signature, self._sign(owner)):
+            return owner
+        return None
+
+    def add(self, owner: str, filename: str, file_bytes: bytes, result: dict) -> str:
+        """
+        원본과 썸네일, 판별 결과를 저장하고 리포트 ID를 반환합니다.
+
+        원본은 임시 파일에 쓴 뒤 리포트 행이 커밋된 다음에야 제 이름으로 옮기므로,
+        저장이 중간에 실패해도 행 없는 원본 파일이 남지 않습니다.
+        """
+        report_id = uuid.uuid4().hex
+        original_path = os.path.join(self.originals_dir, f"{report_id}{os.path.splitext(filename)[1].lower()}")
+        thumbnail = make_thumbnail(file_bytes, filename)
+        temp_path = f"{original_path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(file_bytes)
+
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT INTO reports (report_id, owner, filename, created_at, predict, prob, storage_key, "
+                    "original_path, thumbnail) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (report_id, owner, filename, time.time(), result.get("predict"), result.get("prob"),
+                     result.get("storage_key"), original_path, thumbnail),
+                )
+                self._db.commit()
+        except Exception:
+            os.remove(temp_path)
+            raise
+        os.replace(temp_path, original_path)
+        self._prune(owner)
+        return report_id
+
+    def count(self, owner: str) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM reports WHERE owner = ?", (owner,)).fetchone()[0]
+
+    def list_page(self, owner: str, page: int, page_size: int) -> list:
+        """최신순으로 page번째(0부터) 페이지의 리포트 목록을 반환합니다. (원본 내용은 포함하지 않음)"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT report_id, filename, created_at, predict, prob, storage_key, thumbnail FROM reports "
+                "WHERE owner = ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (owner, page_size, page * page_size),
+            ).fetchall()
+        return [
+            {
+                "id": report_id,
+                "filename": filename,
+                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created_at)),
+                "predict": predict,
+                "prob": prob,
+                "storage_key": storage_key,
+                "thumbnail": thumbnail,
+            }
+            for report_id, filename, created_at, predict, prob, storage_key, thumbnail in rows
+        ]
+
+    def load_original(self, owner: str, report_id: str):
+        """owner의 리포트 원본 파일 내용을 읽습니다. 없거나 다른 사용자의 리포트면 None."""
+        with self._lock:
+            row = self._db.execute("SELECT original_path FROM reports WHERE report_id = ? AND owner = ?",
+                                   (report_id, owner)).fetchone()
+        if row is None or not os.path.exists(row[0]):
+            return None
+        with open(row[0], "rb") as f:
+            return f.read()
+
+    def _prune(self, owner: str):
+        """사용자별 보관 개수를 넘는 오래된 리포트와 원본 파일을 지웁니다."""
+        with self._lock:
+            expired = self._db.execute(
+                "SELECT report_id, original_path FROM reports WHERE owner = ? "
+                "ORDER BY created_at DESC LIMIT -1 OFFSET ?",
+                (owner, self.max_per_owner),
+            ).fetchall()
+            if not expired:
+                return
+            self._db.executemany("DELETE FROM reports WHERE report_id = ?", [(row[0],) for row in expired])
+            self._db.commit()
+        for _, original_path in expired:
+            try:
+                os.remove(original_path)
+            except OSError:
+                pass
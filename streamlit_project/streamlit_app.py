@@ -6,10 +6,12 @@ from PIL import Image
 import logging
 import uuid
 import requests
-import time
 import base64
 import json
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from report_archive import ReportArchive
+from verdict_cache import VerdictCache, hash_content
 
 
 # --- 페이지 기본 설정 ---
@@ -26,15 +28,67 @@ CLOVA_API_URL = "https://clovastudio.stream.ntruss.com/v3/chat-completions/HCX-0
 CLOVA_API_KEY = "" 
 CLOVA_API_GATEWAY_KEY = "" 
 
+# 작업 결과 대기 설정: SSE 연결이 안 되면 서버에서 기다려주는 long-polling으로 대체
+LONG_POLL_WAIT_SECONDS = 25
+# 업로드 요청 대기 시간 (연결, 응답)
+UPLOAD_TIMEOUT = (5, 120)
+TERMINAL_STATUSES = ("completed", "failed")
+VIDEO_TYPES = ['mp4', 'mov', 'webm']
+# 리포트 페이지에 한 번에 보여줄 리포트 수
+REPORTS_PER_PAGE = 10
+# CLOVA 분석 리포트 캐시: 같은 이미지 + 같은 내부 판별 결과면 LLM을 다시 호출하지 않음
+CLOVA_REPORT_CACHE_PATH = "clova_report_cache.db"
+CLOVA_REPORT_CACHE_TTL_SECONDS = 30 * 24 * 3600
+# CLOVA 스트리밍 응답 대기 시간 (연결, 토큰 사이 간격)
+CLOVA_TIMEOUT = (5, 60)
+
+
+@st.cache_resource
+def get_report_archive():
+    """모든 세션이 함께 쓰는 리포트 보관소 (썸네일/메타데이터는 SQLite, 원본은 디스크)"""
+    return ReportArchive()
+
+
+@st.cache_resource
+def get_clova_session():
+    """모든 세션이 함께 쓰는 CLOVA API용 keep-alive HTTP 세션 (요청마다 TLS 연결을 새로 맺지 않음)"""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    return session
+
+
+@st.cache_resource
+def get_clova_report_cache():
+    """완성된 CLOVA 분석 리포트 캐시 (메모리 LRU + SQLite, 키: 이미지 해시 + 내부 판별 결과)"""
+    return VerdictCache(db_path=CLOVA_REPORT_CACHE_PATH, max_entries=1000,
+                        ttl_seconds=CLOVA_REPORT_CACHE_TTL_SECONDS, model_id=CLOVA_API_URL)
+
+
+def clova_report_key(orig_res):
+    """리포트 캐시 키: 리포트 내용은 이미지와 프롬프트에 들어가는 내부 판별 결과에 따라 달라집니다."""
+    return f"{orig_res['content_hash']}:{orig_res['predict']}:{orig_res['prob']}"
+
 # --- 세션 상태 초기화 ---
 def init_session_state():
     """세션 상태 변수들을 초기화합니다."""
-    keys = ['task_id', 'reports', 'clova_result', 'original_result', 'upload_key']
+    keys = ['task_id', 'clova_result', 'original_result', 'upload_key', 'batch_id', 'open_report_id']
     for key in keys:
         if key not in st.session_state:
-            st.session_state[key] = None if key != 'reports' else []
+            st.session_state[key] = None
     if 'upload_key' not in st.session_state or st.session_state.upload_key is None:
         st.session_state.upload_key = str(uuid.uuid4())
+    # 리포트 보관소에서 이 사용자의 리포트를 찾는 키 (새로고침해도 유지되도록 서버가 서명한 토큰을 URL에 보관)
+    # 서명이 맞지 않는 토큰(직접 만들거나 고친 값)이면 새 사용자로 시작합니다.
+    if 'report_owner' not in st.session_state:
+        archive = get_report_archive()
+        token = st.query_params.get("owner")
+        owner = archive.verify_owner_token(token)
+        if owner is None:
+            token = archive.issue_owner_token()
+            owner = archive.verify_owner_token(token)
+        st.session_state.report_owner = owner
+        st.session_state.report_owner_token = token
+    st.query_params["owner"] = st.session_state.report_owner_token
 
 
 # --- 스타일링(CSS) ---
@@ -92,7 +146,11 @@ def load_css():
 
 # --- API 호출 함수 ---
 def get_clova_analysis(img_url, orig_res):
-    """HyperCLOVA X API에 분석을 요청하고 스트리밍으로 결과를 반환합니다."""
+    """
+    HyperCLOVA X API에 분석을 요청하고, 토큰이 도착할 때마다 지금까지 받은 전체 텍스트를 반환합니다.
+
+    마지막으로 반환한 값이 완성된 리포트입니다. 호출에 실패하면 예외를 냅니다.
+    """
     headers = {
         'Authorization': CLOVA_API_KEY,
         'X-NCP-CLOVASTUDIO-REQUEST-ID': str(uuid.uuid4()),
@@ -129,22 +187,65 @@ def get_clova_analysis(img_url, orig_res):
         "maxTokens": 400, "temperature": 0.5, "topP": 0.8, "topK": 0,
         "repeatPenalty": 5.0, "stop": [], "includeAiFilters": True, "seed": 0
     }
+    with get_clova_session().post(CLOVA_API_URL, headers=headers, json=data, stream=True, timeout=CLOVA_TIMEOUT) as r:
+        r.raise_for_status()
+        text, event = "", "token"
+        for line in r.iter_lines():
+            if not line:
+                continue
+            decoded_line = line.decode('utf-8')
+            if decoded_line.startswith('event:'):
+                event = decoded_line.split('event:', 1)[1].strip()
+            elif decoded_line.startswith('data:'):
+                try:
+                    json_data = json.loads(decoded_line.split('data:', 1)[1])
+                except json.JSONDecodeError:
+                    continue
+                if event == "error":
+                    raise RuntimeError(json_data.get("status", {}).get("message", "CLOVA 스트리밍 오류"))
+                content = json_data.get("message", {}).get("content", "")
+                # token 이벤트는 새로 생성된 조각, result 이벤트는 완성된 전체 답변
+                text = content if event == "result" else text + content
+                if content:
+                    yield text
+
+
+def stream_task_events(task_id):
+    """중개 서버의 SSE 엔드포인트에서 작업 상태 변화를 받아 차례로 반환합니다."""
+    with requests.get(f"{BROKER_API_URL}/events/{task_id}", stream=True, timeout=(5, 60)) as r:
+        r.raise_for_status()
+        for line in r.iter_lines():
+            if line:
+                decoded_line = line.decode('utf-8')
+                if decoded_line.startswith('data:'):
+                    yield json.loads(decoded_line.split('data:', 1)[1])
+
+
+def wait_for_task(task_id):
+    """
+    작업이 끝날 때까지 기다렸다가 최종 상태를 반환합니다.
+
+    서버가 상태를 밀어주는 SSE를 먼저 사용하고, 실패하면 long-polling으로 대체합니다.
+    상태 조회 자체가 실패하면 None을 반환합니다.
+    """
     try:
-        with requests.post(CLOVA_API_URL, headers=headers, json=data, stream=True) as r:
-            r.raise_for_status()
-            for line in r.iter_lines():
-                if line:
-                    decoded_line = line.decode('utf-8')
-                    if decoded_line.startswith('data:'):
-                        try:
-                            json_data_str = decoded_line.split('data:', 1)[1]
-                            json_data = json.loads(json_data_str)
-                            content = json_data.get("message", {}).get("content", "")
-                            yield content  # 받은 내용을 그대로 전달
-                        except (json.JSONDecodeError, IndexError):
-                            continue
-    except Exception as e:
-        yield f"클로버X API 호출 중 오류가 발생했습니다: {e}"
+        for status_data in stream_task_events(task_id):
+            if status_data.get("status") in TERMINAL_STATUSES:
+                return status_data
+    except (requests.RequestException, json.JSONDecodeError):
+        pass  # SSE를 사용할 수 없으면 아래 long-polling으로
+
+    while True:
+        status_response = requests.get(
+            f"{BROKER_API_URL}/status/{task_id}",
+            params={"wait": LONG_POLL_WAIT_SECONDS},
+            timeout=LONG_POLL_WAIT_SECONDS + 10
+        )
+        if status_response.status_code != 200:
+            return None
+        status_data = status_response.json()
+        if status_data["status"] in TERMINAL_STATUSES:
+            return status_data
 
 
 class CompletionExecutor:
@@ -185,15 +286,23 @@ def render_detector_page():
     st.title("🛡️ Aegis: AI Deepfake Verifier")
     st.caption("AI 기술을 활용하여 이미지의 진위를 판별합니다. 분석하고 싶은 이미지를 업로드해주세요.")
 
+    mode = st.radio("분석 방식", ("단일 이미지", "여러 이미지 (일괄)"), horizontal=True)
+    if mode == "여러 이미지 (일괄)":
+        render_batch_detector()
+        return
+
     with st.container():
         upload_jpg = st.file_uploader(
-            "분석할 이미지를 업로드하세요.(JPG) ",
-            type='jpg',
+            "분석할 이미지 또는 영상을 업로드하세요.(JPG, MP4) ",
+            type=['jpg'] + VIDEO_TYPES,
             key=st.session_state.upload_key
         )
         st.caption("*업로드된 이미지는 모델 성능 향상에 사용될 수 있습니다.")
         if upload_jpg is not None:
-            st.image(upload_jpg, caption="업로드된 이미지", use_container_width=True)
+            if upload_jpg.name.lower().endswith(tuple(VIDEO_TYPES)):
+                st.video(upload_jpg)
+            else:
+                st.image(upload_jpg, caption="업로드된 이미지", use_container_width=True)
 
             if st.button("🔍 이미지 분석 요청"):
                 # 분석 요청 시 기존 결과 초기화
@@ -203,59 +312,65 @@ def render_detector_page():
                 with st.spinner('서버에 파일을 전송하고 분석을 시작합니다...'):
                     files = {'file': (upload_jpg.name, upload_jpg.getvalue())}
                     try:
-                        response = requests.post(f"{BROKER_API_URL}/upload/", files=files)
+                        response = requests.post(f"{BROKER_API_URL}/upload/", files=files, headers=client_headers(),
+                                                 timeout=UPLOAD_TIMEOUT)
                         if response.status_code == 200:
                             st.session_state.task_id = response.json().get("task_id")
                             st.success("✅ 분석 요청이 성공적으로 접수되었습니다.")
                             st.info(f"작업 ID: {st.session_state.task_id}")
+                        elif response.status_code == 429:
+                            show_busy_message(response)
                         else:
                             st.error(f"서버 요청 실패: {response.text}")
-                    except requests.ConnectionError:
+                    except requests.RequestException:
                         st.error("❌ 분석 서버에 연결할 수 없습니다. 서버 상태를 확인해주세요.")
 
-    # Polling 및 결과 표시
+    # 결과 수신 및 표시 (서버가 완료 시점에 바로 알려줌)
     if st.session_state.task_id:
         with st.spinner("분석 결과를 기다리는 중입니다... 이 작업은 다소 시간이 소요될 수 있습니다."):
-            while True:
-                try:
-                    status_response = requests.get(f"{BROKER_API_URL}/status/{st.session_state.task_id}")
-                    if status_response.status_code == 200:
-                        status_data = status_response.json()
-                        if status_data["status"] == "completed":
-                            st.success("🎉 분석이 완료되었습니다!")
-                            backend_result = status_data["result"]
-                            predict = backend_result.get("model_result", "N/A")
-                            prob = backend_result.get("confidence", 0.0)
-
-                            st.session_state.original_result = {
-                                "predict": predict,
-                                "prob": f"{prob * 100:.1f}%",
-                                "filename": upload_jpg.name
-                            }
-                            st.session_state.reports.append({
-                                "id": str(uuid.uuid4())[:8],
-                                "filename": upload_jpg.name,
-                                "image_bytes": upload_jpg.getvalue(),
-                                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                **st.session_state.original_result
-                            })
-                            st.session_state.task_id = None
-                            st.session_state.upload_key = str(uuid.uuid4()) # 분석 완료 후 키 초기화
-                            st.rerun() # 결과 표시를 위해 화면 새로고침
-                        elif status_data["status"] == "failed":
-                            st.error("분석 중 오류가 발생했습니다.")
-                            st.json(status_data.get("result", "No error details"))
-                            st.session_state.task_id = None
-                            break
-                        time.sleep(2)
-                    else:
-                        st.error("상태 조회에 실패했습니다. 서버 응답을 확인해주세요.")
-                        st.session_state.task_id = None
-                        break
-                except requests.ConnectionError:
-                    st.error("❌ 분석 서버에 연결할 수 없습니다.")
+            try:
+                status_data = wait_for_task(st.session_state.task_id)
+                if status_data is None:
+                    st.error("상태 조회에 실패했습니다. 서버 응답을 확인해주세요.")
+                    st.session_state.task_id = None
+                elif status_data["status"] == "completed":
+                    st.success("🎉 분석이 완료되었습니다!")
+                    backend_result = status_data["result"]
+                    predict = backend_result.get("model_result", "N/A")
+                    prob = backend_result.get("confidence", 0.0)
+
+                    st.session_state.original_result = {
+                        "predict": predict,
+                        "prob": f"{prob * 100:.1f}%",
+                        "filename": upload_jpg.name,
+                        # 캐시된 결과는 예전에 저장된 객체 경로를 그대로 사용
+                        "storage_key": backend_result.get("storage_key"),
+                        # 카테고리를 판별 결과 저장소에 붙일 때 쓰는 작업 ID
+                        "task_id": st.session_state.task_id,
+                        # 영상 분석 결과에만 있는 프레임별 Fake 확률 타임라인
+                        "timeline": backend_result.get("timeline"),
+                        # CLOVA 리포트 캐시 키에 쓰는 이미지 내용 해시
+                        "content_hash": hash_content(upload_jpg.getvalue())
+                    }
+                    # 같은 이미지의 CLOVA 리포트가 이미 있으면 바로 보여줌
+                    cached_report = get_clova_report_cache().get(clova_report_key(st.session_state.original_result))
+                    st.session_state.clova_result = cached_report["report"] if cached_report else None
+                    st.session_state.category = cached_report.get("category") if cached_report else None
+                    if st.session_state.category:
+                        save_result_category(st.session_state.task_id, st.session_state.category)
+                    # 원본은 세션 상태가 아닌 리포트 보관소에 저장 (리포트 페이지는 썸네일만 읽음)
+                    get_report_archive().add(st.session_state.report_owner, upload_jpg.name,
+                                             upload_jpg.getvalue(), st.session_state.original_result)
                     st.session_state.task_id = None
-                    break
+                    st.session_state.upload_key = str(uuid.uuid4()) # 분석 완료 후 키 초기화
+                    st.rerun() # 결과 표시를 위해 화면 새로고침
+                else:
+                    st.error("분석 중 오류가 발생했습니다.")
+                    st.json(status_data.get("result", "No error details"))
+                    st.session_state.task_id = None
+            except requests.RequestException:
+                st.error("❌ 분석 서버에 연결할 수 없습니다.")
+                st.session_state.task_id = None
 
     # 분석 완료 후 결과 표시
     if st.session_state.original_result and not st.session_state.task_id:
@@ -269,75 +384,237 @@ def render_detector_page():
                 orig_res = st.session_state.original_result
                 st.metric(label="판별 결과", value=orig_res['predict'])
                 st.metric(label="신뢰도", value=orig_res['prob'])
+                if orig_res.get('timeline'):
+                    st.markdown("##### 🎞️ 프레임별 Fake 확률")
+                    st.line_chart(orig_res['timeline'], x="time", y="fake_probability")
 
 
         with col2:
             with st.container():
                 st.markdown("#### 🍀 HyperCLOVA X 전문가 분석")
-                if st.button("CLOVA X에게 심층 분석 요청하기"):
-                    # 이전 결과 초기화
-                    st.session_state.clova_result = None
-                    st.session_state.category = None
-
-                    with st.spinner('클로버 X가 이미지를 심층 분석 중입니다...'):
-                        filename_for_clova = st.session_state.original_result['filename']
-                        image_url_for_clova = f"https://kr.object.ncloudstorage.com/fake-storage/{datetime.today().strftime('%Y-%m-%d')}/{filename_for_clova}"
-            
-                        # 1. 빈 문자열 변수 생성
-                        # 이 변수에 API가 보내는 모든 텍스트 조각을 저장할 것입니다.
-                        full_response_text = ""
-                        
-                        # 2. get_clova_analysis가 주는 모든 조각을 순회하면서 하나로 합칩니다.
-                        for chunk in get_clova_analysis(image_url_for_clova, st.session_state.original_result):
-                            if chunk:
-                                full_response_text = chunk  # += 로 모든 내용을 이어붙입니다.
-
-                        # 3. 루프가 끝나면, 완성된 전체 텍스트에서 '카테고리'를 추출합니다.
-                        # 정규표현식을 사용하여 "**카테고리** :" 뒤에 오는 단어를 찾습니다.
-                        # 정규표현식을 사용하기 위해 import
-                        import re
-                        match = re.search(r"카테고리\s*:\s*(.*)", full_response_text)
-                        
-                        if match:
-                            # 정규표현식의 첫 번째 그룹(괄호 안의 내용)을 가져옵니다.
-                            category = match.group(1).strip()
-                            st.session_state['category'] = category
-                            # UI에 성공 메시지를 잠시 보여줍니다.
-                            st.toast(f"✅ 카테고리 '{category}' 저장 완료!")
-                        else:
-                            st.warning("⚠️ 응답에서 카테고리를 찾을 수 없습니다.")
+                if st.session_state.original_result.get('timeline'):
+                    st.info("영상은 HyperCLOVA X 심층 분석을 지원하지 않습니다.")
+                elif st.button("CLOVA X에게 심층 분석 요청하기"):
+                    orig_res = st.session_state.original_result
+                    report_cache = get_clova_report_cache()
+                    cached_report = report_cache.get(clova_report_key(orig_res))
+                    if cached_report is not None:
+                        # 같은 이미지와 같은 판별 결과로 이미 만든 리포트는 LLM을 다시 부르지 않음
+                        st.session_state.clova_result = cached_report["report"]
+                        st.session_state.category = cached_report.get("category")
+                        st.toast("✅ 이전에 생성된 분석 리포트를 불러왔습니다.")
+                    else:
+                        # 이전 결과 초기화
+                        st.session_state.clova_result = None
+                        st.session_state.category = None
 
-                        # 4. 완성된 전체 답변을 세션 상태에 저장합니다.
-                        st.session_state.clova_result = full_response_text
-                        
-                        # 화면을 새로고침하여 최종 결과를 표시합니다.
-                        st.rerun()
+                        filename_for_clova = orig_res['filename']
+                        storage_key = orig_res.get('storage_key') or f"{datetime.today().strftime('%Y-%m-%d')}/{filename_for_clova}"
+                        image_url_for_clova = f"https://kr.object.ncloudstorage.com/fake-storage/{storage_key}"
 
-            # st.rerun() 이후, 세션 상태에 저장된 최종 결과가 화면에 표시됩니다.
+                        # 토큰이 도착할 때마다 지금까지의 답변을 바로 그립니다.
+                        placeholder = st.empty()
+                        full_response_text = ""
+                        try:
+                            with st.spinner('클로버 X가 이미지를 심층 분석 중입니다...'):
+                                for full_response_text in get_clova_analysis(image_url_for_clova, orig_res):
+                                    placeholder.markdown(full_response_text + " ▌")
+                        except Exception as e:
+                            full_response_text = ""
+                            st.error(f"클로버X API 호출 중 오류가 발생했습니다: {e}")
+                        placeholder.empty()
+
+                        if full_response_text:
+                            # 완성된 전체 텍스트에서 "**카테고리** :" 뒤에 오는 단어를 추출합니다.
+                            import re
+                            match = re.search(r"카테고리\**\s*:\s*(.*)", full_response_text)
+                            category = None
+                            if match:
+                                category = match.group(1).strip(" *")
+                                st.session_state['category'] = category
+                                save_result_category(orig_res.get('task_id'), category)
+                                st.toast(f"✅ 카테고리 '{category}' 저장 완료!")
+                            else:
+                                st.warning("⚠️ 응답에서 카테고리를 찾을 수 없습니다.")
+
+                            # 완성된 답변은 세션 상태와 리포트 캐시에 저장 (아래에서 최종 결과로 표시)
+                            st.session_state.clova_result = full_response_text
+                            report_cache.put(clova_report_key(orig_res),
+                                             {"report": full_response_text, "category": category})
+
+            # 세션 상태에 저장된 최종 결과가 화면에 표시됩니다.
             if st.session_state.clova_result:
                 st.subheader("🍀 클로버 X 분석 결과")
                 st.markdown(st.session_state.clova_result)
 
 
+def client_headers():
+    """중개 서버가 사용자별로 대기열을 공평하게 나누도록 사용자 ID를 보냅니다. (모든 요청이 같은 Streamlit 서버 IP에서 나가므로)"""
+    return {"X-Client-ID": st.session_state.report_owner}
+
+
+def show_busy_message(response):
+    """대기열이 가득 차 거절된 요청(429)에 대해 언제 다시 시도하면 되는지 안내합니다."""
+    retry_after = response.headers.get("Retry-After")
+    wait_text = f"{retry_after}초" if retry_after else "잠시"
+    st.warning(f"⏳ 요청이 많아 지금은 접수할 수 없습니다. {wait_text} 후에 다시 시도해주세요. "
+               f"({response.json().get('error', '')})")
+
+
+def save_result_category(task_id, category):
+    """CLOVA 리포트에서 뽑은 카테고리를 판별 결과 통계에 반영합니다. (실패해도 화면 흐름은 그대로 진행)"""
+    if not task_id:
+        return
+    try:
+        requests.post(f"{BROKER_API_URL}/results/{task_id}/category", params={"category": category}, timeout=5)
+    except requests.RequestException as e:
+        logging.warning(f"카테고리 저장 실패: {e}")
+
+
+def render_batch_detector():
+    """여러 이미지 또는 zip 파일을 한 번에 분석하는 일괄 분석 화면을 렌더링합니다."""
+    with st.container():
+        upload_files = st.file_uploader(
+            "분석할 이미지들 또는 zip 파일을 업로드하세요.",
+            type=['jpg', 'jpeg', 'png', 'zip'],
+            accept_multiple_files=True,
+            key=f"batch_{st.session_state.upload_key}"
+        )
+        if upload_files and st.button("🔍 일괄 분석 요청"):
+            st.session_state.batch_id = None
+            with st.spinner('서버에 파일을 전송하고 일괄 분석을 시작합니다...'):
+                files = [('files', (f.name, f.getvalue())) for f in upload_files]
+                try:
+                    response = requests.post(f"{BROKER_API_URL}/upload-batch/", files=files, headers=client_headers(),
+                                             timeout=UPLOAD_TIMEOUT)
+                    if response.status_code == 200:
+                        st.session_state.batch_id = response.json().get("batch_id")
+                        st.success(f"✅ {len(response.json().get('tasks', []))}개 이미지의 분석 요청이 접수되었습니다.")
+                    elif response.status_code == 429:
+                        show_busy_message(response)
+                    elif response.status_code == 413:
+                        st.error(f"❌ {response.json().get('error', '한 번에 올릴 수 있는 양을 넘었습니다.')}")
+                    else:
+                        st.error(f"서버 요청 실패: {response.text}")
+                except requests.RequestException:
+                    st.error("❌ 분석 서버에 연결할 수 없습니다. 서버 상태를 확인해주세요.")
+
+    if not st.session_state.batch_id:
+        return
+
+    progress_bar = st.progress(0.0, text="일괄 분석 진행 중...")
+    while True:
+        # 서버가 항목이 끝날 때마다 바로 응답하므로 따로 쉬지 않고 다시 요청 (long-polling)
+        try:
+            batch_response = requests.get(
+                f"{BROKER_API_URL}/batch/{st.session_state.batch_id}",
+                params={"wait": LONG_POLL_WAIT_SECONDS},
+                timeout=LONG_POLL_WAIT_SECONDS + 10
+            )
+        except requests.RequestException:
+            st.error("❌ 분석 서버에 연결할 수 없습니다.")
+            return
+        if batch_response.status_code != 200:
+            st.error("일괄 작업 상태 조회에 실패했습니다.")
+            st.session_state.batch_id = None
+            return
+        batch = batch_response.json()
+        progress_bar.progress(batch["progress"], text=f"일괄 분석 진행 중... ({batch['completed'] + batch['failed']}/{batch['total']})")
+        if batch["status"] == "completed":
+            break
+
+    st.success(f"🎉 일괄 분석이 완료되었습니다! (성공 {batch['completed']}건 / 실패 {batch['failed']}건)")
+    rows = []
+    for item in batch["tasks"]:
+        result = item.get("result") or {}
+        confidence = result.get("confidence")
+        rows.append({
+            "파일 이름": item["filename"],
+            "판별 결과": result.get("model_result", "오류"),
+            "신뢰도": f"{confidence * 100:.1f}%" if confidence is not None else "-",
+            "비고": result.get("error", "캐시" if result.get("cached") else ""),
+        })
+    st.dataframe(rows, use_container_width=True)
+
+
 def render_report_page():
-    """분석 리포트 페이지를 렌더링합니다."""
+    """분석 리포트 페이지를 렌더링합니다. (페이지 단위로 썸네일만 읽고, 원본은 열 때만 읽음)"""
     st.title("📋 분석 리포트")
     st.caption("과거에 분석했던 이미지들의 결과를 확인합니다.")
 
-    if not st.session_state.reports:
+    archive = get_report_archive()
+    total = archive.count(st.session_state.report_owner)
+    if total == 0:
         st.info("아직 분석한 이미지가 없습니다. 'Detector' 메뉴에서 이미지를 분석해주세요.")
-    else:
-        # 최신 리포트가 위로 오도록 역순으로 표시
-        for report in reversed(st.session_state.reports):
-            with st.expander(f"📁 {report['filename']} (분석일: {report['timestamp']})"):
-                col1, col2 = st.columns([1, 2])
-                with col1:
-                    st.image(report["image_bytes"], use_container_width=True)
-                with col2:
-                    st.markdown(f"**- 판별 결과:** `{report['predict']}`")
-                    st.markdown(f"**- 신뢰도:** `{report['prob']}`")
-                    st.markdown(f"**- 리포트 ID:** `{report['id']}`")
-                    
+        return
+
+    page_count = (total + REPORTS_PER_PAGE - 1) // REPORTS_PER_PAGE
+    page = st.number_input(f"페이지 (전체 {page_count}쪽, {total}건)", min_value=1, max_value=page_count, value=1) - 1
+
+    # 최신 리포트가 위로 오도록 정렬된 페이지만 조회
+    for report in archive.list_page(st.session_state.report_owner, page, REPORTS_PER_PAGE):
+        with st.expander(f"📁 {report['filename']} (분석일: {report['timestamp']})"):
+            col1, col2 = st.columns([1, 2])
+            with col1:
+                is_video = report['filename'].lower().endswith(tuple(VIDEO_TYPES))
+                if st.session_state.open_report_id == report['id']:
+                    original = archive.load_original(st.session_state.report_owner, report['id'])
+                    if original is None:
+                        st.warning("원본 파일을 찾을 수 없습니다.")
+                    elif is_video:
+                        st.video(original)
+                    else:
+                        st.image(original, use_container_width=True)
+                else:
+                    if report['thumbnail']:
+                        st.image(report['thumbnail'], use_container_width=True)
+                    if st.button("원본 보기", key=f"open_{report['id']}"):
+                        st.session_state.open_report_id = report['id']
+                        st.rerun()
+            with col2:
+                st.markdown(f"**- 판별 결과:** `{report['predict']}`")
+                st.markdown(f"**- 신뢰도:** `{report['prob']}`")
+                st.markdown(f"**- 리포트 ID:** `{report['id']}`")
+
+
+def render_stats_page():
+    """판별 결과 통계 페이지를 렌더링합니다. (서버에 미리 집계된 시간/일 단위 통계만 조회)"""
+    st.title("📈 판별 통계")
+    st.caption("지금까지 분석된 모든 요청의 판별 결과를 집계해 보여줍니다.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        granularity = st.radio("집계 단위", ("hour", "day"), horizontal=True,
+                               format_func=lambda value: "시간별" if value == "hour" else "일별")
+    with col2:
+        hours = st.selectbox("조회 기간", (24, 24 * 7, 24 * 30), format_func=lambda value: f"최근 {value // 24}일")
+
+    try:
+        response = requests.get(f"{BROKER_API_URL}/stats", params={"granularity": granularity, "hours": hours},
+                                timeout=10)
+        response.raise_for_status()
+        stats = response.json()
+    except requests.RequestException:
+        st.error("❌ 통계를 불러올 수 없습니다.")
+        return
+    if not stats["buckets"]:
+        st.info("조회 기간에 분석된 결과가 없습니다.")
+        return
+
+    totals = stats["totals"]
+    metric_columns = st.columns(len(totals) + 1)
+    metric_columns[0].metric("전체 분석", sum(total["count"] for total in totals.values()))
+    for column, (label, total) in zip(metric_columns[1:], sorted(totals.items())):
+        mean_confidence = total["mean_confidence"]
+        column.metric(label, total["count"],
+                      help=f"평균 신뢰도 {mean_confidence * 100:.1f}%, 캐시 응답 {total['cached_count']}건"
+                      if mean_confidence is not None else None)
+
+    st.markdown("##### 🕒 구간별 판별 결과")
+    st.bar_chart(stats["buckets"], x="bucket_start", y=sorted(totals))
+    if stats["categories"]:
+        st.markdown("##### 🏷️ CLOVA 카테고리별 건수")
+        st.bar_chart(stats["categories"], x="category", y="count")
 
 
 def render_youtube_page():
@@ -424,7 +701,7 @@ def main():
         st.markdown("# 🛡️ Aegis Verifier")
         page = st.radio(
             "메뉴를 선택하세요",
-            ("Detector", "Report","관련 영상"),
+            ("Detector", "Report", "통계", "관련 영상"),
             label_visibility="hidden"
         )
         st.markdown("---")
@@ -442,6 +719,8 @@ def main():
         render_detector_page()
     elif page == "Report":
         render_report_page()
+    elif page == "통계":
+        render_stats_page()
     elif page == "관련 영상": 
         render_youtube_page() 
 if __name__ == "__main__":
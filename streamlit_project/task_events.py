@@ -0,0 +1,42 @@
+# app_project/task_events.py
+import asyncio
+
+# 더 이상 상태가 바뀌지 않는 작업 상태
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class TaskEvents:
+    """
+    작업 상태가 바뀌었음을 같은 프로세스 안의 대기자(SSE/long-polling)에게 알려주는 알림기.
+
+    상태를 바꾼 쪽이 notify(task_id)를 호출하면 wait(task_id)로 기다리던 요청이 바로 깨어납니다.
+    """
+
+    def __init__(self):
+        self._events = {}   # task_id -> asyncio.Event
+        self._waiters = {}  # task_id -> 기다리는 요청 수
+
+    def notify(self, task_id: str):
+        """작업 상태 변경을 알립니다."""
+        event = self._events.pop(task_id, None)
+        if event is not None:
+            event.set()
+
+    async def wait(self, task_id: str, timeout: float) -> bool:
+        """상태 변경 알림을 최대 timeout초 기다립니다. 알림을 받으면 True."""
+        event = self._events.get(task_id)
+        if event is None:
+            event = self._events[task_id] = asyncio.Event()
+        self._waiters[task_id] = self._waiters.get(task_id, 0) + 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiters[task_id] -= 1
+            if self._waiters[task_id] == 0:
+                del self._waiters[task_id]
+                # 기다리는 요청이 없으면 이벤트도 정리 (메모리 누수 방지)
+                if self._events.get(task_id) is event:
+                    del self._events[task_id]
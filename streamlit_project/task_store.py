@@ -0,0 +1,212 @@
+# app_project/task_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class TaskStore:
+    """
+    작업 상태 저장소 인터페이스.
+
+    작업 레코드는 {"status": ..., "result": ...} 형태의 dict이며,
+    task_id로 O(1) 조회할 수 있어야 합니다.
+    """
+
+    def create(self, task_id: str, record: dict):
+        raise NotImplementedError
+
+    def update(self, task_id: str, **fields):
+        """기존 레코드에 필드를 덮어씁니다."""
+        raise NotImplementedError
+
+    def get(self, task_id: str):
+        """레코드를 반환합니다. 없거나 만료되었으면 None."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryTaskStore(TaskStore):
+    """TTL과 최대 개수 제한이 있는 프로세스 내부 작업 저장소 (오래된 작업부터 제거)."""
+
+    def __init__(self, ttl_seconds: float = 24 * 3600, max_tasks: int = 100000):
+        self.ttl_seconds = ttl_seconds
+        self.max_tasks = max_tasks
+        self._tasks = OrderedDict()  # task_id -> (record, 마지막 갱신 시각)
+        self._lock = threading.Lock()
+
+    def create(self, task_id: str, record: dict):
+        with self._lock:
+            self._tasks[task_id] = (dict(record), time.time())
+            self._evict()
+
+    def update(self, task_id: str, **fields):
+        with self._lock:
+            entry = self._tasks.get(task_id)
+            record = entry[0] if entry else {}
+            record.update(fields)
+            self._tasks[task_id] = (record, time.time())
+            self._tasks.move_to_end(task_id)
+            self._evict()
+
+    def get(self, task_id: str):
+        with self._lock:
+            entry = self._tasks.get(task_id)
+            if entry is None:
+                return None
+            if time.time() - entry[1] > self.ttl_seconds:
+                del self._tasks[task_id]
+                return None
+            return dict(entry[0])
+
+    def _evict(self):
+        # 갱신 순서대로 정렬되어 있으므로 앞쪽(가장 오래된 것)부터 확인
+        now = time.time()
+        while self._tasks:
+            task_id, (_, updated_at) = next(iter(self._tasks.items()))
+            if len(self._tasks) > self.max_tasks or now - updated_at > self.ttl_seconds:
+                del self._tasks[task_id]
+            else:
+                break
+
+
+class SqliteTaskStore(TaskStore):
+    """
+    SQLite 파일에 저장하는 작업 저장소.
+
+    상태 변경은 메모리 버퍼에 모았다가 백그라운드 스레드가 한 트랜잭션으로 묶어 기록합니다.
+    같은 파일을 쓰는 여러 중개 서버 프로세스가 서로의 작업 상태를 조회할 수 있습니다.
+    (다른 프로세스에는 최대 flush_interval만큼 늦게 보입니다.)
+    """
+
+    def __init__(self, db_path: str = "tasks.db", ttl_seconds: float = 24 * 3600,
+                 flush_interval_ms: float = 200, flush_batch_size: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.flush_batch_size = flush_batch_size
+        self._pending = {}  # task_id -> 아직 기록되지 않은 최신 레코드
+        self._flushing = {}  # 지금 기록 중인 레코드 (기록이 끝날 때까지 조회에 사용)
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._last_cleanup = 0.0
+
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                record TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_tasks_expires_at ON tasks (expires_at)")
+        self._db.commit()
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="task-store-flusher", daemon=True)
+        self._flusher.start()
+
+    def create(self, task_id: str, record: dict):
+        with self._lock:
+            self._pending[task_id] = dict(record)
+            if len(self._pending) >= self.flush_batch_size:
+                self._wakeup.set()
+
+    def update(self, task_id: str, **fields):
+        record = self._buffered(task_id)
+        if record is None:
+            record = self._read(task_id) or {}
+        record = {**record, **fields}
+        with self._lock:
+            self._pending[task_id] = record
+            if len(self._pending) >= self.flush_batch_size:
+                self._wakeup.set()
+
+    def get(self, task_id: str):
+        record = self._buffered(task_id)
+        if record is not None:
+            return dict(record)
+        return self._read(task_id)
+
+    def _buffered(self, task_id: str):
+        with self._lock:
+            record = self._pending.get(task_id)
+            return record if record is not None else self._flushing.get(task_id)
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+
+    def _read(self, task_id: str):
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT record FROM tasks WHERE task_id = ? AND expires_at > ?", (task_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def flush(self):
+        """버퍼에 모인 상태 변경을 한 번의 트랜잭션으로 기록합니다."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushing = pending
+        now = time.time()
+        try:
+            self._write(pending, now)
+        except Exception:
+            # 기록에 실패한 레코드는 (그 사이 더 새 상태가 없으면) 버퍼로 되돌려 다음에 다시 시도
+            with self._lock:
+                for task_id, record in pending.items():
+                    self._pending.setdefault(task_id, record)
+                self._flushing = {}
+            raise
+        with self._lock:
+            self._flushing = {}
+
+    def _write(self, pending: dict, now: float):
+        with self._db_lock:
+            if pending:
+                expires_at = now + self.ttl_seconds
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO tasks (task_id, record, expires_at) VALUES (?, ?, ?)",
+                    [(task_id, json.dumps(record, ensure_ascii=False), expires_at)
+                     for task_id, record in pending.items()]
+                )
+            # 만료된 작업은 가끔씩만 정리
+            if now - self._last_cleanup > 60:
+                self._db.execute("DELETE FROM tasks WHERE expires_at <= ?", (now,))
+                self._last_cleanup = now
+            self._db.commit()
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ 작업 상태 기록 실패: {e}")
+
+
+def create_task_store() -> TaskStore:
+    """환경 변수 TASK_STORE('memory' 또는 'sqlite')에 맞는 작업 저장소를 만듭니다."""
+    kind = os.getenv("TASK_STORE", "memory")
+    ttl_seconds = float(os.getenv("TASK_TTL_SECONDS", str(24 * 3600)))
+    if kind == "memory":
+        return MemoryTaskStore(ttl_seconds=ttl_seconds,
+                               max_tasks=int(os.getenv("TASK_MAX_ENTRIES", "100000")))
+    if kind == "sqlite":
+        return SqliteTaskStore(db_path=os.getenv("TASK_STORE_PATH", "tasks.db"),
+                               ttl_seconds=ttl_seconds,
+                               flush_interval_ms=float(os.getenv("TASK_FLUSH_INTERVAL_MS", "200")),
+                               flush_batch_size=int(os.getenv("TASK_FLUSH_BATCH_SIZE", "256")))
+    raise ValueError(f"지원하지 않는 작업 저장소입니다: {kind}")
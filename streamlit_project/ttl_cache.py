@@ -0,0 +1,83 @@
+# app_project/ttl_cache.py
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class AsyncTTLCache:
+    """
+    외부 API 응답용 비동기 TTL 캐시.
+
+    - ttl_seconds 동안은 저장된 값을 그대로 반환합니다.
+    - 그 뒤 stale_seconds 동안은 오래된 값을 바로 반환하고, 백그라운드에서 한 번만 새로 가져옵니다.
+    - 같은 키를 동시에 요청하면 외부 호출은 한 번만 하고 나머지는 그 결과를 함께 기다립니다.
+    - 가져오다 실패한 결과는 저장하지 않습니다. (백그라운드 갱신이 실패하면 오래된 값을 계속 사용)
+    """
+
+    def __init__(self, ttl_seconds: float, stale_seconds: float = 0, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, fetched_at)
+        self._inflight = {}  # key -> 진행 중인 가져오기 Task
+
+    async def get(self, key, fetch):
+        """
+        key의 값을 반환합니다. 없거나 너무 오래되었으면 fetch()(코루틴 함수)로 가져옵니다.
+
+        Returns:
+            tuple: (값, 캐시 상태 "hit" | "stale" | "miss")
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value, "hit"
+            if age <= self.ttl_seconds + self.stale_seconds:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                self._start_fetch(key, fetch)
+                return value, "stale"
+
+        self.misses += 1
+        return await asyncio.shield(self._start_fetch(key, fetch)), "miss"
+
+    def _start_fetch(self, key, fetch) -> asyncio.Task:
+        """key를 가져오는 작업이 없을 때만 새로 시작하고, 진행 중인 작업을 반환합니다."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, fetch))
+            # 아무도 기다리지 않는 갱신이 실패해도 "exception was never retrieved" 경고가 나지 않도록 결과를 소비
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self._inflight[key] = task
+        return task
+
+    async def _fetch(self, key, fetch):
+        try:
+            value = await fetch()
+        except Exception as e:
+            # 기다리는 요청이 없는 백그라운드 갱신의 실패도 로그에는 남김
+            print(f"❌ 캐시 갱신 실패: {key} - {e!r}")
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshing": len(self._inflight),
+        }
@@ -0,0 +1,182 @@
+# app_project/verdict_cache.py
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def hash_content(file_bytes: bytes) -> str:
+    """업로드된 파일 내용의 SHA-256 해시(hex)를 계산합니다."""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+class VerdictCache:
+    """
+    (콘텐츠 해시, 모델 ID)를 키로 판별 결과를 저장하는 캐시.
+
+    메모리에는 크기/TTL 제한이 있는 LRU를 두고, 그 뒤에 SQLite 파일을 두어
+    서버가 재시작되어도 결과가 유지됩니다.
+    SQLite 파일은 시작 시와 purge_every번 저장마다 만료된 결과를 지우고,
+    max_disk_entries를 넘으면 가장 오래된 결과부터 지웁니다.
+
+    조회는 설정된 model_id 기준이고, 설정된 model_id가 지난 실행과 달라졌을 때만 이전 모델의 결과를 지웁니다.
+    (여러 Worker가 서로 다른 모델을 쓰더라도 응답 하나로 다른 모델의 결과를 지우지 않음)
+    """
+
+    def __init__(self, db_path: str = "verdict_cache.db", max_entries: int = 10000,
+                 ttl_seconds: float = 7 * 24 * 3600, model_id: str = "",
+                 max_disk_entries: int = 100000, purge_every: int = 1000):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.purge_every = purge_every
+        self.ttl_seconds = ttl_seconds
+        self.model_id = model_id
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS verdicts (
+                content_hash TEXT NOT NULL,
+                model_id TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (content_hash, model_id)
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS verdicts_created_at ON verdicts (created_at)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.commit()
+        self._check_model_change()
+        self._puts_since_purge = 0
+        self._disk_rows = 0
+        with self._lock:
+            self._purge()
+
+    def _check_model_change(self):
+        """지난 실행에 설정된 model_id와 다르면 이전 모델의 결과를 삭제하고 새 model_id를 기록합니다."""
+        row = self._db.execute("SELECT value FROM cache_meta WHERE name = 'model_id'").fetchone()
+        if row is not None and row[0] != self.model_id:
+            self._db.execute("DELETE FROM verdicts WHERE model_id = ?", (row[0],))
+            print(f"🧹 모델 변경 감지 ({row[0]} -> {self.model_id}): 이전 판별 결과 캐시 삭제")
+        self._db.execute("INSERT OR REPLACE INTO cache_meta (name, value) VALUES ('model_id', ?)", (self.model_id,))
+        self._db.commit()
+
+    def _expired(self, created_at: float) -> bool:
+        return time.time() - created_at > self.ttl_seconds
+
+    def get(self, content_hash: str, model_id: str = None):
+        """
+        캐시된 결과를 반환합니다. 없거나 만료되었으면 None.
+
+        메모리에 없으면 SQLite를 읽으므로, 이벤트 루프에서는 스레드에서 호출하세요.
+        """
+        with self._lock:
+            return self._lookup((content_hash, model_id or self.model_id))
+
+    def get_many(self, content_hashes: list, model_id: str = None) -> list:
+        """여러 해시의 캐시된 결과를 같은 순서의 목록으로 반환합니다. (없거나 만료된 항목은 None)"""
+        model_id = model_id or self.model_id
+        with self._lock:
+            return [self._lookup((content_hash, model_id)) for content_hash in content_hashes]
+
+    def _lookup(self, key):
+        entry = self._memory.get(key)
+        if entry is None:
+            row = self._db.execute(
+                "SELECT result, created_at FROM verdicts WHERE content_hash = ? AND model_id = ?", key
+            ).fetchone()
+            if row is not None:
+                entry = (json.loads(row[0]), row[1])
+                self._remember(key, entry)
+
+        if entry is None or self._expired(entry[1]):
+            if entry is not None:
+                self._forget(key)
+            self.misses += 1
+            return None
+
+        self._memory.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, content_hash: str, result: dict, model_id: str = None):
+        """판별 결과를 메모리와 디스크에 함께 저장합니다."""
+        key = (content_hash, model_id or self.model_id)
+        entry = (result, time.time())
+        with self._lock:
+            self._remember(key, entry)
+            self._db.execute(
+                "INSERT OR REPLACE INTO verdicts (content_hash, model_id, result, created_at) VALUES (?, ?, ?, ?)",
+                (*key, json.dumps(result, ensure_ascii=False), entry[1])
+            )
+            self._disk_rows += 1
+            self._puts_since_purge += 1
+            if self._puts_since_purge >= self.purge_every:
+                self._purge()
+            elif self._disk_rows > self.max_disk_entries:
+                self._trim()
+            self._db.commit()
+
+    def invalidate(self, model_id: str = None):
+        """특정 모델의 결과(또는 model_id가 없으면 전체)를 삭제합니다."""
+        with self._lock:
+            if model_id is None:
+                self._memory.clear()
+                self._db.execute("DELETE FROM verdicts")
+            else:
+                for key in [key for key in self._memory if key[1] == model_id]:
+                    del self._memory[key]
+                self._db.execute("DELETE FROM verdicts WHERE model_id = ?", (model_id,))
+            self._db.commit()
+        print(f"🧹 판별 결과 캐시 무효화: {model_id or '전체'}")
+
+    def stats(self) -> dict:
+        """캐시 적중/미적중 통계를 반환합니다."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "model_id": self.model_id,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _purge(self):
+        """만료된 결과를 디스크에서 지우고 크기 제한을 적용합니다. (_lock을 잡은 채로 호출)"""
+        cursor = self._db.execute("DELETE FROM verdicts WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        if cursor.rowcount > 0:
+            print(f"🧹 만료된 판별 결과 {cursor.rowcount}건 삭제")
+        self._puts_since_purge = 0
+        self._trim()
+        self._db.commit()
+
+    def _trim(self):
+        """
+        디스크의 결과가 max_disk_entries를 넘으면 가장 오래된 결과부터 지웁니다. (_lock을 잡은 채로 호출)
+
+        _disk_rows는 같은 키를 덮어쓴 저장도 세므로 실제보다 클 수 있어, 여기서 실제 행 수로 다시 맞춥니다.
+        """
+        self._disk_rows = self._db.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+        excess = self._disk_rows - self.max_disk_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM verdicts WHERE rowid IN (SELECT rowid FROM verdicts ORDER BY created_at LIMIT ?)",
+                (excess,)
+            )
+            self._disk_rows -= excess
+
+    def _forget(self, key):
+        self._memory.pop(key, None)
+        self._db.execute("DELETE FROM verdicts WHERE content_hash = ? AND model_id = ?", key)
+        self._db.commit()
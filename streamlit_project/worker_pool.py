@@ -0,0 +1,134 @@
+# app_project/worker_pool.py
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+
+
+class NoWorkerAvailable(Exception):
+    """요청을 보낼 수 있는 Worker가 없음"""
+
+
+class WorkerEndpoint:
+    """Worker 서버 하나의 주소와 상태 (처리 중인 요청 수, 살아있는지, 모델 준비 여부)"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.outstanding = 0
+        # 첫 검사 전에는 준비되었다고 가정 (검사 결과나 호출 실패가 오면 바로 바뀜)
+        self.alive = True
+        self.ready = True
+        self.consecutive_failures = 0
+        self.last_probe = None
+        self.last_error = None
+
+    def status(self) -> dict:
+        return {
+            "url": self.base_url,
+            "alive": self.alive,
+            "ready": self.ready,
+            "outstanding": self.outstanding,
+            "consecutive_failures": self.consecutive_failures,
+            "last_probe_age_seconds": round(time.monotonic() - self.last_probe, 1) if self.last_probe else None,
+            "last_error": self.last_error,
+        }
+
+
+class WorkerPool:
+    """
+    여러 Worker 서버에 요청을 나눠 보내는 풀.
+
+    - probe_interval초마다 각 Worker의 /readyz를 확인해 살아있는지와 모델 준비 여부를 갱신합니다.
+    - 준비된 Worker 중 처리 중인 요청이 가장 적은 곳을 고릅니다.
+    - 호출이 실패한 Worker는 다음 검사에서 다시 준비 상태가 확인될 때까지 빼고 고릅니다.
+    """
+
+    def __init__(self, base_urls: list, probe_interval: float = 5.0, probe_timeout: float = 2.0,
+                 on_change=None):
+        if not base_urls:
+            raise ValueError("Worker 주소가 하나 이상 필요합니다.")
+        self.workers = [WorkerEndpoint(url) for url in base_urls]
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        # Worker 상태가 바뀔 때마다 호출 (지표 갱신용)
+        self.on_change = on_change or (lambda worker: None)
+        self._client = None
+        self._probe_task = None
+
+    def start(self, client: httpx.AsyncClient):
+        """상태 검사를 시작합니다. (이벤트 루프 안에서 호출)"""
+        self._client = client
+        self._probe_task = asyncio.create_task(self._probe_loop())
+
+    async def close(self):
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            await asyncio.gather(self._probe_task, return_exceptions=True)
+            self._probe_task = None
+
+    async def _probe_loop(self):
+        while True:
+            await asyncio.gather(*[self.probe(worker) for worker in self.workers])
+            await asyncio.sleep(self.probe_interval)
+
+    async def probe(self, worker: WorkerEndpoint):
+        """Worker의 /readyz로 살아있는지(응답 여부)와 요청을 받을 수 있는지(200)를 확인합니다."""
+        try:
+            response = await self._client.get(f"{worker.base_url}/readyz", timeout=self.probe_timeout)
+            alive, ready, error = True, response.status_code == 200, None
+            if not ready:
+                error = f"readyz {response.status_code}"
+        except httpx.HTTPError as e:
+            alive, ready, error = False, False, repr(e)
+        worker.last_probe = time.monotonic()
+        if (alive, ready) != (worker.alive, worker.ready):
+            print(f"{'✅' if ready else '⚠️'} Worker 상태 변경: {worker.base_url} alive={alive} ready={ready}")
+        worker.alive, worker.ready = alive, ready
+        worker.last_error = error
+        if ready:
+            worker.consecutive_failures = 0
+        self.on_change(worker)
+
+    def mark_failed(self, worker: WorkerEndpoint, error: str):
+        """호출이 실패한 Worker를 다음 검사 전까지 고르지 않도록 표시합니다."""
+        worker.consecutive_failures += 1
+        worker.ready = False
+        worker.last_error = error
+        self.on_change(worker)
+
+    def pick(self, exclude: tuple = ()) -> WorkerEndpoint:
+        """
+        exclude에 없는 준비된 Worker 중 처리 중인 요청이 가장 적은 곳을 고릅니다. (같으면 무작위)
+
+        준비된 곳이 없으면 살아있는 곳, 그것도 없으면 아직 시도하지 않은 아무 곳이나 고릅니다.
+        (모든 Worker가 잠깐 실패로 표시된 사이에도 요청을 바로 버리지 않기 위해)
+        """
+        candidates = [worker for worker in self.workers if worker not in exclude]
+        if not candidates:
+            raise NoWorkerAvailable("요청을 보낼 수 있는 Worker가 없습니다.")
+        for usable in ([worker for worker in candidates if worker.ready],
+                       [worker for worker in candidates if worker.alive],
+                       candidates):
+            if usable:
+                fewest = min(worker.outstanding for worker in usable)
+                return random.choice([worker for worker in usable if worker.outstanding == fewest])
+
+    @asynccontextmanager
+    async def lease(self, exclude: tuple = ()):
+        """Worker 하나를 골라 요청하는 동안 처리 중인 요청 수에 더해 둡니다."""
+        worker = self.pick(exclude)
+        worker.outstanding += 1
+        self.on_change(worker)
+        try:
+            yield worker
+        finally:
+            worker.outstanding -= 1
+            self.on_change(worker)
+
+    def ready_count(self) -> int:
+        return sum(1 for worker in self.workers if worker.ready)
+
+    def status(self) -> list:
+        return [worker.status() for worker in self.workers]
@@ -0,0 +1,67 @@
+# tests/conftest.py
+# 서버 코드는 각 프로젝트 폴더 안에서 형제 모듈을 바로 import하므로, 테스트에서도 같은 경로를 추가합니다.
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ("", "model_project", "streamlit_project"):
+    sys.path.insert(0, os.path.join(ROOT, folder))
+
+# 테스트는 실제 모델 없이 가짜 엔진으로 실행합니다. (모듈 import 전에 설정)
+os.environ.setdefault("INFERENCE_ENGINE", "stub")
+os.environ.setdefault("MODEL_WARMUP", "0")
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def broker(tmp_path_factory):
+    """
+    파일 저장소를 모두 임시 폴더로 돌린 중개 서버 모듈 (main_api)을 한 번만 import해 반환합니다.
+
+    Worker 주소는 아무도 듣지 않는 포트이므로 Worker 호출은 실패합니다.
+    """
+    work_dir = tmp_path_factory.mktemp("broker")
+    os.environ.update({
+        "TASK_STORE": "memory",
+        "RESULTS_DB_URL": f"sqlite:///{work_dir}/results.db",
+        "VERDICT_CACHE_PATH": str(work_dir / "verdict_cache.db"),
+        "WORKER_BASE_URLS": "http://127.0.0.1:9",
+        "WORKER_PROBE_INTERVAL_SECONDS": "60",
+        "TASK_EVENT_POLL_SECONDS": "0.05",
+    })
+    import main_api
+    return main_api
+
+
+@pytest.fixture(scope="session")
+def broker_client(broker):
+    """
+    테스트 세션 동안 한 번만 시작하는 중개 서버 클라이언트
+
+    서버 종료 시 공용 스레드 풀과 기록기를 닫으므로, 실제 서버처럼 한 번 시작해 끝까지 씁니다.
+    """
+    from fastapi.testclient import TestClient
+    with TestClient(broker.app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def worker():
+    """가짜 엔진과 메모리 스토리지로 설정된 Worker 서버 모듈 (worker_api)을 반환합니다."""
+    import worker_api
+    return worker_api
+
+
+@pytest.fixture
+def worker_client(worker):
+    """모델 준비가 끝나 요청을 받을 수 있는 Worker 테스트 클라이언트"""
+    import time
+    from fastapi.testclient import TestClient
+    with TestClient(worker.app) as client:
+        deadline = time.monotonic() + 10
+        while not worker.serving_ready and time.monotonic() < deadline:
+            time.sleep(0.01)
+        yield client
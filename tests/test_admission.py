@@ -0,0 +1,100 @@
+# tests/test_admission.py
+import asyncio
+import io
+import uuid
+
+import pytest
+from PIL import Image
+
+from admission import AdmissionQueue, QueueFull
+
+
+def run_in_order(submissions: list, **options) -> list:
+    """
+    실행기 하나짜리 대기열에 (작업 이름, client_id, priority)들을 넣고 실제로 실행된 순서를 반환합니다.
+
+    첫 작업이 실행되는 동안 나머지를 모두 넣어, 대기열의 차례 정하기만 순서에 반영되게 합니다.
+    """
+    async def run():
+        queue = AdmissionQueue(concurrency=1, **options)
+        queue.start()
+        order, gate = [], asyncio.Event()
+
+        async def blocker():
+            await gate.wait()
+
+        def job(name):
+            async def record():
+                order.append(name)
+            return record
+
+        queue.submit(["blocker"], "setup", "interactive", blocker)
+        await asyncio.sleep(0)
+        for name, client_id, priority in submissions:
+            queue.submit([name], client_id, priority, job(name))
+        gate.set()
+        while queue.depth() or queue.running:
+            await asyncio.sleep(0.001)
+        await queue.close()
+        return order
+
+    return asyncio.run(run())
+
+
+def test_interactive_runs_before_bulk():
+    order = run_in_order([("b1", "a", "bulk"), ("i1", "a", "interactive"), ("b2", "b", "bulk"),
+                          ("i2", "b", "interactive")])
+    assert order == ["i1", "i2", "b1", "b2"]
+
+
+def test_clients_take_turns_within_a_priority():
+    # 클라이언트 a가 먼저 여러 개를 넣어도 b, c와 번갈아 처리
+    order = run_in_order([("a1", "a", "bulk"), ("a2", "a", "bulk"), ("a3", "a", "bulk"),
+                          ("b1", "b", "bulk"), ("c1", "c", "bulk"), ("b2", "b", "bulk")])
+    assert order == ["a1", "b1", "c1", "a2", "b2", "a3"]
+
+
+def test_rejects_over_total_depth_with_retry_after():
+    queue = AdmissionQueue(max_depth=3, max_per_client=10, concurrency=2, initial_item_seconds=2.0)
+    queue.submit(["t1", "t2", "t3"], "a", "bulk", None)
+    with pytest.raises(QueueFull) as error:
+        queue.submit(["t4"], "b", "interactive", None)
+    # 대기 3건 + 1건을 실행기 2개로 처리하는 시간 (2바퀴 x 2초)
+    assert error.value.retry_after == 4
+    assert queue.stats()["rejected"] == 1 and queue.depth() == 3
+
+
+def test_rejects_client_over_fair_share_but_admits_others():
+    queue = AdmissionQueue(max_depth=10, max_per_client=2)
+    queue.submit(["t1", "t2"], "greedy", "bulk", None)
+    with pytest.raises(QueueFull):
+        queue.check("greedy")
+    queue.check("polite")
+
+
+def test_position_counts_round_robin_turns():
+    queue = AdmissionQueue(max_depth=100, max_per_client=100, concurrency=1, initial_item_seconds=1.0)
+    for index in range(3):
+        queue.submit([f"a{index}"], "a", "bulk", None)
+    queue.submit(["b0"], "b", "bulk", None)
+    queue.submit(["i0"], "c", "interactive", None)
+    # b0 앞: interactive 1건 + a의 첫 작업 1건
+    assert queue.position("b0") == {"position": 3, "estimated_wait_seconds": 3.0}
+    assert queue.position("a2")["position"] == 5
+    assert queue.position("i0")["position"] == 1
+    assert queue.position("unknown") is None
+
+
+def png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    # 판별 결과 캐시에 걸리지 않도록 매번 다른 이미지
+    Image.new("RGB", (8, 8), (uuid.uuid4().int % 256, 0, 0)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_upload_gets_429_with_retry_after_when_queue_is_full(broker, broker_client, monkeypatch):
+    monkeypatch.setattr(broker.admission, "max_depth", 0)
+    response = broker_client.post("/upload/", files={"file": ("a.png", png_bytes(), "image/png")})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.json()["retry_after"] == int(response.headers["Retry-After"])
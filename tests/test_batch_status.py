@@ -0,0 +1,60 @@
+# tests/test_batch_status.py
+import threading
+import time
+import uuid
+
+
+def make_batch(broker, size: int):
+    batch_id = str(uuid.uuid4())
+    tasks = []
+    for index in range(size):
+        task_id = str(uuid.uuid4())
+        broker.create_task(task_id, {"status": "processing", "result": None, "batch_id": batch_id})
+        tasks.append({"task_id": task_id, "filename": f"{index}.png"})
+    broker.task_store.create(f"batch:{batch_id}", {"batch_id": batch_id, "tasks": tasks})
+    return batch_id, [task["task_id"] for task in tasks]
+
+
+def finish_later(client, broker, task_id, status="completed", delay=0.2):
+    def finish():
+        time.sleep(delay)
+        client.portal.call(lambda: broker.update_task(task_id, status=status, result={}))
+    thread = threading.Thread(target=finish)
+    thread.start()
+    return thread
+
+
+def test_batch_status_without_wait(broker, broker_client):
+    batch_id, task_ids = make_batch(broker, 2)
+    body = broker_client.get(f"/batch/{batch_id}").json()
+    assert (body["status"], body["total"], body["processing"], body["progress"]) == ("processing", 2, 2, 0.0)
+    for task_id in task_ids:
+        broker.update_task(task_id, status="failed", result={})
+
+
+def test_batch_long_poll_returns_when_an_item_finishes(broker, broker_client):
+    batch_id, task_ids = make_batch(broker, 3)
+    thread = finish_later(broker_client, broker, task_ids[1])
+    started = time.monotonic()
+    body = broker_client.get(f"/batch/{batch_id}", params={"wait": 10}).json()
+    thread.join()
+    assert time.monotonic() - started < 5
+    assert (body["completed"], body["processing"]) == (1, 2)
+    for task_id in (task_ids[0], task_ids[2]):
+        broker.update_task(task_id, status="completed", result={})
+    # 모두 끝난 일괄 작업은 기다리지 않음
+    started = time.monotonic()
+    body = broker_client.get(f"/batch/{batch_id}", params={"wait": 10}).json()
+    assert body["status"] == "completed" and time.monotonic() - started < 1
+
+
+def test_batch_long_poll_times_out_without_changes(broker, broker_client):
+    batch_id, task_ids = make_batch(broker, 1)
+    started = time.monotonic()
+    body = broker_client.get(f"/batch/{batch_id}", params={"wait": 0.2}).json()
+    assert body["status"] == "processing" and 0.2 <= time.monotonic() - started < 5
+    broker.update_task(task_ids[0], status="failed", result={})
+
+
+def test_unknown_batch_is_404(broker_client):
+    assert broker_client.get("/batch/nope", params={"wait": 1}).status_code == 404
@@ -0,0 +1,118 @@
+# tests/test_batcher.py
+import asyncio
+import threading
+import time
+
+from batcher import MicroBatcher
+
+
+class RecordingPredictor:
+    """받은 배치 크기를 기록하고 입력마다 (입력, 배치 번호)를 돌려주는 가짜 추론 함수"""
+
+    def __init__(self, delay: float = 0.0):
+        self.batches = []
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self, items):
+        with self.lock:
+            self.batches.append(list(items))
+            number = len(self.batches)
+        time.sleep(self.delay)
+        return [(item, number) for item in items]
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_flushes_when_batch_is_full():
+    predictor = RecordingPredictor()
+
+    async def scenario():
+        # 대기 시간을 길게 잡아도 크기가 차면 바로 처리되어야 함
+        batcher = MicroBatcher(predictor, max_batch_size=4, max_wait_ms=10_000)
+        await batcher.start()
+        started = time.monotonic()
+        results = await asyncio.gather(*[batcher.submit(i) for i in range(8)])
+        elapsed = time.monotonic() - started
+        await batcher.stop()
+        return results, elapsed
+
+    results, elapsed = run(scenario())
+    assert elapsed < 5
+    assert [len(batch) for batch in predictor.batches] == [4, 4]
+    # 각 호출자는 자기 입력의 결과만 받음
+    assert [item for item, _ in results] == list(range(8))
+
+
+def test_flushes_partial_batch_after_wait():
+    predictor = RecordingPredictor()
+
+    async def scenario():
+        batcher = MicroBatcher(predictor, max_batch_size=16, max_wait_ms=50)
+        await batcher.start()
+        started = time.monotonic()
+        results = await asyncio.gather(*[batcher.submit(i) for i in range(3)])
+        elapsed = time.monotonic() - started
+        await batcher.stop()
+        return results, elapsed
+
+    results, elapsed = run(scenario())
+    assert predictor.batches == [[0, 1, 2]]
+    assert 0.04 <= elapsed < 2
+    assert results == [(0, 1), (1, 1), (2, 1)]
+
+
+def test_requests_arriving_while_busy_form_next_batch():
+    predictor = RecordingPredictor(delay=0.1)
+
+    async def scenario():
+        batcher = MicroBatcher(predictor, max_batch_size=16, max_wait_ms=1)
+        await batcher.start()
+        first = asyncio.create_task(batcher.submit("a"))
+        await asyncio.sleep(0.03)  # 첫 배치가 추론 중일 때 들어온 요청들
+        rest = [asyncio.create_task(batcher.submit(item)) for item in "bcd"]
+        await asyncio.gather(first, *rest)
+        await batcher.stop()
+
+    run(scenario())
+    assert predictor.batches == [["a"], ["b", "c", "d"]]
+
+
+def test_batch_failure_fails_every_caller_in_batch():
+    def failing(items):
+        raise ValueError("model error")
+
+    async def scenario():
+        batcher = MicroBatcher(failing, max_batch_size=4, max_wait_ms=5)
+        await batcher.start()
+        results = await asyncio.gather(*[batcher.submit(i) for i in range(2)], return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    results = run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_stop_fails_queued_requests():
+    release = threading.Event()
+
+    def blocking(items):
+        release.wait(5)
+        return items
+
+    async def scenario():
+        batcher = MicroBatcher(blocking, max_batch_size=1, max_wait_ms=1)
+        await batcher.start()
+        busy = asyncio.create_task(batcher.submit("busy"))
+        await asyncio.sleep(0.05)
+        waiting = asyncio.create_task(batcher.submit("waiting"))
+        await asyncio.sleep(0.05)
+        await batcher.stop()
+        release.set()
+        busy.cancel()
+        return await asyncio.gather(waiting, return_exceptions=True)
+
+    (result,) = run(scenario())
+    assert isinstance(result, RuntimeError)
@@ -0,0 +1,101 @@
+# tests/test_bulk_scan.py
+import argparse
+import csv
+import json
+import os
+
+import pytest
+from PIL import Image
+
+import bulk_scan
+import predict
+
+NAMES = ["a/1.png", "a/2.png", "a/b/3.png", "a-b/4.png", "c/5.png", "c/6.png", "c/7.png", "root.png"]
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    root = tmp_path / "images"
+    for index, name in enumerate(NAMES):
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        Image.new("RGB", (16, 16), (index * 30, 0, 0)).save(path)
+    (root / "notes.txt").write_text("not an image")
+    return root
+
+
+def make_args(image_dir, output, **overrides) -> argparse.Namespace:
+    options = dict(dir=str(image_dir), prefix=None, output=str(output), checkpoint=None, restart=False,
+                   batch_size=3, prefetch_batches=1, decode_workers=2, decode_mode="thread",
+                   progress_interval=60.0, no_count=True)
+    options.update(overrides)
+    return argparse.Namespace(**options)
+
+
+def interrupt_after(monkeypatch, batches: int):
+    """batches번째 배치를 판별한 다음 배치에서 Ctrl+C가 들어온 것처럼 멈춥니다."""
+    real = predict.predict_deepfake_batch_with_stage
+    calls = []
+
+    def predict_then_interrupt(images):
+        calls.append(len(images))
+        if len(calls) > batches:
+            raise KeyboardInterrupt
+        return real(images)
+
+    monkeypatch.setattr(predict, "predict_deepfake_batch_with_stage", predict_then_interrupt)
+
+
+def read_items(output) -> list:
+    if str(output).endswith(".csv"):
+        with open(output, newline="", encoding="utf-8") as f:
+            return [row["item"] for row in csv.DictReader(f)]
+    with open(output, encoding="utf-8") as f:
+        return [json.loads(line)["item"] for line in f]
+
+
+def test_iter_directory_is_sorted_and_resumes_after_item(image_dir):
+    expected = sorted(NAMES, key=lambda name: name.split("/"))
+    assert list(bulk_scan.iter_directory(str(image_dir))) == expected
+    assert list(bulk_scan.iter_directory(str(image_dir), "a/b/3.png")) == expected[expected.index("a/b/3.png") + 1:]
+
+
+@pytest.mark.parametrize("suffix", ["jsonl", "csv"])
+def test_resume_after_interrupt_has_no_duplicates(image_dir, tmp_path, monkeypatch, suffix):
+    output = tmp_path / f"scan.{suffix}"
+    with monkeypatch.context() as patch:
+        interrupt_after(patch, batches=1)
+        assert bulk_scan.scan(make_args(image_dir, output)) == 130
+    assert len(read_items(output)) == 3
+    # 체크포인트 뒤에 반쯤 쓰인 결과가 남아 있어도 이어서 처리할 때 잘라냄
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"item": "torn')
+
+    assert bulk_scan.scan(make_args(image_dir, output)) == 0
+    items = read_items(output)
+    assert sorted(items) == sorted(NAMES) and len(items) == len(set(items))
+    with open(f"{output}.checkpoint.json", encoding="utf-8") as f:
+        assert json.load(f)["done"] == len(NAMES)
+
+
+def test_checkpoint_for_other_source_is_refused(image_dir, tmp_path, monkeypatch):
+    output = tmp_path / "scan.jsonl"
+    with monkeypatch.context() as patch:
+        interrupt_after(patch, batches=1)
+        bulk_scan.scan(make_args(image_dir, output))
+    other_dir = tmp_path / "other"
+    other_dir.mkdir()
+    assert bulk_scan.scan(make_args(other_dir, output)) == 2
+    # --restart면 체크포인트를 무시하고 처음부터
+    assert bulk_scan.scan(make_args(image_dir, output, restart=True)) == 0
+    assert sorted(read_items(output)) == sorted(NAMES)
+
+
+def test_undecodable_item_is_recorded_as_error(image_dir, tmp_path):
+    (image_dir / "c" / "broken.png").write_bytes(b"not a png")
+    output = tmp_path / "scan.jsonl"
+    assert bulk_scan.scan(make_args(image_dir, output)) == 0
+    with open(output, encoding="utf-8") as f:
+        rows = {row["item"]: row for row in map(json.loads, f)}
+    assert "error" in rows["c/broken.png"]
+    assert rows["c/5.png"]["model_result"] in ("Real", "Fake")
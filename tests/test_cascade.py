@@ -0,0 +1,55 @@
+# tests/test_cascade.py
+import pytest
+from PIL import Image
+
+import predict
+from preprocess import FastPreprocessor
+from stub_engine import StubImageClassifier
+
+
+class RecordingClassifier(StubImageClassifier):
+    """채점한 입력의 모양을 기록하는 가짜 분류기"""
+
+    def __init__(self, input_size=None):
+        super().__init__(batch_latency_ms=0, item_latency_ms=0, input_size=input_size)
+        self.shapes = []
+
+    def predict_pixel_values(self, pixel_values):
+        self.shapes.append(pixel_values.shape)
+        return super().predict_pixel_values(pixel_values)
+
+
+@pytest.fixture
+def cascade(monkeypatch):
+    """112px 선별 엔진과 224px 전체 모델로 2단계 추론을 켭니다."""
+    predict.load_model(warmup=False)
+    full, screen = RecordingClassifier(), RecordingClassifier(input_size=112)
+    monkeypatch.setattr(predict, "pipe", full)
+    monkeypatch.setattr(predict, "screener", screen)
+    monkeypatch.setattr(predict, "screen_preprocessor", FastPreprocessor(screen.image_processor))
+    monkeypatch.setattr(predict, "CASCADE_BAND_LOW", 0.2)
+    monkeypatch.setattr(predict, "CASCADE_BAND_HIGH", 0.8)
+    return full, screen
+
+
+def test_screen_runs_at_reduced_size_and_escalates_only_uncertain(cascade):
+    full, screen = cascade
+    # 가짜 엔진의 Fake 확률: 검은색 ~0.12, 회색 ~0.5(애매함), 흰색 ~0.88
+    images = [Image.new("RGB", (300, 200), color) for color in ("black", "gray", "white")]
+    results = predict.predict_deepfake_batch_with_stage(images)
+    assert [stage for _, _, stage in results] == ["screen", "full", "screen"]
+    assert screen.shapes == [(3, 3, 112, 112)]
+    # 전체 모델 크기의 전처리와 추론은 애매한 이미지에만
+    assert full.shapes == [(1, 3, 224, 224)]
+
+
+def test_confident_batch_never_reaches_full_model(cascade):
+    full, _ = cascade
+    images = [Image.new("RGB", (64, 64), color) for color in ("black", "white")]
+    assert [stage for _, _, stage in predict.predict_deepfake_batch_with_stage(images)] == ["screen", "screen"]
+    assert full.shapes == []
+
+
+def test_pytorch_cannot_run_at_reduced_size():
+    with pytest.raises(ValueError):
+        predict._load_engine("pytorch", input_size=112)
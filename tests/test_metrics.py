@@ -0,0 +1,70 @@
+# tests/test_metrics.py
+import pytest
+
+from common.metrics import Counter, Gauge, Histogram, Registry, STAGE_ERRORS, STAGE_SECONDS, track_stage
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    # 테스트용 지표가 전역 레지스트리에 남지 않도록 따로 모읍니다.
+    registry = Registry()
+    monkeypatch.setattr("common.metrics.REGISTRY", registry)
+    return registry
+
+
+def test_counter_and_gauge_render(registry):
+    requests = Counter("test_requests_total", "요청 수", ("route",))
+    in_flight = Gauge("test_in_flight", "처리 중")
+    requests.inc(route="/a")
+    requests.inc(2, route="/a")
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+    lines = registry.render().splitlines()
+    assert 'test_requests_total{route="/a"} 3' in lines
+    assert "test_in_flight 1" in lines
+    assert "# TYPE test_requests_total counter" in lines
+
+
+def test_gauge_function_is_read_at_render(registry):
+    depth = Gauge("test_depth", "대기열 길이")
+    queue = [1, 2]
+    depth.set_function(lambda: len(queue))
+    queue.append(3)
+    assert "test_depth 3" in registry.render().splitlines()
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    seconds = Histogram("test_seconds", "시간", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        seconds.observe(value)
+    lines = registry.render().splitlines()
+    assert 'test_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{le="+Inf"} 3' in lines
+    assert "test_seconds_count 3" in lines
+
+
+def test_labels_must_match(registry):
+    requests = Counter("test_labels_total", "요청 수", ("route",))
+    with pytest.raises(ValueError):
+        requests.inc(method="GET")
+
+
+def test_duplicate_names_are_rejected(registry):
+    Counter("test_dup_total", "중복")
+    with pytest.raises(ValueError):
+        Counter("test_dup_total", "중복")
+
+
+def test_track_stage_records_time_and_errors():
+    timings = {}
+    errors = STAGE_ERRORS._values.get(("test_stage",), 0)
+    with track_stage("test_stage", timings):
+        pass
+    assert "test_stage" in timings
+    with pytest.raises(RuntimeError):
+        with track_stage("test_stage"):
+            raise RuntimeError("boom")
+    assert STAGE_ERRORS._values[("test_stage",)] == errors + 1
+    assert STAGE_SECONDS._values[("test_stage",)][0][-1] == 2
@@ -0,0 +1,47 @@
+# tests/test_onnx_engine.py
+import os
+import subprocess
+import sys
+
+import pytest
+
+import onnx_engine
+
+MODEL_PROJECT = os.path.dirname(os.path.abspath(onnx_engine.__file__))
+
+
+def test_cache_dir_is_keyed_by_revision():
+    first = onnx_engine.get_cache_dir("org/model", "abc123")
+    second = onnx_engine.get_cache_dir("org/model", "def456")
+    assert first != second
+    assert first.endswith(os.path.join("org--model", "abc123"))
+
+
+def test_branch_revision_stays_one_folder():
+    path = onnx_engine.get_cache_dir("org/model", "refs/pr/1")
+    assert os.path.basename(path) == "refs--pr--1"
+
+
+def test_default_source_is_pinned_snapshot(monkeypatch, tmp_path):
+    import predict
+    monkeypatch.setattr(predict, "ensure_snapshot", lambda: str(tmp_path))
+    assert onnx_engine.default_source(predict.MODEL_ID, predict.MODEL_REVISION) == str(tmp_path)
+    # 다른 리비전은 스냅샷 대신 허브의 해당 리비전에서 읽음
+    assert onnx_engine.default_source(predict.MODEL_ID, "other-revision") is None
+
+
+def test_reduced_input_size_gets_its_own_cache_dir():
+    full = onnx_engine.get_cache_dir("org/model", "abc123")
+    reduced = onnx_engine.get_cache_dir("org/model", "abc123", input_size=112)
+    assert reduced == os.path.join(full, "112px")
+
+
+@pytest.mark.parametrize("revision, ok", [("main", False), ("", False), ("a" * 40, True)])
+def test_real_engine_requires_commit_hash_revision(revision, ok):
+    # predict는 import할 때 설정을 검사하므로 새 프로세스에서 확인
+    env = {**os.environ, "INFERENCE_ENGINE": "onnx", "MODEL_REVISION": revision}
+    completed = subprocess.run([sys.executable, "-c", "import predict"], cwd=MODEL_PROJECT, env=env,
+                               capture_output=True, text=True)
+    assert (completed.returncode == 0) == ok
+    if not ok:
+        assert "MODEL_REVISION" in completed.stderr
@@ -0,0 +1,46 @@
+# tests/test_preprocess.py
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from preprocess import PIXEL_TOLERANCE, FastPreprocessor
+
+
+@pytest.fixture(scope="module")
+def image_processor():
+    """실제 모델(ViT)과 같은 기본 설정의 Hugging Face 이미지 프로세서"""
+    transformers = pytest.importorskip("transformers")
+    return transformers.ViTImageProcessor()
+
+
+def noise_image(width: int, height: int) -> Image.Image:
+    pixels = np.random.default_rng(width * height).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    return Image.fromarray(pixels)
+
+
+def jpeg_bytes(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("size", [(300, 200), (224, 224), (97, 150)])
+def test_pixel_values_match_hugging_face_without_draft(image_processor, size):
+    preprocessor = FastPreprocessor(image_processor, use_draft=False)
+    image = preprocessor.decode(jpeg_bytes(noise_image(*size)))
+    reference = image_processor(image, return_tensors="np")["pixel_values"].astype(np.float32)
+    pixel_values = preprocessor.to_pixel_values([image])
+    assert pixel_values.shape == reference.shape == (1, 3, 224, 224)
+    assert np.abs(pixel_values - reference).max() <= PIXEL_TOLERANCE
+
+
+@pytest.mark.parametrize("size", [(1600, 1200), (2000, 300), (230, 1800)])
+def test_draft_decode_never_goes_below_model_input(image_processor, size):
+    preprocessor = FastPreprocessor(image_processor, use_draft=True)
+    image = preprocessor.decode(jpeg_bytes(noise_image(*size)))
+    # DCT 축소 디코딩은 원본보다 작게 읽더라도 가로/세로 모두 모델 입력 크기 이상을 유지
+    assert image.width >= preprocessor.width and image.height >= preprocessor.height
+    assert image.width <= size[0] and image.height <= size[1]
+    assert preprocessor.to_pixel_values([image]).shape == (1, 3, 224, 224)
@@ -0,0 +1,55 @@
+# tests/test_replica_pool.py
+import asyncio
+import io
+
+from PIL import Image
+
+import predict
+from batcher import MicroBatcher
+from replica_pool import ReplicaPool, predict_items
+
+
+def png_bytes(color=(10, 20, 30)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_corrupt_item_fails_only_its_own_slot():
+    results = predict_items([png_bytes(), b"not an image", png_bytes((200, 0, 0))])
+    assert isinstance(results[1], ValueError)
+    for result in (results[0], results[2]):
+        label, score, stage = result
+        assert label in ("Real", "Fake") and 0.0 <= score <= 1.0 and stage == "full"
+
+
+def test_batch_of_only_corrupt_items():
+    results = predict_items([b"", b"garbage"])
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_batcher_resolves_each_caller_separately():
+    async def scenario():
+        batcher = MicroBatcher(predict_items, max_batch_size=8, max_wait_ms=20)
+        await batcher.start()
+        results = await asyncio.gather(batcher.submit(png_bytes()), batcher.submit(b"broken"),
+                                       batcher.submit(png_bytes((0, 0, 255))), return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    good, bad, other = asyncio.run(scenario())
+    assert isinstance(bad, ValueError)
+    assert good[2] == other[2] == "full"
+
+
+def test_pool_runs_without_torch_for_non_pytorch_engine():
+    # 테스트 환경에는 torch가 없으므로, 가짜 엔진 복제본이 torch 없이 시작/추론되는지 확인
+    predict.load_model(warmup=False)
+    pool = ReplicaPool(1)
+    pool.start()
+    try:
+        results = pool.predict_batch([png_bytes(), b"broken"])
+    finally:
+        pool.stop()
+    assert results[0][2] == "full"
+    assert isinstance(results[1], ValueError)
@@ -0,0 +1,73 @@
+# tests/test_report_archive.py
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from report_archive import ReportArchive
+
+
+def png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return ReportArchive(root_dir=str(tmp_path / "reports"), max_per_owner=2)
+
+
+def test_owner_token_roundtrip(archive):
+    token = archive.issue_owner_token()
+    owner = archive.verify_owner_token(token)
+    assert owner and token.startswith(owner + ".")
+
+
+@pytest.mark.parametrize("token", [None, "", "abc", "abc.", "abc.0123456789abcdef0123456789abcdef"])
+def test_owner_token_rejects_unsigned(archive, token):
+    assert archive.verify_owner_token(token) is None
+
+
+def test_owner_token_rejects_other_owner(archive):
+    _, _, signature = archive.issue_owner_token().partition(".")
+    other = archive.verify_owner_token(archive.issue_owner_token())
+    assert archive.verify_owner_token(f"{other}.{signature}") is None
+
+
+def test_owner_secret_survives_restart(tmp_path):
+    token = ReportArchive(root_dir=str(tmp_path / "reports")).issue_owner_token()
+    assert ReportArchive(root_dir=str(tmp_path / "reports")).verify_owner_token(token) is not None
+    assert ReportArchive(root_dir=str(tmp_path / "other")).verify_owner_token(token) is None
+
+
+def test_original_is_served_only_to_its_owner(archive):
+    report_id = archive.add("alice", "a.png", png_bytes(), {"predict": "Real", "prob": "0.9"})
+    assert archive.load_original("alice", report_id) == png_bytes()
+    assert archive.load_original("mallory", report_id) is None
+
+
+def test_list_page_and_prune(archive):
+    ids = [archive.add("alice", f"{index}.png", png_bytes(), {"predict": "Real"}) for index in range(3)]
+    # 사용자별 최대 보관 개수(2)를 넘은 가장 오래된 리포트는 원본까지 삭제
+    assert archive.count("alice") == 2
+    assert archive.load_original("alice", ids[0]) is None
+    page = archive.list_page("alice", 0, 10)
+    assert {report["id"] for report in page} == set(ids[1:])
+    assert all(report["thumbnail"] for report in page)
+    assert archive.count("bob") == 0
+
+
+def test_failed_insert_leaves_no_original_file(archive, monkeypatch):
+    import sqlite3
+    import uuid
+
+    fixed = uuid.uuid4()
+    monkeypatch.setattr("report_archive.uuid.uuid4", lambda: fixed)
+    report_id = archive.add("alice", "a.png", png_bytes(), {"predict": "Real"})
+    assert report_id == fixed.hex
+    # 같은 ID로 INSERT가 실패하면 원본(임시 파일 포함)이 남지 않음
+    with pytest.raises(sqlite3.IntegrityError):
+        archive.add("alice", "b.jpg", png_bytes(), {"predict": "Fake"})
+    assert os.listdir(archive.originals_dir) == [f"{report_id}.png"]
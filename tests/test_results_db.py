@@ -0,0 +1,89 @@
+# tests/test_results_db.py
+import pytest
+
+from results_db import ResultsRecorder
+
+
+@pytest.fixture
+def recorder(tmp_path):
+    # 백그라운드 기록은 끄고 테스트에서 직접 flush()합니다.
+    recorder = ResultsRecorder(db_url=f"sqlite:///{tmp_path}/results.db", flush_interval_ms=60_000,
+                               flush_batch_size=10_000, flush_max_attempts=2, max_pending=5)
+    yield recorder
+    recorder.close()
+
+
+def completed(label: str, confidence: float, cached: bool = False) -> dict:
+    return {"model_result": label, "confidence": confidence, "cached": cached, "model_id": "m@1"}
+
+
+def test_rollups_count_labels_and_confidence(recorder):
+    recorder.record("t1", "completed", completed("Fake", 0.9))
+    recorder.record("t2", "completed", completed("Fake", 0.7, cached=True))
+    recorder.record("t3", "completed", completed("Real", 0.6))
+    recorder.record("t4", "failed", {"error": "boom"})
+    recorder.flush()
+    for granularity in ("hour", "day"):
+        stats = recorder.stats(granularity)
+        assert stats["totals"]["Fake"] == {"count": 2, "cached_count": 1, "mean_confidence": pytest.approx(0.8)}
+        assert stats["totals"]["Real"]["count"] == 1
+        assert stats["totals"]["error"] == {"count": 1, "cached_count": 0, "mean_confidence": None}
+        assert len(stats["buckets"]) == 1
+        assert stats["buckets"][0]["Fake"] == 2
+
+
+def test_each_task_is_counted_once(recorder):
+    recorder.record("t1", "completed", completed("Fake", 0.9))
+    recorder.record("t1", "completed", completed("Fake", 0.9))
+    recorder.flush()
+    recorder.record("t1", "completed", completed("Fake", 0.9))
+    recorder.flush()
+    assert recorder.stats()["totals"]["Fake"]["count"] == 1
+
+
+def test_category_is_counted_once_per_task(recorder):
+    recorder.record("t1", "completed", completed("Fake", 0.9))
+    recorder.set_category("t1", "인물")
+    recorder.set_category("t1", "풍경")
+    recorder.set_category("unknown", "인물")
+    recorder.flush()
+    assert recorder.stats()["categories"] == [{"category": "인물", "count": 1}]
+
+
+def test_bad_row_is_dropped_after_max_attempts(recorder):
+    recorder.record("t1", "completed", completed("Fake", 0.9))
+    recorder.record(None, "completed", completed("Fake", 0.9))  # task_id NOT NULL 위반
+    recorder.record("t2", "completed", completed("Real", 0.6))
+    with pytest.raises(Exception):
+        recorder.flush()
+    assert recorder.stats()["totals"] == {}
+    # 두 번째 실패에서 묶음을 나눠 정상 행은 기록하고 문제 행만 버림
+    recorder.flush()
+    assert recorder.dropped == 1
+    totals = recorder.stats()["totals"]
+    assert totals["Fake"]["count"] == 1 and totals["Real"]["count"] == 1
+
+
+def test_batch_is_kept_while_db_is_unreachable(recorder, monkeypatch):
+    def fail(results, categories):
+        raise ConnectionError("db down")
+
+    monkeypatch.setattr(recorder, "_write", fail)
+    monkeypatch.setattr(recorder, "_reachable", lambda: False)
+    recorder.record("t1", "completed", completed("Fake", 0.9))
+    for _ in range(5):
+        with pytest.raises(ConnectionError):
+            recorder.flush()
+    assert recorder.dropped == 0
+    monkeypatch.undo()
+    recorder.flush()
+    assert recorder.stats()["totals"]["Fake"]["count"] == 1
+
+
+def test_pending_buffer_is_bounded(recorder):
+    for index in range(8):
+        recorder.record(f"t{index}", "completed", completed("Fake", 0.9))
+    # 가장 오래된 3건을 버리고 최근 5건만 기록
+    assert recorder.dropped == 3
+    recorder.flush()
+    assert recorder.stats()["totals"]["Fake"]["count"] == 5
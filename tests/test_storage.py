@@ -0,0 +1,98 @@
+# tests/test_storage.py
+import io
+import os
+
+import pytest
+
+from common import storage as storage_module
+from common.storage import LocalStorage, MemoryStorage, object_key
+
+KEYS = [
+    "2025-10-01/a.png", "2025-10-01/a/b.png", "2025-10-01/a-b/c.png", "2025-10-01/a0.png",
+    "2025-10-02/x.png", "2025-10-10/y.png", "2025-11-01/z.png", "root.png",
+]
+
+
+@pytest.fixture(params=["local", "memory"])
+def backend(request, tmp_path):
+    if request.param == "local":
+        return LocalStorage(str(tmp_path / "bucket"))
+    return MemoryStorage()
+
+
+@pytest.fixture
+def filled(backend):
+    for key in KEYS:
+        backend.put(key, key.encode())
+    return backend
+
+
+def test_put_get_roundtrip(backend):
+    backend.put("2025-10-01/a.png", b"data")
+    assert backend.get("2025-10-01/a.png") == b"data"
+    buffer = io.BytesIO()
+    backend.download_fileobj("2025-10-01/a.png", buffer)
+    assert buffer.getvalue() == b"data"
+
+
+def test_multipart_upload(backend):
+    upload_id = backend.create_multipart_upload("big.bin")
+    etags = [backend.upload_part("big.bin", upload_id, number, bytes([number]) * 3) for number in (1, 2)]
+    # 진행 중인 업로드의 파트는 목록에 보이지 않음
+    assert list(backend.list_keys()) == []
+    backend.complete_multipart_upload("big.bin", upload_id, etags)
+    assert backend.get("big.bin") == b"\x01\x01\x01\x02\x02\x02"
+    assert list(backend.list_keys()) == ["big.bin"]
+
+
+@pytest.mark.parametrize("prefix", ["", "2025-10-", "2025-10-01/a", "2025-10-0", "nothing"])
+@pytest.mark.parametrize("start_after", [None, "2025-10-01/a.png", "2025-10-01/a/", "2025-10-05", "zzz"])
+def test_list_keys_matches_sorted_listing(filled, prefix, start_after):
+    expected = sorted(key for key in KEYS
+                      if key.startswith(prefix) and (start_after is None or key > start_after))
+    assert list(filled.list_keys(prefix, start_after=start_after)) == expected
+
+
+def test_get_many_and_put_many(backend):
+    assert backend.put_many([("k1", b"1"), ("k2", b"2")]) == [True, True]
+    assert backend.get_many(["k1", "missing", "k2"]) == [b"1", None, b"2"]
+
+
+def test_local_list_keys_is_lazy(tmp_path, monkeypatch):
+    local = LocalStorage(str(tmp_path / "bucket"))
+    for day in range(1, 21):
+        local.put(f"2025-10-{day:02d}/image.png", b"x")
+    opened = []
+    real_scandir = os.scandir
+
+    def counting_scandir(path):
+        opened.append(path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(storage_module.os, "scandir", counting_scandir)
+    keys = local.list_keys()
+    assert next(keys) == "2025-10-01/image.png"
+    # 첫 키를 반환할 때까지는 루트와 첫 폴더만 열어 봄
+    assert len(opened) == 2
+    opened.clear()
+    assert next(local.list_keys(start_after="2025-10-18/image.png")) == "2025-10-19/image.png"
+    # start_after 이전 폴더는 열지 않음 (루트, start_after가 든 폴더, 다음 폴더)
+    assert len(opened) == 3
+
+
+def test_local_storage_rejects_keys_outside_root(tmp_path):
+    local = LocalStorage(str(tmp_path / "bucket"))
+    with pytest.raises(ValueError):
+        local.put("../escape.png", b"x")
+
+
+def test_local_storage_skips_temp_files(tmp_path):
+    local = LocalStorage(str(tmp_path / "bucket"))
+    local.put("a.png", b"x")
+    (tmp_path / "bucket" / "a.png.123.tmp").write_bytes(b"partial")
+    assert list(local.list_keys()) == ["a.png"]
+
+
+def test_object_key_uses_date_folder():
+    from datetime import datetime
+    assert object_key("x.png", datetime(2025, 10, 3)) == "2025-10-03/x.png"
@@ -0,0 +1,95 @@
+# tests/test_task_events.py
+import asyncio
+import json
+import threading
+import time
+import uuid
+
+from task_events import TaskEvents
+
+
+def test_notify_wakes_waiter():
+    async def scenario():
+        events = TaskEvents()
+        waiter = asyncio.create_task(events.wait("t1", timeout=5))
+        await asyncio.sleep(0.01)
+        events.notify("t1")
+        return await waiter, events
+
+    woken, events = asyncio.run(scenario())
+    assert woken is True
+    assert events._events == {} and events._waiters == {}
+
+
+def test_wait_times_out_and_cleans_up():
+    async def scenario():
+        events = TaskEvents()
+        woken = await events.wait("t1", timeout=0.02)
+        return woken, events
+
+    woken, events = asyncio.run(scenario())
+    assert woken is False
+    assert events._events == {} and events._waiters == {}
+
+
+def test_notify_without_waiters_is_noop():
+    events = TaskEvents()
+    events.notify("nobody")
+    assert events._events == {}
+
+
+def test_one_notify_wakes_every_waiter():
+    async def scenario():
+        events = TaskEvents()
+        waiters = [asyncio.create_task(events.wait("t1", timeout=5)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        events.notify("t1")
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(scenario()) == [True, True, True]
+
+
+def complete_later(client, broker, task_id, delay=0.2):
+    """delay초 뒤 서버 이벤트 루프에서 작업을 완료 처리합니다."""
+    def complete():
+        time.sleep(delay)
+        client.portal.call(lambda: broker.update_task(task_id, status="completed", result={"model_result": "Real"}))
+    thread = threading.Thread(target=complete)
+    thread.start()
+    return thread
+
+
+def test_status_long_poll_returns_on_completion(broker, broker_client):
+    task_id = str(uuid.uuid4())
+    broker.create_task(task_id, {"status": "processing", "result": None})
+    thread = complete_later(broker_client, broker, task_id)
+    started = time.monotonic()
+    response = broker_client.get(f"/status/{task_id}", params={"wait": 10})
+    thread.join()
+    assert response.json()["status"] == "completed"
+    assert time.monotonic() - started < 5
+
+
+def test_status_long_poll_times_out_with_current_state(broker, broker_client):
+    task_id = str(uuid.uuid4())
+    broker.create_task(task_id, {"status": "processing", "result": None})
+    started = time.monotonic()
+    response = broker_client.get(f"/status/{task_id}", params={"wait": 0.2})
+    assert response.json()["status"] == "processing"
+    assert 0.2 <= time.monotonic() - started < 5
+    broker.update_task(task_id, status="failed", result={})
+
+
+def test_events_stream_ends_after_terminal_status(broker, broker_client):
+    task_id = str(uuid.uuid4())
+    broker.create_task(task_id, {"status": "processing", "result": None})
+    thread = complete_later(broker_client, broker, task_id)
+    with broker_client.stream("GET", f"/events/{task_id}") as response:
+        payloads = [json.loads(line[len("data: "):]) for line in response.iter_lines() if line.startswith("data: ")]
+    thread.join()
+    assert [payload["status"] for payload in payloads] == ["processing", "completed"]
+
+
+def test_unknown_task_is_404(broker_client):
+    assert broker_client.get("/status/nope").status_code == 404
+    assert broker_client.get("/events/nope").status_code == 404
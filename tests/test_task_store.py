@@ -0,0 +1,103 @@
+# tests/test_task_store.py
+import time
+
+import pytest
+
+from task_store import MemoryTaskStore, SqliteTaskStore, create_task_store
+
+
+def test_memory_store_create_update_get():
+    store = MemoryTaskStore()
+    store.create("t1", {"status": "processing", "result": None})
+    store.update("t1", status="completed", result={"model_result": "Real"})
+    assert store.get("t1") == {"status": "completed", "result": {"model_result": "Real"}}
+    assert store.get("missing") is None
+
+
+def test_memory_store_returns_copies():
+    store = MemoryTaskStore()
+    store.create("t1", {"status": "processing"})
+    store.get("t1")["status"] = "tampered"
+    assert store.get("t1")["status"] == "processing"
+
+
+def test_memory_store_expires_after_ttl():
+    store = MemoryTaskStore(ttl_seconds=0.05)
+    store.create("t1", {"status": "processing"})
+    time.sleep(0.1)
+    assert store.get("t1") is None
+
+
+def test_memory_store_update_refreshes_ttl_and_eviction_order():
+    store = MemoryTaskStore(ttl_seconds=0.15)
+    store.create("old", {"status": "processing"})
+    store.create("fresh", {"status": "processing"})
+    time.sleep(0.1)
+    store.update("old", status="completed")
+    time.sleep(0.1)
+    # 새로 만든 작업이 정리될 때 갱신된 작업은 남음
+    store.create("trigger", {"status": "processing"})
+    assert store.get("fresh") is None
+    assert store.get("old") == {"status": "completed"}
+
+
+def test_memory_store_drops_oldest_over_max_tasks():
+    store = MemoryTaskStore(max_tasks=2)
+    for task_id in ("a", "b", "c"):
+        store.create(task_id, {"status": "processing"})
+    assert store.get("a") is None
+    assert store.get("b") is not None and store.get("c") is not None
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    store = SqliteTaskStore(db_path=str(tmp_path / "tasks.db"), flush_interval_ms=10_000)
+    yield store
+    store.close()
+
+
+def test_sqlite_store_reads_buffered_then_flushed(sqlite_store):
+    sqlite_store.create("t1", {"status": "processing"})
+    assert sqlite_store.get("t1") == {"status": "processing"}
+    sqlite_store.flush()
+    sqlite_store.update("t1", status="completed")
+    sqlite_store.flush()
+    assert sqlite_store._read("t1") == {"status": "completed"}
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path, sqlite_store):
+    sqlite_store.create("t1", {"status": "completed"})
+    sqlite_store.flush()
+    other = SqliteTaskStore(db_path=str(tmp_path / "tasks.db"))
+    try:
+        assert other.get("t1") == {"status": "completed"}
+    finally:
+        other.close()
+
+
+def test_sqlite_store_expires_after_ttl(tmp_path):
+    store = SqliteTaskStore(db_path=str(tmp_path / "tasks.db"), ttl_seconds=0.05, flush_interval_ms=10_000)
+    try:
+        store.create("t1", {"status": "completed"})
+        store.flush()
+        time.sleep(0.1)
+        assert store.get("t1") is None
+    finally:
+        store.close()
+
+
+def test_sqlite_store_close_flushes_pending(tmp_path):
+    store = SqliteTaskStore(db_path=str(tmp_path / "tasks.db"), flush_interval_ms=10_000)
+    store.create("t1", {"status": "completed"})
+    store.close()
+    reopened = SqliteTaskStore(db_path=str(tmp_path / "tasks.db"))
+    try:
+        assert reopened.get("t1") == {"status": "completed"}
+    finally:
+        reopened.close()
+
+
+def test_create_task_store_rejects_unknown_kind(monkeypatch):
+    monkeypatch.setenv("TASK_STORE", "redis")
+    with pytest.raises(ValueError):
+        create_task_store()
@@ -0,0 +1,85 @@
+# tests/test_ttl_cache.py
+import asyncio
+
+import pytest
+
+from ttl_cache import AsyncTTLCache
+
+
+class Source:
+    """호출 횟수를 세고, 필요하면 실패하거나 천천히 답하는 가짜 외부 API"""
+
+    def __init__(self, delay: float = 0.0):
+        self.calls = 0
+        self.delay = delay
+        self.fail = False
+
+    async def fetch(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return f"value-{self.calls}"
+
+
+def test_hit_then_stale_then_miss():
+    async def run():
+        cache, source = AsyncTTLCache(ttl_seconds=0.05, stale_seconds=0.1), Source()
+        assert await cache.get("k", source.fetch) == ("value-1", "miss")
+        assert await cache.get("k", source.fetch) == ("value-1", "hit")
+        await asyncio.sleep(0.07)
+        # TTL이 지나도 stale 구간에서는 이전 값을 바로 주고 백그라운드에서 갱신
+        assert await cache.get("k", source.fetch) == ("value-1", "stale")
+        await asyncio.sleep(0.01)
+        assert await cache.get("k", source.fetch) == ("value-2", "hit")
+        await asyncio.sleep(0.2)
+        assert await cache.get("k", source.fetch) == ("value-3", "miss")
+        return cache.stats()
+
+    assert asyncio.run(run()) == {"entries": 1, "hits": 2, "stale_hits": 1, "misses": 2, "refreshing": 0}
+
+
+def test_concurrent_misses_share_one_fetch():
+    async def run():
+        cache, source = AsyncTTLCache(ttl_seconds=10), Source(delay=0.05)
+        results = await asyncio.gather(*[cache.get("k", source.fetch) for _ in range(10)])
+        return source.calls, {value for value, _ in results}
+
+    assert asyncio.run(run()) == (1, {"value-1"})
+
+
+def test_failed_fetch_is_not_stored():
+    async def run():
+        cache, source = AsyncTTLCache(ttl_seconds=10), Source()
+        source.fail = True
+        with pytest.raises(RuntimeError):
+            await cache.get("k", source.fetch)
+        source.fail = False
+        return await cache.get("k", source.fetch)
+
+    assert asyncio.run(run()) == ("value-2", "miss")
+
+
+def test_failed_refresh_keeps_stale_value():
+    async def run():
+        cache, source = AsyncTTLCache(ttl_seconds=0.02, stale_seconds=10), Source()
+        await cache.get("k", source.fetch)
+        await asyncio.sleep(0.03)
+        source.fail = True
+        first = await cache.get("k", source.fetch)
+        await asyncio.sleep(0.01)
+        return first, await cache.get("k", source.fetch)
+
+    assert asyncio.run(run()) == (("value-1", "stale"), ("value-1", "stale"))
+
+
+def test_lru_drops_least_recently_used_over_max_entries():
+    async def run():
+        cache, source = AsyncTTLCache(ttl_seconds=10, max_entries=2), Source()
+        await cache.get("a", source.fetch)
+        await cache.get("b", source.fetch)
+        await cache.get("a", source.fetch)  # a를 최근 사용으로
+        await cache.get("c", source.fetch)  # 가장 오래 안 쓴 b가 빠짐
+        return [await cache.get(key, source.fetch) for key in ("a", "c", "b")]
+
+    assert asyncio.run(run()) == [("value-1", "hit"), ("value-3", "hit"), ("value-4", "miss")]
@@ -0,0 +1,151 @@
+# tests/test_upload.py
+import hashlib
+import io
+import os
+import time
+import uuid
+import zipfile
+
+import httpx
+from PIL import Image
+
+
+def png_bytes(color=None) -> bytes:
+    buffer = io.BytesIO()
+    # 판별 결과 캐시에 걸리지 않도록 기본은 매번 다른 이미지
+    Image.new("RGB", (8, 8), color or (uuid.uuid4().int % 256, 7, 7)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def stored_keys(broker, suffix: str, count: int, timeout: float = 5.0) -> list:
+    """suffix로 끝나는 객체가 count개 저장될 때까지 기다려 키 목록을 반환합니다."""
+    deadline = time.monotonic() + timeout
+    while True:
+        keys = [key for key in broker.storage.list_keys() if key.endswith(suffix)]
+        if len(keys) >= count or time.monotonic() > deadline:
+            return keys
+        time.sleep(0.01)
+
+
+def test_same_filename_uploads_get_separate_objects(broker, broker_client):
+    name = f"{uuid.uuid4().hex}.png"
+    first, second = png_bytes(), png_bytes()
+    task_ids = [broker_client.post("/upload/", files={"file": (name, content, "image/png")}).json()["task_id"]
+                for content in (first, second)]
+    keys = stored_keys(broker, name, 2)
+    assert len(keys) == 2
+    # 각 작업의 객체는 작업 ID로 구분되고 자기 내용을 그대로 가짐
+    for task_id, content in zip(task_ids, (first, second)):
+        [key] = [key for key in keys if task_id in key]
+        assert broker.storage.get(key) == content
+
+
+def wait_for_status(broker_client, task_id: str, timeout: float = 5.0) -> dict:
+    """작업이 처리 중이 아니게 될 때까지 기다려 상태를 반환합니다."""
+    deadline = time.monotonic() + timeout
+    while True:
+        status = broker_client.get(f"/status/{task_id}").json()
+        if status.get("status") not in ("pending", "processing") or time.monotonic() > deadline:
+            return status
+        time.sleep(0.01)
+
+
+def test_direct_mode_drops_storage_key_when_archive_fails(broker, broker_client, monkeypatch):
+    async def fake_post_to_worker(path, **kwargs):
+        return httpx.Response(200, json={"predict": "Real", "prob": "0.9", "model_id": broker.MODEL_ID})
+
+    def failing_put(key, data, public=False):
+        raise OSError("storage down")
+
+    monkeypatch.setattr(broker, "TRANSPORT_MODE", "direct")
+    monkeypatch.setattr(broker, "post_to_worker", fake_post_to_worker)
+    monkeypatch.setattr(broker.storage, "put", failing_put)
+    content = png_bytes()
+    task_id = broker_client.post("/upload/", files={"file": ("a.png", content, "image/png")}).json()["task_id"]
+
+    status = wait_for_status(broker_client, task_id)
+    assert status["status"] == "completed"
+    # 보관되지 않은 객체를 가리키는 키는 작업 결과에도, 판별 결과 캐시에도 남지 않음
+    assert "storage_key" not in status["result"]
+    cached = broker.verdict_cache.get(broker.hash_content(content))
+    assert cached["predict"] == "Real" and "storage_key" not in cached
+
+
+def test_object_mode_completes_with_storage_key(broker, broker_client, monkeypatch):
+    async def fake_post_to_worker(path, **kwargs):
+        return httpx.Response(200, json={"predict": "Fake", "prob": "0.8", "model_id": broker.MODEL_ID})
+
+    monkeypatch.setattr(broker, "TRANSPORT_MODE", "object")
+    monkeypatch.setattr(broker, "post_to_worker", fake_post_to_worker)
+    name = f"{uuid.uuid4().hex}.png"
+    task_id = broker_client.post("/upload/", files={"file": (name, png_bytes(), "image/png")}).json()["task_id"]
+
+    status = wait_for_status(broker_client, task_id)
+    assert status["status"] == "completed"
+    assert status["result"]["storage_key"].endswith(f"{task_id}_{name}")
+
+
+def test_large_upload_goes_multipart_with_matching_bytes_and_hash(broker, broker_client, monkeypatch):
+    async def fake_post_to_worker(path, **kwargs):
+        return httpx.Response(200, json={"predict": "Real", "prob": "0.7", "model_id": broker.MODEL_ID})
+
+    part_numbers = []
+    upload_part = broker.storage.upload_part
+
+    def recording_upload_part(key, upload_id, part_number, data):
+        part_numbers.append(part_number)
+        return upload_part(key, upload_id, part_number, data)
+
+    monkeypatch.setattr(broker, "MULTIPART_THRESHOLD", 100)
+    monkeypatch.setattr(broker, "MULTIPART_PART_SIZE", 64)
+    monkeypatch.setattr(broker, "TRANSPORT_MODE", "object")
+    monkeypatch.setattr(broker, "post_to_worker", fake_post_to_worker)
+    monkeypatch.setattr(broker.storage, "upload_part", recording_upload_part)
+    content = os.urandom(1000)
+    name = f"{uuid.uuid4().hex}.png"
+    task_id = broker_client.post("/upload/", files={"file": (name, content, "image/png")}).json()["task_id"]
+
+    status = wait_for_status(broker_client, task_id)
+    assert status["status"] == "completed"
+    # 1000바이트를 64바이트 파트로 나눠 올리고, 합친 객체와 해시는 입력과 같음
+    assert sorted(part_numbers) == list(range(1, 17))
+    assert broker.storage.get(status["result"]["storage_key"]) == content
+    assert broker.verdict_cache.get(hashlib.sha256(content).hexdigest())["predict"] == "Real"
+
+
+def zip_bytes(entries: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in entries.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def post_batch(broker_client, files: list):
+    return broker_client.post("/upload-batch/", files=[("files", (name, content)) for name, content in files])
+
+
+def test_batch_over_item_limit_is_rejected_with_413(broker, broker_client, monkeypatch):
+    monkeypatch.setattr(broker, "MAX_BATCH_ITEMS", 2)
+    response = post_batch(broker_client, [(f"{index}.png", png_bytes()) for index in range(3)])
+    assert response.status_code == 413
+    # zip 안의 이미지도 개수에 들어감
+    archive = zip_bytes({f"{index}.png": png_bytes() for index in range(2)})
+    response = post_batch(broker_client, [("a.png", png_bytes()), ("images.zip", archive)])
+    assert response.status_code == 413
+
+
+def test_batch_over_byte_limit_is_rejected_while_reading(broker, broker_client, monkeypatch):
+    monkeypatch.setattr(broker, "MAX_BATCH_BYTES", 1000)
+    monkeypatch.setattr(broker, "BATCH_READ_CHUNK_SIZE", 64)
+    response = post_batch(broker_client, [("a.png", os.urandom(600)), ("b.png", os.urandom(600))])
+    assert response.status_code == 413
+
+
+def test_batch_zip_over_unpacked_byte_limit_is_rejected(broker, broker_client, monkeypatch):
+    monkeypatch.setattr(broker, "MAX_BATCH_BYTES", 10_000)
+    # 압축하면 작지만 풀면 상한을 넘는 zip
+    archive = zip_bytes({"a.png": bytes(6_000), "b.png": bytes(6_000)})
+    assert len(archive) < 1_000
+    response = post_batch(broker_client, [("images.zip", archive)])
+    assert response.status_code == 413
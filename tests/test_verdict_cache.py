@@ -0,0 +1,114 @@
+# tests/test_verdict_cache.py
+import time
+
+from verdict_cache import VerdictCache, hash_content
+
+MODEL = "model-a"
+
+
+def make_cache(tmp_path, **kwargs):
+    kwargs.setdefault("model_id", MODEL)
+    return VerdictCache(db_path=str(tmp_path / "verdicts.db"), **kwargs)
+
+
+def test_hash_content_is_sha256_hex():
+    assert hash_content(b"abc") == "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
+
+
+def test_put_then_get_counts_hits_and_misses(tmp_path):
+    cache = make_cache(tmp_path)
+    assert cache.get("h1") is None
+    cache.put("h1", {"model_result": "Fake"})
+    assert cache.get("h1") == {"model_result": "Fake"}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_memory_lru_evicts_oldest_but_disk_keeps_it(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.put("h1", {"n": 1})
+    cache.put("h2", {"n": 2})
+    cache.get("h1")  # h1을 최근 사용으로 옮김
+    cache.put("h3", {"n": 3})
+    assert set(key for key, _ in cache._memory) == {"h1", "h3"}
+    # 메모리에서 밀려난 항목도 SQLite에서 다시 읽음
+    assert cache.get("h2") == {"n": 2}
+
+
+def test_expired_entry_is_dropped(tmp_path):
+    cache = make_cache(tmp_path, ttl_seconds=0.05)
+    cache.put("h1", {"n": 1})
+    time.sleep(0.1)
+    assert cache.get("h1") is None
+    assert cache._db.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0] == 0
+
+
+def test_results_survive_restart(tmp_path):
+    make_cache(tmp_path).put("h1", {"n": 1})
+    assert make_cache(tmp_path).get("h1") == {"n": 1}
+
+
+def test_get_many_keeps_order(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("h1", {"n": 1})
+    cache.put("h3", {"n": 3})
+    assert cache.get_many(["h3", "h2", "h1"]) == [{"n": 3}, None, {"n": 1}]
+
+
+def test_other_model_results_are_kept_apart(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("h1", {"n": 1}, model_id="model-b")
+    # 설정된 모델로는 조회되지 않고, 다른 모델의 결과를 저장해도 기존 결과가 지워지지 않음
+    cache.put("h2", {"n": 2})
+    cache.put("h2", {"n": 22}, model_id="model-b")
+    assert cache.get("h1") is None
+    assert cache.get("h2") == {"n": 2}
+    assert cache.get("h1", model_id="model-b") == {"n": 1}
+
+
+def test_configured_model_change_drops_previous_model_only(tmp_path):
+    old = make_cache(tmp_path)
+    old.put("h1", {"n": 1})
+    old.put("h1", {"n": 9}, model_id="model-b")
+    new = make_cache(tmp_path, model_id="model-c")
+    assert new.get("h1", model_id=MODEL) is None
+    assert new.get("h1", model_id="model-b") == {"n": 9}
+    # 같은 설정으로 다시 시작하면 아무것도 지우지 않음
+    new.put("h2", {"n": 2})
+    assert make_cache(tmp_path, model_id="model-c").get("h2") == {"n": 2}
+
+
+def test_invalidate_by_model(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("h1", {"n": 1})
+    cache.put("h1", {"n": 2}, model_id="model-b")
+    cache.invalidate("model-b")
+    assert cache.get("h1") == {"n": 1}
+    assert cache.get("h1", model_id="model-b") is None
+    cache.invalidate()
+    assert cache.get("h1") is None
+
+
+def test_disk_rows_are_capped_oldest_first(tmp_path):
+    cache = make_cache(tmp_path, max_entries=1, max_disk_entries=3)
+    for n in range(5):
+        cache.put(f"h{n}", {"n": n})
+    rows = cache._db.execute("SELECT content_hash FROM verdicts ORDER BY created_at").fetchall()
+    assert [row[0] for row in rows] == ["h2", "h3", "h4"]
+    assert cache.get("h0") is None
+
+
+def test_expired_rows_are_purged_on_startup_and_periodically(tmp_path):
+    cache = make_cache(tmp_path, ttl_seconds=0.05, purge_every=3)
+    cache.put("h1", {"n": 1})
+    time.sleep(0.1)
+    # 조회하지 않은 만료 결과도 재시작 시 지워짐
+    restarted = make_cache(tmp_path, ttl_seconds=0.05, purge_every=3)
+    assert restarted._db.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0] == 0
+
+    restarted.put("h2", {"n": 2})
+    time.sleep(0.1)
+    restarted.put("h3", {"n": 3})
+    restarted.put("h4", {"n": 4})  # purge_every번째 저장에서 만료된 h2 삭제
+    rows = restarted._db.execute("SELECT content_hash FROM verdicts").fetchall()
+    assert sorted(row[0] for row in rows) == ["h3", "h4"]
@@ -0,0 +1,67 @@
+# tests/test_video.py
+import asyncio
+
+import numpy as np
+import pytest
+
+import predict
+from video import analyze_video, iter_sampled_frames
+
+av = pytest.importorskip("av")
+
+FPS = 10
+SECONDS = 4
+
+
+def encode_video(path, color) -> str:
+    """한 가지 색으로 채운 FPS x SECONDS 프레임짜리 작은 영상을 만듭니다."""
+    with av.open(str(path), mode="w") as container:
+        stream = container.add_stream("mpeg4", rate=FPS)
+        stream.width, stream.height, stream.pix_fmt = 64, 48, "yuv420p"
+        pixels = np.full((48, 64, 3), color, dtype=np.uint8)
+        for _ in range(FPS * SECONDS):
+            for packet in stream.encode(av.VideoFrame.from_ndarray(pixels, format="rgb24")):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+    return str(path)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def stub_model():
+    predict.load_model(warmup=False)
+
+
+async def submit_frame(image):
+    """가짜 엔진으로 프레임 하나를 판별합니다. (Fake 확률: 회색 ~0.5, 흰색 ~0.88)"""
+    [prediction] = await asyncio.to_thread(predict.predict_deepfake_batch_with_stage, [image])
+    return prediction
+
+
+def test_frames_are_sampled_at_requested_rate(tmp_path):
+    frames = list(iter_sampled_frames(encode_video(tmp_path / "gray.mp4", 128), sample_fps=2))
+    assert [round(frame_time, 3) for frame_time, _ in frames] == [0.5 * index for index in range(2 * SECONDS)]
+    assert all(image.size == (64, 48) for _, image in frames)
+
+
+def test_uncertain_video_is_analyzed_to_the_end(tmp_path):
+    result = asyncio.run(analyze_video(encode_video(tmp_path / "gray.mp4", 128), submit_frame, sample_fps=2,
+                                       batch_size=3, min_frames=2))
+    assert result["frames_analyzed"] == 2 * SECONDS
+    assert not result["early_exit"]
+
+
+def test_frame_cap_limits_analysis(tmp_path):
+    result = asyncio.run(analyze_video(encode_video(tmp_path / "gray.mp4", 128), submit_frame, sample_fps=FPS,
+                                       batch_size=4, max_frames=6))
+    assert result["frames_analyzed"] == 6
+    assert [point["time"] for point in result["timeline"]] == [0.0, 0.1, 0.2, 0.3, 0.4, 0.5]
+
+
+def test_decisive_video_exits_early(tmp_path):
+    result = asyncio.run(analyze_video(encode_video(tmp_path / "white.mp4", 255), submit_frame, sample_fps=2,
+                                       batch_size=2, min_frames=4, decisive_threshold=0.85))
+    # 흰색 프레임의 평균 Fake 확률(~0.88)이 기준을 넘으므로 최소 프레임 수를 채운 배치에서 멈춤
+    assert result["early_exit"]
+    assert result["frames_analyzed"] == 4
+    assert result["model_result"] == "Fake"
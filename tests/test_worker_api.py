@@ -0,0 +1,49 @@
+# tests/test_worker_api.py
+import io
+
+from PIL import Image
+
+
+def png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_process_bytes_runs_model_on_small_body(worker_client):
+    response = worker_client.post("/process-bytes/", params={"object_name": "a.png"}, content=png_bytes(),
+                                  headers={"X-Task-ID": "t1"})
+    assert response.status_code == 200
+    assert response.json()["task_id"] == "t1"
+    assert "model_result" in response.json()
+
+
+def test_process_bytes_rejects_large_content_length(worker, worker_client, monkeypatch):
+    monkeypatch.setattr(worker, "MAX_DIRECT_BODY_BYTES", 16)
+    response = worker_client.post("/process-bytes/", params={"object_name": "a.png"}, content=b"x" * 17,
+                                  headers={"X-Task-ID": "t2"})
+    assert response.status_code == 413
+    assert response.json()["task_id"] == "t2"
+
+
+def test_process_bytes_rejects_large_chunked_body(worker, worker_client, monkeypatch):
+    monkeypatch.setattr(worker, "MAX_DIRECT_BODY_BYTES", 16)
+    def chunks():
+        for _ in range(100):
+            yield b"x" * 10
+
+    # Content-Length 없이(chunked) 보내도 읽는 도중 한도를 넘으면 거절
+    response = worker_client.post("/process-bytes/", params={"object_name": "a.png"}, content=chunks())
+    assert response.status_code == 413
+
+
+def test_process_bytes_counts_corrupt_body_once_as_decode_error(worker_client):
+    from common.metrics import STAGE_ERRORS
+    before = dict(STAGE_ERRORS._values)
+    response = worker_client.post("/process-bytes/", params={"object_name": "broken.png"}, content=b"not an image",
+                                  headers={"X-Task-ID": "t3"})
+    assert response.status_code == 200
+    assert "error" in response.json()
+    added = {key: value - before.get(key, 0) for key, value in STAGE_ERRORS._values.items()
+             if value != before.get(key, 0)}
+    assert added == {("decode",): 1}
@@ -0,0 +1,101 @@
+# tests/test_worker_pool.py
+import asyncio
+
+import httpx
+import pytest
+
+from worker_pool import NoWorkerAvailable, WorkerPool
+
+URLS = ["http://w1", "http://w2", "http://w3"]
+
+
+def test_pick_prefers_ready_worker_with_fewest_requests():
+    pool = WorkerPool(URLS)
+    w1, w2, w3 = pool.workers
+    w1.outstanding, w2.outstanding, w3.outstanding = 2, 1, 0
+    w3.ready = False
+    assert pool.pick() is w2
+    assert pool.pick(exclude=(w2,)) is w1
+
+
+def test_pick_falls_back_to_unready_then_raises():
+    pool = WorkerPool(URLS[:2])
+    w1, w2 = pool.workers
+    pool.mark_failed(w1, "boom")
+    pool.mark_failed(w2, "boom")
+    assert pool.pick() in (w1, w2)
+    with pytest.raises(NoWorkerAvailable):
+        pool.pick(exclude=(w1, w2))
+
+
+def test_probe_updates_readiness():
+    def handler(request):
+        if request.url.host == "w1":
+            return httpx.Response(200, json={"status": "ready"})
+        if request.url.host == "w2":
+            return httpx.Response(503)
+        raise httpx.ConnectError("refused", request=request)
+
+    async def run():
+        pool = WorkerPool(URLS)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            pool._client = client
+            await asyncio.gather(*[pool.probe(worker) for worker in pool.workers])
+        return [(worker.alive, worker.ready) for worker in pool.workers]
+
+    assert asyncio.run(run()) == [(True, True), (True, False), (False, False)]
+
+
+def call_post_to_worker(broker, monkeypatch, handler, urls=URLS):
+    """브로커의 post_to_worker를 가짜 Worker 응답(handler)으로 실행하고 (응답 또는 예외, 요청받은 Worker 목록)을 반환합니다."""
+    seen = []
+
+    def recording_handler(request):
+        seen.append(request.url.host)
+        return handler(request)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(recording_handler)) as client:
+            monkeypatch.setattr(broker, "worker_client", client)
+            monkeypatch.setattr(broker, "worker_pool", WorkerPool(urls))
+            try:
+                return await broker.post_to_worker("/process-object/", json={})
+            except Exception as e:
+                return e
+
+    return asyncio.run(run()), seen
+
+
+def test_post_to_worker_retries_on_connect_error_and_5xx(broker, monkeypatch):
+    failing = {"w1": "connect", "w2": 503}
+
+    def handler(request):
+        failure = failing.get(request.url.host)
+        if failure == "connect":
+            raise httpx.ConnectError("refused", request=request)
+        if failure:
+            return httpx.Response(failure)
+        return httpx.Response(200, json={"ok": True})
+
+    response, seen = call_post_to_worker(broker, monkeypatch, handler)
+    assert response.status_code == 200
+    assert seen[-1] == "w3" and len(seen) == len(set(seen))
+
+
+def test_post_to_worker_does_not_retry_read_timeout(broker, monkeypatch):
+    def handler(request):
+        raise httpx.ReadTimeout("slow", request=request)
+
+    error, seen = call_post_to_worker(broker, monkeypatch, handler)
+    assert isinstance(error, httpx.ReadTimeout)
+    assert len(seen) == 1
+
+
+def test_post_to_worker_raises_clear_error_when_no_worker_left(broker, monkeypatch):
+    def handler(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    error, seen = call_post_to_worker(broker, monkeypatch, handler, urls=URLS[:2])
+    assert isinstance(error, NoWorkerAvailable)
+    assert "준비된 Worker가 없습니다" in str(error) and "None" not in str(error)
+    assert sorted(seen) == ["w1", "w2"]